@@ -0,0 +1,100 @@
+"""BUSQUEDA CLINICA
+
+Revision ID: a9c3e5f71b64
+Revises: f2b7d9c31e58
+Create Date: 2026-10-19 17:34:05.661820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f71b64'
+down_revision: Union[str, Sequence[str], None] = 'f2b7d9c31e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('historial_medico', sa.Column('busqueda_clinica', postgresql.TSVECTOR(), nullable=True))
+    op.create_index('ix_historial_medico_busqueda_clinica', 'historial_medico', ['busqueda_clinica'], unique=False, postgresql_using='gin')
+
+    #texto de los hijos (procedimientos y resultados de examen) de un historial
+    op.execute("""
+    CREATE OR REPLACE FUNCTION fn_historial_texto_hijos(p_historial_id integer) RETURNS text AS $$
+        SELECT concat_ws(' ',
+            (SELECT string_agg(concat_ws(' ', p.nombre, p.descripcion), ' ')
+             FROM procedimiento_medico p WHERE p.historial_medico_id = p_historial_id),
+            (SELECT string_agg(concat_ws(' ', te.nombre_tipo_examen, r.conclusiones), ' ')
+             FROM orden_examen o
+             JOIN tipo_examen te ON te.id_tipo_examen = o.tipo_examen_id
+             LEFT JOIN resultado_examen r ON r.orden_examen_id = o.id_orden
+             WHERE o.historial_medico_id = p_historial_id)
+        );
+    $$ LANGUAGE sql STABLE;
+    """)
+
+    #diagnosticos pesan mas que la anamnesis/examen, y estos mas que los hijos
+    op.execute("""
+    CREATE OR REPLACE FUNCTION fn_historial_busqueda_clinica() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda_clinica :=
+            setweight(to_tsvector('spanish', concat_ws(' ', NEW.diagnostico_presuntivo, NEW.diagnostico_definitivo)), 'A') ||
+            setweight(to_tsvector('spanish', concat_ws(' ', NEW.anamnesis, NEW.examen_fisico_obs)), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(fn_historial_texto_hijos(NEW.id_historial), '')), 'C');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_historial_busqueda_clinica
+    BEFORE INSERT OR UPDATE ON historial_medico
+    FOR EACH ROW EXECUTE FUNCTION fn_historial_busqueda_clinica();
+    """)
+
+    #cambios en los hijos vuelven a calcular el vector del historial
+    op.execute("""
+    CREATE OR REPLACE FUNCTION fn_historial_hijo_busqueda() RETURNS trigger AS $$
+    DECLARE
+        v_historial_id integer;
+        v_fila record;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN v_fila := OLD; ELSE v_fila := NEW; END IF;
+
+        IF TG_TABLE_NAME = 'resultado_examen' THEN
+            SELECT historial_medico_id INTO v_historial_id FROM orden_examen WHERE id_orden = v_fila.orden_examen_id;
+        ELSE
+            v_historial_id := v_fila.historial_medico_id;
+        END IF;
+
+        UPDATE historial_medico SET busqueda_clinica = NULL WHERE id_historial = v_historial_id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    for tabla in ('procedimiento_medico', 'orden_examen', 'resultado_examen'):
+        op.execute(f"""
+        CREATE TRIGGER trg_{tabla}_busqueda_clinica
+        AFTER INSERT OR UPDATE OR DELETE ON {tabla}
+        FOR EACH ROW EXECUTE FUNCTION fn_historial_hijo_busqueda();
+        """)
+
+    #llenar los historiales existentes (el trigger recalcula el vector)
+    op.execute("UPDATE historial_medico SET busqueda_clinica = NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla in ('procedimiento_medico', 'orden_examen', 'resultado_examen'):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{tabla}_busqueda_clinica ON {tabla}")
+    op.execute("DROP TRIGGER IF EXISTS trg_historial_busqueda_clinica ON historial_medico")
+    op.execute("DROP FUNCTION IF EXISTS fn_historial_hijo_busqueda()")
+    op.execute("DROP FUNCTION IF EXISTS fn_historial_busqueda_clinica()")
+    op.execute("DROP FUNCTION IF EXISTS fn_historial_texto_hijos(integer)")
+    op.drop_index('ix_historial_medico_busqueda_clinica', table_name='historial_medico', postgresql_using='gin')
+    op.drop_column('historial_medico', 'busqueda_clinica')
@@ -0,0 +1,60 @@
+"""TRIGGER STOCK PRODUCTO
+
+Revision ID: d4a6b1e85c02
+Revises: c3d98a6e1f27
+Create Date: 2026-10-19 14:21:10.530964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a6b1e85c02'
+down_revision: Union[str, Sequence[str], None] = 'c3d98a6e1f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    #productos.stock_actual pasa a ser la suma de stock_lote, mantenida por la base
+    op.execute("""
+    CREATE OR REPLACE FUNCTION fn_stock_lote_total() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.producto_id = NEW.producto_id THEN
+            IF NEW.cantidad_disponible <> OLD.cantidad_disponible THEN
+                UPDATE productos
+                SET stock_actual = stock_actual + (NEW.cantidad_disponible - OLD.cantidad_disponible)
+                WHERE id_producto = NEW.producto_id;
+            END IF;
+            RETURN NULL;
+        END IF;
+
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE productos SET stock_actual = stock_actual - OLD.cantidad_disponible
+            WHERE id_producto = OLD.producto_id;
+        END IF;
+
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            UPDATE productos SET stock_actual = stock_actual + NEW.cantidad_disponible
+            WHERE id_producto = NEW.producto_id;
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+    CREATE TRIGGER trg_stock_lote_total
+    AFTER INSERT OR DELETE OR UPDATE OF cantidad_disponible, producto_id ON stock_lote
+    FOR EACH ROW EXECUTE FUNCTION fn_stock_lote_total();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_stock_lote_total ON stock_lote;")
+    op.execute("DROP FUNCTION IF EXISTS fn_stock_lote_total();")
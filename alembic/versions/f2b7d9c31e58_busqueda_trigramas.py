@@ -0,0 +1,37 @@
+"""BUSQUEDA TRIGRAMAS
+
+Revision ID: f2b7d9c31e58
+Revises: e8f1c2a47d36
+Create Date: 2026-10-19 16:10:27.903415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d9c31e58'
+down_revision: Union[str, Sequence[str], None] = 'e8f1c2a47d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_productos_nombre_trgm', 'productos', ['nombre_producto'], unique=False, postgresql_using='gin', postgresql_ops={'nombre_producto': 'gin_trgm_ops'})
+    op.create_index('ix_animals_nombre_trgm', 'animals', ['nombre_animal'], unique=False, postgresql_using='gin', postgresql_ops={'nombre_animal': 'gin_trgm_ops'})
+    op.create_index('ix_especies_nombre_trgm', 'especies', ['nombre'], unique=False, postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'})
+    op.create_index('ix_especies_nombre_cientifico_trgm', 'especies', ['nombre_cientifico'], unique=False, postgresql_using='gin', postgresql_ops={'nombre_cientifico': 'gin_trgm_ops'})
+    op.create_index('ix_habitats_nombre_trgm', 'habitats', ['nombre_habitat'], unique=False, postgresql_using='gin', postgresql_ops={'nombre_habitat': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_habitats_nombre_trgm', table_name='habitats')
+    op.drop_index('ix_especies_nombre_cientifico_trgm', table_name='especies')
+    op.drop_index('ix_especies_nombre_trgm', table_name='especies')
+    op.drop_index('ix_animals_nombre_trgm', table_name='animals')
+    op.drop_index('ix_productos_nombre_trgm', table_name='productos')
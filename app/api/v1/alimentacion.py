@@ -1,3 +1,6 @@
+import json
+from datetime import date, timedelta
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from fastapi_pagination import Page
@@ -9,6 +12,7 @@ from app.core.dependencies import require_animal_management_permission, get_curr
 from app.crud import dieta as crud_dieta
 from app.crud import tarea as crud_tarea
 from app.schemas import dieta as schemas_dieta
+from app.schemas import tarea as schemas_tarea
 from app.models import tarea as models_tarea
 from app.models.user import User
 
@@ -69,7 +73,7 @@ def soft_delete_dieta(
 
 
 #SUGERENCIAS
-@router.get("/{id_tarea}/sugerencia-dieta", response_model=schemas_dieta.DietaOut)
+@router.get("/{id_tarea}/sugerencia-dieta", response_model=schemas_dieta.DietaSugeridaOut)
 def get_sugerencia_dieta_para_tarea(
     id_tarea: int,
     db: Session = Depends(get_db),
@@ -78,7 +82,7 @@ def get_sugerencia_dieta_para_tarea(
 
     db_tarea = _get_tarea_local_or_404(id_tarea, db)
 
-    if db_tarea.tipo_tarea_id != 1 and "alimentacion" not in str(db_tarea.tipo_tarea.nombre_tipo_tarea).lower():
+    if not crud_tarea.es_tarea_alimentacion(db_tarea.tipo_tarea_id, db_tarea.tipo_tarea.nombre_tipo_tarea):
          raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Esta tarea no parece ser de Alimentacion"
@@ -90,12 +94,67 @@ def get_sugerencia_dieta_para_tarea(
             detail="La tarea no esta asignada a un animal especifico"
         )
 
-    dieta = crud_dieta.get_dieta_for_animal(db, animal_id=db_tarea.animal_id)
+    dieta_json = crud_dieta.get_dieta_payload_for_animal(db, animal_id=db_tarea.animal_id)
     
-    if not dieta:
+    if not dieta_json:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="No se encontro un plan de dieta configurado para este animal o su especie"
         )
-        
-    return dieta
\ No newline at end of file
+
+    #el payload ya viene serializado como DietaSugeridaOut desde el cache
+    return Response(content=dieta_json, media_type="application/json")
+
+@router.post("/sugerencias-dieta", response_model=List[schemas_dieta.SugerenciaDietaOut])
+def get_sugerencias_dieta_bulk(
+    body: schemas_dieta.SugerenciaDietaBulkIn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    tareas = crud_tarea.get_tareas_destino(db, body.tareas_ids)
+
+    animal_ids = [
+        t.animal_id for t in tareas.values()
+        if t.animal_id and crud_tarea.es_tarea_alimentacion(t.tipo_tarea_id, t.nombre_tipo_tarea)
+    ]
+    dietas = crud_dieta.get_dieta_payloads_for_animals(db, animal_ids) if animal_ids else {}
+
+    items = []
+    for id_tarea in dict.fromkeys(body.tareas_ids):
+        t = tareas.get(id_tarea)
+        item = {"id_tarea": id_tarea, "animal_id": None, "detalle": None, "dieta": None}
+
+        if not t:
+            item["detalle"] = "Tarea no encontrada"
+        elif not crud_tarea.es_tarea_alimentacion(t.tipo_tarea_id, t.nombre_tipo_tarea):
+            item["detalle"] = "Esta tarea no parece ser de Alimentacion"
+        elif not t.animal_id:
+            item["detalle"] = "La tarea no esta asignada a un animal especifico"
+        else:
+            item["animal_id"] = t.animal_id
+            if dietas.get(t.animal_id):
+                #el DietaSugeridaOut cacheado se usa tal cual, sin volver a validarlo
+                item["dieta"] = json.loads(dietas[t.animal_id])
+            else:
+                item["detalle"] = "No se encontro un plan de dieta configurado para este animal o su especie"
+        items.append(item)
+
+    return Response(content=json.dumps(items), media_type="application/json")
+
+#APETITO
+@router.get("/apetito/alertas", response_model=Page[schemas_tarea.ResumenApetitoOut], dependencies=[Depends(require_animal_management_permission)])
+def list_alertas_apetito(db: Session = Depends(get_db)):
+    #calculadas por el job nocturno sobre el acumulado diario
+    return paginate(crud_tarea.get_alertas_apetito_query(db))
+
+@router.get("/desperdicio", response_model=List[schemas_tarea.DesperdicioHabitatOut], dependencies=[Depends(require_animal_management_permission)])
+def get_desperdicio_por_habitat(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=6)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="El rango de fechas no es valido")
+    return crud_tarea.get_desperdicio_por_habitat(db, desde, hasta)
@@ -1,27 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from fastapi import File, Form, UploadFile
-from app.core.uploader import upload_to_cloudinary, delete_from_cloudinary
+from app.core import media_ingesta
 
 from app.db.session import get_db
 from app.core.dependencies import require_admin_user, get_current_active_user, require_animal_management_permission
+from app.core import catalogo_cache
 
 from app.crud import animal as crud_animal
+from app.crud import timeline as crud_timeline
 from app.schemas.animal import (
     EspecieCreate, EspecieUpdate, EspecieOut,
     HabitatCreate, HabitatUpdate, HabitatOut,
     AnimalCreate, AnimalUpdate, AnimalOut, MediaCreateAnimal,
-    MediaOutAnimal, MediaCreateHabitat, MediaOutHabitat
+    MediaOutAnimal, MediaCreateHabitat, MediaOutHabitat,
+    TimelineOut, AnimalTendenciaOut
 )
+from app.schemas.media_ingesta import MediaIngestaOut
 from app.models.user import User 
 #pagination
-from fastapi_pagination import Page
+from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
 
 router = APIRouter()
 
+def _pagina(schema, query, params: Params):
+    return lambda: Page[schema].model_validate(paginate(query, params=params), from_attributes=True)
+
 # ---Especies ---
 
 @router.post("/species/", response_model=EspecieOut, tags=["Especies"], status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin_user)])
@@ -32,8 +39,11 @@ def create_especie(especie_in: EspecieCreate, db: Session = Depends(get_db)):
     return crud_animal.create_especie(db, especie_in)
 
 @router.get("/species/", response_model=Page[EspecieOut], tags=["Especies"])
-def list_especies(db: Session = Depends(get_db)):
-    return paginate(crud_animal.list_especies(db=db))
+def list_especies(request: Request, params: Params = Depends(), db: Session = Depends(get_db)):
+    return catalogo_cache.responder(
+        request, db, f"especies:{params.page}:{params.size}",
+        _pagina(EspecieOut, crud_animal.list_especies(db=db), params)
+    )
 
 @router.get("/species/{especie_id}", response_model=EspecieOut, tags=["Especies"])
 def get_especie(especie_id: int, db: Session = Depends(get_db)):
@@ -66,8 +76,11 @@ def create_habitat(habitat_in: HabitatCreate, db: Session = Depends(get_db)):
     return crud_animal.create_habitat(db, habitat_in)
 
 @router.get("/habitats/", response_model=Page[HabitatOut], tags=["Habitats"])
-def list_habitats(db: Session = Depends(get_db)):
-    return paginate(crud_animal.list_habitats(db))
+def list_habitats(request: Request, params: Params = Depends(), db: Session = Depends(get_db)):
+    return catalogo_cache.responder(
+        request, db, f"habitats:{params.page}:{params.size}",
+        _pagina(HabitatOut, crud_animal.list_habitats(db), params)
+    )
 
 @router.get("/habitats/{habitat_id}", response_model=HabitatOut, tags=["Habitats"])
 def get_habitat(habitat_id: int, db: Session = Depends(get_db)):
@@ -99,14 +112,27 @@ def create_animal(animal_in: AnimalCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/animals/", response_model=Page[AnimalOut], tags=["Animales"])
-def list_animals(db: Session = Depends(get_db), current_user: Optional[User] = Depends(get_current_active_user)):
+def list_animals(
+    request: Request,
+    params: Params = Depends(),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_active_user)
+):
     user_role = getattr(getattr(current_user, 'role', None), 'nombre_rol', 'visitante').lower()
     allowed_roles = {"administrador", "veterinario", "cuidador"}
 
-    if user_role in allowed_roles:
-        return paginate(crud_animal.list_animals(db, es_publico=None))
-    else:
-        return paginate(crud_animal.list_animals(db, es_publico=True))
+    #el personal ve tambien los no publicos, cada vista tiene su propia entrada de cache
+    es_personal = user_role in allowed_roles
+    es_publico = None if es_personal else True
+    return catalogo_cache.responder(
+        request, db, f"animales:{'personal' if es_personal else 'publico'}:{params.page}:{params.size}",
+        _pagina(AnimalOut, crud_animal.list_animals(db, es_publico=es_publico), params),
+        publico=not es_personal
+    )
+
+@router.get("/animals/trending", response_model=List[AnimalTendenciaOut], tags=["Animales"])
+def list_animales_tendencia(limite: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    return crud_animal.get_animales_tendencia(db, limite)
 
 @router.get("/animals/{animal_id}", response_model=AnimalOut, tags=["Animales"])
 def get_animal(animal_id: int, db: Session = Depends(get_db), current_user: Optional[User] = Depends(get_current_active_user)):
@@ -122,6 +148,21 @@ def get_animal(animal_id: int, db: Session = Depends(get_db), current_user: Opti
         
     return db_animal
 
+@router.get("/animals/{animal_id}/timeline", response_model=TimelineOut, tags=["Animales"])
+def get_animal_timeline(
+    animal_id: int,
+    tipos: Optional[List[str]] = Query(None, description=", ".join(crud_timeline.TIPOS_TIMELINE)),
+    cursor: Optional[str] = None,
+    limite: int = Query(30, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_animal_management_permission)
+):
+    if not crud_animal.get_animal(db, animal_id):
+        raise HTTPException(status_code=404, detail="Animal no encontrado")
+    if tipos and any(t not in crud_timeline.TIPOS_TIMELINE for t in tipos):
+        raise HTTPException(status_code=400, detail=f"Tipos validos: {', '.join(crud_timeline.TIPOS_TIMELINE)}")
+    return crud_timeline.get_timeline_animal(db, animal_id, tipos=tipos, cursor=cursor, limite=limite)
+
 @router.put("/animals/{animal_id}", response_model=AnimalOut, tags=["Animales"], dependencies=[Depends(require_animal_management_permission)])
 def update_animal(animal_id: int, animal_in: AnimalUpdate, db: Session = Depends(get_db)):
     db_animal = crud_animal.get_animal(db, animal_id)
@@ -141,9 +182,10 @@ def delete_animal(animal_id: int, db: Session = Depends(get_db)):
 
 # --- Media ---
 
-@router.post("/animals/{animal_id}/media", response_model=MediaOutAnimal, tags=["Media"], status_code=status.HTTP_201_CREATED)
+@router.post("/animals/{animal_id}/media", response_model=MediaIngestaOut, tags=["Media"], status_code=status.HTTP_202_ACCEPTED)
 def upload_animal_media(
     animal_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_animal_management_permission),
     file: UploadFile = File(...),
@@ -164,19 +206,13 @@ def upload_animal_media(
         url_animal="placeholder"
     )
     
-    #2 Subir a Cloudinary
-    try:
-        upload_result = upload_to_cloudinary(file, folder="animals")
-    except HTTPException as e:
-        raise e
-        
-    #3 Guardar en la base de datos
-    return crud_animal.add_media_to_animal(
-        db=db,
-        animal_id=animal_id,
-        media_in=media_in,
-        upload_result=upload_result
+    #2 Dejar el archivo en disco, las variantes y la subida las hace el worker
+    ingesta = media_ingesta.encolar(
+        db, "animal", animal_id, file, current_user.id,
+        datos={"tipo_medio": media_in.tipo_medio, "titulo": media_in.titulo_media_animal, "descripcion": media_in.descripcion_media_animal}
     )
+    background_tasks.add_task(media_ingesta.procesar, ingesta.id_ingesta)
+    return ingesta
 
 @router.delete("/media/animal/{media_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Media"])
 def delete_animal_media_file(media_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_animal_management_permission)):
@@ -184,29 +220,32 @@ def delete_animal_media_file(media_id: int, db: Session = Depends(get_db), curre
     if not db_media:
         raise HTTPException(status_code=404, detail="Archivo multimedia no encontrado")
         
-    if db_media.public_id:
-        delete_from_cloudinary(db_media.public_id)
+    media_ingesta.eliminar_archivos(db_media.public_id, db_media.variantes)
         
     crud_animal.delete_media_animal(db, media_id) 
     
     return None
 
 @router.get("/animals/{animal_id}/media", response_model=Page[MediaOutAnimal], tags=["Media"])
-def get_all_media_for_animal(animal_id: int, db: Session = Depends(get_db)):
+def get_all_media_for_animal(request: Request, animal_id: int, params: Params = Depends(), db: Session = Depends(get_db)):
     db_animal = crud_animal.get_animal(db, animal_id)
     if not db_animal:
         raise HTTPException(status_code=404, detail="Animal no encontrado")
         
-    return paginate(crud_animal.get_media_by_animal_id(db, animal_id=animal_id))
+    return catalogo_cache.responder(
+        request, db, f"media_animal:{animal_id}:{params.page}:{params.size}",
+        _pagina(MediaOutAnimal, crud_animal.get_media_by_animal_id(db, animal_id=animal_id), params)
+    )
 
 @router.get("/media/animals/", response_model=Page[MediaOutAnimal], tags=["Media"])
 def get_all_animal_media_files(db: Session = Depends(get_db), current_user: User = Depends(require_admin_user)):
     return paginate(crud_animal.get_all_media_animals(db))
 
 #Media habitat
-@router.post("/habitats/{habitat_id}/media", response_model=MediaOutHabitat, tags=["Habitats", "Media"], status_code=status.HTTP_201_CREATED)
+@router.post("/habitats/{habitat_id}/media", response_model=MediaIngestaOut, tags=["Habitats", "Media"], status_code=status.HTTP_202_ACCEPTED)
 def upload_habitat_media(
     habitat_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_user),
     file: UploadFile = File(...),
@@ -225,17 +264,12 @@ def upload_habitat_media(
         url_habitat="placeholder" 
     )
     
-    try:
-        upload_result = upload_to_cloudinary(file, folder="habitats")
-    except HTTPException as e:
-        raise e
-        
-    return crud_animal.add_media_to_habitat(
-        db=db, 
-        habitat_id=habitat_id, 
-        media_in=media_in, 
-        upload_result=upload_result
+    ingesta = media_ingesta.encolar(
+        db, "habitat", habitat_id, file, current_user.id,
+        datos={"tipo_medio": media_in.tipo_medio, "titulo": media_in.titulo_media_habitat, "descripcion": media_in.descripcion_media_habitat}
     )
+    background_tasks.add_task(media_ingesta.procesar, ingesta.id_ingesta)
+    return ingesta
 
 @router.delete("/media/habitat/{media_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Media"])
 def delete_habitat_media_file(media_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_admin_user)):
@@ -243,19 +277,21 @@ def delete_habitat_media_file(media_id: int, db: Session = Depends(get_db), curr
     if not db_media:
         raise HTTPException(status_code=404, detail="Archivo multimedia no encontrado")
         
-    if db_media.public_id:
-        delete_from_cloudinary(db_media.public_id)
+    media_ingesta.eliminar_archivos(db_media.public_id, db_media.variantes)
         
     crud_animal.delete_media_habitat(db, media_id) 
     return None
 
 @router.get("/habitats/{habitat_id}/media", response_model=Page[MediaOutHabitat], tags=["Habitats", "Media"])
-def get_all_media_for_habitat(habitat_id: int, db: Session = Depends(get_db)):
+def get_all_media_for_habitat(request: Request, habitat_id: int, params: Params = Depends(), db: Session = Depends(get_db)):
     db_habitat = crud_animal.get_habitat(db, habitat_id)
     if not db_habitat:
         raise HTTPException(status_code=404, detail="Habitat no encontrado")
         
-    return paginate(crud_animal.get_media_by_habitat_id(db, habitat_id=habitat_id))
+    return catalogo_cache.responder(
+        request, db, f"media_habitat:{habitat_id}:{params.page}:{params.size}",
+        _pagina(MediaOutHabitat, crud_animal.get_media_by_habitat_id(db, habitat_id=habitat_id), params)
+    )
 
 @router.get("/media/habitats/", response_model=Page[MediaOutHabitat], tags=["Media"])
 def get_all_habitat_media_files(db: Session = Depends(get_db), current_user: User = Depends(require_admin_user)):
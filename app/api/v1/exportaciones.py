@@ -0,0 +1,87 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.dependencies import (
+    require_admin_user, require_inventory_read_permission, require_task_management_permission
+)
+from app.core import exportacion
+from app.crud import exportacion as crud_exportacion
+from app.crud import survey as crud_survey
+
+router = APIRouter()
+
+Formato = Literal["csv", "xlsx"]
+COLUMNAS_DESCRIPCION = "Columnas separadas por coma, en el orden de salida. Vacio exporta todas"
+
+
+def _exportar(stmt_columnas, formato: str, columnas: Optional[str], nombre: str):
+    stmt, disponibles = stmt_columnas
+    elegidas = exportacion.seleccionar(disponibles, columnas)
+    return exportacion.exportar(stmt, disponibles, elegidas, formato, nombre)
+
+
+@router.get("/productos", dependencies=[Depends(require_inventory_read_permission)])
+def exportar_productos(
+    formato: Formato = "csv",
+    columnas: Optional[str] = Query(None, description=COLUMNAS_DESCRIPCION),
+    include_inactive: bool = False,
+    tipo_producto_id: Optional[int] = None,
+    nombre: Optional[str] = None
+):
+    return _exportar(
+        crud_exportacion.productos_stmt(include_inactive, tipo_producto_id, nombre),
+        formato, columnas, "productos"
+    )
+
+@router.get("/productos/stock-bajo", dependencies=[Depends(require_inventory_read_permission)])
+def exportar_stock_bajo(
+    formato: Formato = "csv",
+    columnas: Optional[str] = Query(None, description=COLUMNAS_DESCRIPCION)
+):
+    return _exportar(crud_exportacion.stock_bajo_stmt(), formato, columnas, "stock_bajo")
+
+@router.get("/tareas", dependencies=[Depends(require_task_management_permission)])
+def exportar_tareas(
+    formato: Formato = "csv",
+    columnas: Optional[str] = Query(None, description=COLUMNAS_DESCRIPCION),
+    is_completed: Optional[bool] = None,
+    usuario_asignado_id: Optional[int] = None,
+    sin_asignar: Optional[bool] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+):
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="fecha_desde no puede ser posterior a fecha_hasta")
+    return _exportar(
+        crud_exportacion.tareas_stmt(is_completed, usuario_asignado_id, sin_asignar, fecha_desde, fecha_hasta),
+        formato, columnas, "tareas"
+    )
+
+@router.get("/encuestas/{encuesta_id}/respuestas", dependencies=[Depends(require_admin_user)])
+def exportar_respuestas_encuesta(
+    encuesta_id: int,
+    formato: Formato = "csv",
+    columnas: Optional[str] = Query(None, description=COLUMNAS_DESCRIPCION),
+    solo_completadas: bool = True,
+    db: Session = Depends(get_db)
+):
+    if not crud_survey.get_encuesta(db, encuesta_id):
+        raise HTTPException(status_code=404, detail="Encuesta no encontrada")
+    return _exportar(
+        crud_exportacion.respuestas_encuesta_stmt(encuesta_id, solo_completadas),
+        formato, columnas, f"encuesta_{encuesta_id}_respuestas"
+    )
+
+@router.get("/audit-logs", dependencies=[Depends(require_admin_user)])
+def exportar_audit_logs(
+    formato: Formato = "csv",
+    columnas: Optional[str] = Query(None, description=COLUMNAS_DESCRIPCION),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    evento: Optional[str] = None
+):
+    return _exportar(crud_exportacion.audit_logs_stmt(desde, hasta, evento), formato, columnas, "audit_logs")
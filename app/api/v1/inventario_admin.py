@@ -1,16 +1,19 @@
+from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status, Query
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import paginate
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import require_admin_user, require_inventory_read_permission
-from app.core.uploader import delete_from_cloudinary, upload_to_cloudinary
-from app.crud import inventario
+from app.core import plan_demanda, media_ingesta
+from app.crud import inventario, stock_historico
 from app.db.session import get_db
 from app.models import inventario as models_inv
 from app.schemas import inventario as schemas_inv
+from app.schemas.media_ingesta import MediaIngestaOut
+from app.models.user import User
 
 
 router = APIRouter()
@@ -263,13 +266,14 @@ def soft_delete_proveedor(
     "/productos",
     response_model=schemas_inv.ProductoOut,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_admin_user)],
 )
 def create_producto(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_user),
     producto_data_json: str = Form(...),
     file: Optional[UploadFile] = File(
-        None, description="La imagen opcional del producto"
+        None, description="La imagen opcional del producto (se procesa en segundo plano)"
     ),
 ):
     try:
@@ -280,36 +284,21 @@ def create_producto(
             detail=f"Error en los datos JSON del producto: {e.errors()}",
         )
 
-    photo_url = None
-    public_id = None
-
-    if file:
-        try:
-            upload_result = upload_to_cloudinary(file, folder="/productos")
-            photo_url = upload_result.get("secure_url")
-            public_id = upload_result.get("public_id")
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error al subir la imagen: {e}"
-            )
-
+    #la imagen se valida antes de crear el producto: si se rechaza no queda un producto a medias
+    ruta = media_ingesta.guardar_temporal(file) if file else None
     try:
-        return inventario.create_producto(
-            db=db, producto_in=producto_in, photo_url=photo_url, public_id=public_id
-        )
-    except Exception as e:
-        if public_id:
-            try:
-                delete_from_cloudinary(public_id)
-                print(
-                    f"Rollback: Imagen {public_id} eliminada de Cloudinary tras error en BD"
-                )
-            except Exception as e_cloud:
-                print(
-                    f"ERROR CRÍTICO: No se pudo hacer rollback de imagen {public_id}: {e_cloud}"
-                )
+        db_producto = inventario.create_producto(db=db, producto_in=producto_in)
+    except Exception:
+        if ruta:
+            ruta.unlink(missing_ok=True)
+        raise
 
-        raise e
+    #la imagen queda pendiente, photo_url se completa cuando termina el worker
+    if ruta:
+        ingesta = media_ingesta.encolar(db, "producto", db_producto.id_producto, file, current_user.id, ruta=ruta)
+        background_tasks.add_task(media_ingesta.procesar, ingesta.id_ingesta)
+
+    return db_producto
 
 
 @router.get("/productos", response_model=Page[schemas_inv.ProductoOut], dependencies=[Depends(require_inventory_read_permission)])
@@ -354,51 +343,23 @@ def update_producto(
 
 @router.put(
     "/productos/{id}/imagen",
-    response_model=schemas_inv.ProductoOut,
-    dependencies=[Depends(require_admin_user)],
+    response_model=MediaIngestaOut,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 def update_producto_imagen(
     id: int,
+    background_tasks: BackgroundTasks,
     db_obj: models_inv.Producto = Depends(_get_producto_or_404),
     file: UploadFile = File(
         ..., description="La nueva imagen para reemplazar la anterior"
     ),
     db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_user),
 ):
-    old_public_id = db_obj.public_id
-    new_public_id = None
-
-    try:
-        upload_result = upload_to_cloudinary(file, folder="/productos")
-        new_secure_url = upload_result.get("secure_url")
-        new_public_id = upload_result.get("public_id")
-
-        if not new_secure_url or not new_public_id:
-            raise HTTPException(
-                status_code=500,
-                detail="Error en Cloudinary: no se recibieron credenciales",
-            )
-
-        db_producto_actualizado = inventario.update_producto_imagen(
-            db=db, db_producto=db_obj, photo_url=new_secure_url, public_id=new_public_id
-        )
-
-    except Exception as e:
-        if new_public_id:
-            delete_from_cloudinary(new_public_id)
-        raise HTTPException(
-            status_code=500, detail=f"Error al reemplazar la imagen: {e}"
-        )
-
-    if old_public_id:
-        try:
-            delete_from_cloudinary(old_public_id)
-        except Exception as e:
-            print(
-                f"ADVERTENCIA: No se pudo eliminar la imagen antigua {old_public_id}: {e}"
-            )
-
-    return db_producto_actualizado
+    #el worker reemplaza la imagen y borra la anterior con sus variantes al terminar
+    ingesta = media_ingesta.encolar(db, "producto", db_obj.id_producto, file, current_user.id)
+    background_tasks.add_task(media_ingesta.procesar, ingesta.id_ingesta)
+    return ingesta
 
 
 @router.delete(
@@ -424,17 +385,95 @@ def delete_producto_imagen(
     db: Session = Depends(get_db),
 ):
     public_id_to_delete = db_obj.public_id
+    variantes_to_delete = db_obj.photo_variantes
 
     db_producto_actualizado = inventario.update_producto_imagen(
         db=db, db_producto=db_obj, photo_url=None, public_id=None
     )
 
-    if public_id_to_delete:
-        try:
-            delete_from_cloudinary(public_id_to_delete)
-        except Exception as e:
-            print(
-                f"Advertencia: No se pudo eliminar de Cloudinary {public_id_to_delete}: {e}"
-            )
+    media_ingesta.eliminar_archivos(public_id_to_delete, variantes_to_delete)
 
-    return db_producto_actualizado
\ No newline at end of file
+    return db_producto_actualizado
+
+# PROYECCION DE STOCK
+
+
+@router.get(
+    "/proyeccion-stock",
+    response_model=Page[schemas_inv.ProyeccionStockOut],
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def list_proyeccion_stock(
+    solo_con_quiebre: bool = Query(False, description="Solo productos que se agotan dentro del horizonte"),
+    db: Session = Depends(get_db),
+):
+    #calculada cada noche por el scheduler
+    return paginate(inventario.get_proyeccion_stock_query(db, solo_con_quiebre=solo_con_quiebre))
+
+
+@router.get(
+    "/proyeccion-stock/en-vivo",
+    response_model=schemas_inv.PlanDemandaOut,
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def get_proyeccion_stock_en_vivo(
+    horizonte_dias: int = Query(plan_demanda.HORIZONTE_DEFAULT, ge=1, le=plan_demanda.HORIZONTE_MAX),
+    db: Session = Depends(get_db),
+):
+    return plan_demanda.calcular_plan(db, horizonte=horizonte_dias)
+
+
+@router.get(
+    "/pronostico-consumo",
+    response_model=Page[schemas_inv.PronosticoConsumoOut],
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def list_pronostico_consumo(db: Session = Depends(get_db)):
+    #puntos de reorden sugeridos segun el historial de salidas
+    return paginate(inventario.get_pronostico_consumo_query(db))
+
+
+# STOCK HISTORICO
+
+
+@router.get(
+    "/stock-historico",
+    response_model=schemas_inv.StockAFechaOut,
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def get_stock_a_fecha(
+    fecha: date = Query(..., description="Stock al cierre de esta fecha"),
+    producto_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+):
+    return stock_historico.get_stock_a_fecha(db, fecha, producto_id=producto_id)
+
+
+@router.get(
+    "/stock-historico/lotes",
+    response_model=schemas_inv.LotesAFechaOut,
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def get_lotes_a_fecha(
+    fecha: date = Query(..., description="Se usa el snapshot mas cercano anterior o igual"),
+    producto_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+):
+    return stock_historico.get_lotes_a_fecha(db, fecha, producto_id=producto_id)
+
+
+# ALERTAS DE CADUCIDAD
+
+
+@router.get(
+    "/alertas-caducidad",
+    response_model=Page[schemas_inv.AlertaCaducidadOut],
+    dependencies=[Depends(require_inventory_read_permission)],
+)
+def list_alertas_caducidad(
+    horizonte: Optional[int] = Query(None, description="7, 30 o 90 dias"),
+    tipo_producto_id: Optional[int] = Query(None, description="Filtrar por tipo de producto (ej. medicamentos)"),
+    db: Session = Depends(get_db),
+):
+    query = inventario.get_alertas_caducidad_query(db, horizonte=horizonte, tipo_producto_id=tipo_producto_id)
+    return paginate(query)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.dependencies import get_current_active_user
+from app.models.user import User
+from app.models.media_ingesta import MediaIngesta
+from app.schemas.media_ingesta import MediaIngestaOut
+
+router = APIRouter()
+
+@router.get("/ingestas/{id_ingesta}", response_model=MediaIngestaOut)
+def get_ingesta(
+    id_ingesta: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    #estado de una subida aceptada con 202
+    ingesta = db.query(MediaIngesta).filter(MediaIngesta.id_ingesta == id_ingesta).first()
+    if not ingesta or (ingesta.usuario_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Ingesta no encontrada")
+    return ingesta
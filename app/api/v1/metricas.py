@@ -0,0 +1,19 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.core import metricas
+from app.core.config import settings
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    if settings.METRICS_TOKEN:
+        esperado = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization, esperado):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de metricas invalido")
+    contenido, tipo = metricas.generar()
+    return Response(content=contenido, media_type=tipo)
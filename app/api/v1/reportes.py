@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, Query, Response, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import Optional
+from typing import Literal, Optional
 
 from app.db.session import get_db
 from app.models.user import User
@@ -12,10 +13,14 @@ from app.core.dependencies import (
 )
 
 from app.core.report_service import ReportService
+from app.db.instrumentacion import presupuesto_sql
 
 router = APIRouter()
 
+MAX_DIAS_LOTE = 31
+
 @router.get("/diario", response_class=Response)
+@presupuesto_sql(5)
 def download_diario_operativo(
     fecha: date = Query(default_factory=date.today, description="Fecha del reporte"),
     db: Session = Depends(get_db),
@@ -36,7 +41,77 @@ def download_diario_operativo(
         raise HTTPException(status_code=500, detail="Error al generar el PDF")
 
 
+@router.get("/diario/lote", response_class=Response)
+@presupuesto_sql(5)
+def download_diarios_operativos(
+    fecha_desde: date,
+    fecha_hasta: date,
+    por_cuidador: bool = Query(False, description="Un PDF por cuidador y dia en lugar de uno por dia"),
+    usuario_asignado_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_task_management_permission)
+):
+    if fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="La fecha de inicio no puede ser mayor a la fecha fin")
+    if (fecha_hasta - fecha_desde).days + 1 > MAX_DIAS_LOTE:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_DIAS_LOTE} dias")
+
+    try:
+        zip_bytes = ReportService.generate_diarios_zip(
+            db, fecha_desde, fecha_hasta, current_user,
+            usuario_asignado_id=usuario_asignado_id, por_cuidador=por_cuidador
+        )
+
+        filename = f"Diarios_Operativos_{fecha_desde.strftime('%Y%m%d')}_{fecha_hasta.strftime('%Y%m%d')}.zip"
+
+        return Response(
+            content=zip_bytes,
+            media_type="application/zip",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    except Exception as e:
+        print(f"Error generando diarios operativos: {e}")
+        raise HTTPException(status_code=500, detail="Error al generar los PDF")
+
+
+@router.get("/fichas-clinicas/dossier")
+@presupuesto_sql(8)
+def download_dossier_clinico(
+    animal_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    formato: Literal["pdf", "zip"] = Query("pdf", description="Un PDF con indice (hasta 250 historiales) o un zip con una ficha por historial (hasta 1000)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_animal_management_permission)
+):
+    if not animal_id and not (fecha_desde and fecha_hasta):
+        raise HTTPException(status_code=400, detail="Indique un animal o un rango de fechas")
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="La fecha de inicio no puede ser mayor a la fecha fin")
+
+    try:
+        contenido = ReportService.generate_dossier_clinico(
+            db, current_user, formato, animal_id=animal_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error generando dossier clinico: {e}")
+        raise HTTPException(status_code=500, detail="Error al generar el dossier")
+
+    if contenido is None:
+        raise HTTPException(status_code=404, detail="No hay historiales para los filtros indicados")
+
+    nombre = f"animal_{animal_id}" if animal_id else f"{fecha_desde.strftime('%Y%m%d')}_{fecha_hasta.strftime('%Y%m%d')}"
+    return StreamingResponse(
+        contenido,
+        media_type="application/pdf" if formato == "pdf" else "application/zip",
+        headers={"Content-Disposition": f"attachment; filename=Dossier_Clinico_{nombre}.{formato}"}
+    )
+
+
 @router.get("/fichas-clinicas/{historial_id}", response_class=Response)
+@presupuesto_sql(10)
 def download_ficha_clinica(
     historial_id: int,
     db: Session = Depends(get_db),
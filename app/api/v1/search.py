@@ -0,0 +1,31 @@
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.core.dependencies import get_current_active_user, es_personal
+from app.crud import search as crud_search
+from app.models.user import User
+from app.schemas.search import SearchOut
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchOut)
+def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    modo: Literal["completo", "autocompletar"] = Query("completo"),
+    tipos: Optional[List[str]] = Query(None, description="productos, animales, especies, habitats"),
+    limite: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    personal = es_personal(current_user)
+    tipos_permitidos = crud_search.tipos_visibles(tipos, personal)
+
+    if modo == "autocompletar":
+        resultados = crud_search.autocompletar(db, q, tipos_permitidos, personal, limite=min(limite, 10))
+    else:
+        resultados = crud_search.buscar(db, q, tipos_permitidos, personal, limite=limite)
+
+    return {"query": q, "modo": modo, "resultados": resultados}
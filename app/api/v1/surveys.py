@@ -12,7 +12,8 @@ from app.schemas.survey import (
     PreguntaEncuestaCreate, PreguntaEncuestaUpdate, PreguntaEncuestaOut,
     OpcionEncuestaCreate, OpcionEncuestaUpdate, OpcionEncuestaOut,
     ParticipacionCreate, ParticipacionUpdate, ParticipacionOut,
-    RespuestaCreate, RespuestaUpdate, RespuestaOut
+    RespuestaCreate, RespuestaUpdate, RespuestaOut,
+    EnvioEncuestaCreate
 )
 
 router = APIRouter()
@@ -118,6 +119,13 @@ def delete_participacion(participacion_id: int, db: Session = Depends(get_db), c
     crud_survey.delete_participacion(db, participacion_id)
     return None
 
+@router.post("/surveys/{encuesta_id}/envios", response_model=ParticipacionOut, tags=["Participaciones"], status_code=status.HTTP_201_CREATED)
+def enviar_encuesta(encuesta_id: int, envio_in: EnvioEncuestaCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+    try:
+        return crud_survey.enviar_encuesta(db, encuesta_id, envio_in, usuario_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 #pruebas
 @router.get("/participations/", response_model=List[ParticipacionOut], tags=["Participaciones"])
 def list_user_participaciones(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
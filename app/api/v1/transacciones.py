@@ -99,6 +99,16 @@ def list_productos_con_stock_bajo(
     return paginate(query)
 
 
+@router.get("/reconciliacion-stock", response_model=Page[schemas_tra.ReconciliacionStockOut])
+def list_reconciliacion_stock(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin_user)
+):
+    #productos cuyo stock_actual se desvio de la suma de sus lotes
+    query = crud_transacciones.get_reconciliacion_stock_query(db)
+    return paginate(query)
+
+
 #TIPOS SALIDAS
 def _get_tipo_salida_or_404(
     id: int, db: Session = Depends(get_db)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Literal
+
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlalchemy import paginate
 
 from app.db.session import get_db
-from app.schemas.trivia import TriviaCreate, TriviaOut, ParticipacionTriviaCreate, ParticipacionTriviaOut
+from app.schemas.trivia import TriviaCreate, TriviaOut, ParticipacionTriviaCreate, ParticipacionTriviaOut, RankingOut, MiPosicionOut
 from app.crud import trivia as crud_trivia
 from app.core.dependencies import get_current_active_user, require_admin_user
 from app.models.user import User
@@ -15,9 +18,28 @@ router = APIRouter()
 def create_trivia(trivia_in: TriviaCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     return crud_trivia.create_trivia(db, trivia_in, usuario_id=current_user.id)
 
-@router.get("/", response_model=List[TriviaOut])
+@router.get("/", response_model=Page[TriviaOut])
 def list_trivias(db: Session = Depends(get_db)):
-    return crud_trivia.list_trivias(db)
+    return paginate(crud_trivia.get_trivias_query(db))
+
+Periodo = Literal["historico", "semana", "dia"]
+
+@router.get("/ranking/global", response_model=RankingOut)
+def ranking_global(
+    periodo: Periodo = "historico",
+    limite: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return crud_trivia.get_ranking(db, periodo, None, limite)
+
+@router.get("/ranking/global/yo", response_model=MiPosicionOut)
+def mi_posicion_global(
+    periodo: Periodo = "historico",
+    vecinos: int = Query(2, ge=0, le=25),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return crud_trivia.get_mi_posicion(db, periodo, None, current_user.id, vecinos)
 
 @router.get("/{trivia_id}", response_model=TriviaOut)
 def get_trivia(trivia_id: int, db: Session = Depends(get_db)):
@@ -35,6 +57,29 @@ def participar_trivia(
 ):
     return crud_trivia.create_participacion_trivia(db, participacion_in, usuario_id=current_user.id)
 
-@router.get("/{trivia_id}/participaciones", response_model=List[ParticipacionTriviaOut], dependencies=[Depends(require_admin_user)])
+@router.get("/{trivia_id}/participaciones", response_model=Page[ParticipacionTriviaOut], dependencies=[Depends(require_admin_user)])
 def list_participaciones_trivia(trivia_id: int, db: Session = Depends(get_db)):
-    return crud_trivia.list_participaciones_trivia(db, trivia_id)
+    return paginate(crud_trivia.get_participaciones_trivia_query(db, trivia_id))
+
+def _get_trivia_or_404(trivia_id: int, db: Session = Depends(get_db)):
+    trivia = crud_trivia.get_trivia(db, trivia_id)
+    if not trivia:
+        raise HTTPException(status_code=404, detail="Trivia no encontrada")
+    return trivia
+
+@router.get("/{trivia_id}/ranking", response_model=RankingOut, dependencies=[Depends(_get_trivia_or_404)])
+def ranking_trivia(
+    trivia_id: int,
+    limite: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return crud_trivia.get_ranking(db, "historico", trivia_id, limite)
+
+@router.get("/{trivia_id}/ranking/yo", response_model=MiPosicionOut, dependencies=[Depends(_get_trivia_or_404)])
+def mi_posicion_trivia(
+    trivia_id: int,
+    vecinos: int = Query(2, ge=0, le=25),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return crud_trivia.get_mi_posicion(db, "historico", trivia_id, current_user.id, vecinos)
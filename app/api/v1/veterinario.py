@@ -1,5 +1,5 @@
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Response
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
@@ -110,16 +110,28 @@ def list_historiales(
     query = crud_vet.get_historiales_query(db, animal_id, estado, vet_id)
     return paginate(query)
 
+@router.get("/historiales/buscar", response_model=schemas_vet.HistorialBusquedaOut)
+def buscar_historiales(
+    q: str = Query(..., min_length=2, max_length=200, description='Ej: dermatitis, "parasitos intestinales", -cronico'),
+    cursor: Optional[str] = None,
+    limite: int = Query(20, ge=1, le=100),
+    animal_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_veterinario)
+):
+    return crud_vet.buscar_historiales(db, q, cursor=cursor, limite=limite, animal_id=animal_id)
+
 @router.get("/historiales/{id}", response_model=schemas_vet.HistorialMedicoOut)
 def get_historial(
     id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_animal_management_permission)
 ):
-    historial = crud_vet.get_historial(db, id)
-    if not historial:
+    historial_json = crud_vet.get_historial_detalle_json(db, id)
+    if not historial_json:
         raise HTTPException(status_code=404, detail="Historial médico no encontrado")
-    return historial
+    #ya serializado (los cerrados vienen tal cual del snapshot)
+    return Response(content=historial_json, media_type="application/json")
 
 @router.put("/historiales/{id}", response_model=schemas_vet.HistorialMedicoOut)
 def update_historial(
@@ -208,6 +220,19 @@ def list_recetas(
     query = query.order_by(models_vet.RecetaMedica.created_at.desc())
     return paginate(query)
 
+@router.get("/tratamientos/activos", response_model=Page[schemas_vet.TratamientoActivoOut])
+def list_tratamientos_activos(
+    animal_id: Optional[int] = None,
+    habitat_id: Optional[int] = None,
+    usuario_asignado_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_animal_management_permission)
+):
+    #pizarra de tratamientos en curso, los que terminan antes primero
+    return paginate(crud_vet.get_tratamientos_activos_query(
+        db, animal_id=animal_id, habitat_id=habitat_id, usuario_asignado_id=usuario_asignado_id
+    ))
+
 @router.get("/recetas/{id}", response_model=schemas_vet.RecetaMedicaOut)
 def get_receta(
     id: int,
@@ -370,4 +395,23 @@ def delete_resultado_examen(
         except Exception as e:
             print(f"Advertencia: No se pudo borrar imagen de Cloudinary {public_id}: {e}")
             
-    return {"detail": "Resultado y archivo eliminados correctamente"}
\ No newline at end of file
+    return {"detail": "Resultado y archivo eliminados correctamente"}
+
+#SIGNOS VITALES
+
+@router.get("/signos-vitales/alertas", response_model=Page[schemas_vet.AlertaSignosVitalesOut])
+def list_alertas_signos_vitales(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_animal_management_permission)
+):
+    #calculadas por el job nocturno
+    return paginate(crud_vet.get_alertas_signos_vitales_query(db))
+
+@router.get("/animales/{animal_id}/signos-vitales", response_model=schemas_vet.SignosVitalesAnimalOut)
+def get_signos_vitales_animal(
+    animal_id: int,
+    limite: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_animal_management_permission)
+):
+    return crud_vet.get_signos_vitales_animal(db, animal_id, limite=limite)
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.animal import Animal
+from app.models.tarea import ConsumoAlimentacionDiario, ResumenApetito
+
+MIN_DIAS = 3 #dias con registro minimos en cada ventana para comparar
+_EPS = 1e-6
+
+
+#ACUMULADO INCREMENTAL
+
+def registrar_consumo(
+    db: Session,
+    fecha: date,
+    animal_id: Optional[int],
+    habitat_id: Optional[int],
+    detalles: Iterable
+) -> None:
+    """
+    Suma los detalles de una alimentacion al acumulado del dia (no hace commit,
+    va en la misma transaccion que el registro)
+    """
+    por_producto = defaultdict(lambda: [Decimal(0), Decimal(0), Decimal(0), 0])
+    for d in detalles:
+        acumulado = por_producto[d.producto_id]
+        acumulado[0] += d.cantidad_entregada
+        if d.cantidad_consumida is not None:
+            acumulado[1] += d.cantidad_entregada
+            acumulado[2] += d.cantidad_consumida
+        acumulado[3] += 1
+
+    if not por_producto:
+        return
+
+    filas = [
+        {
+            "fecha": fecha,
+            "animal_id": animal_id,
+            "habitat_id": habitat_id,
+            "producto_id": producto_id,
+            "cantidad_entregada": v[0],
+            "entregada_con_consumo": v[1],
+            "cantidad_consumida": v[2],
+            "registros": v[3],
+        }
+        for producto_id, v in por_producto.items()
+    ]
+
+    tabla = ConsumoAlimentacionDiario.__table__
+    stmt = pg_insert(ConsumoAlimentacionDiario)
+    if animal_id is not None:
+        conflicto = {"index_elements": ["animal_id", "producto_id", "fecha"], "index_where": text("animal_id IS NOT NULL")}
+    else:
+        conflicto = {"index_elements": ["habitat_id", "producto_id", "fecha"], "index_where": text("animal_id IS NULL")}
+
+    stmt = stmt.on_conflict_do_update(
+        **conflicto,
+        set_={
+            c: tabla.c[c] + stmt.excluded[c] for c in (
+                "cantidad_entregada", "entregada_con_consumo", "cantidad_consumida", "registros"
+            )
+        }
+    )
+    db.execute(stmt, filas)
+
+
+#RESUMEN NOCTURNO
+
+def _media_por_grupo(valores: np.ndarray, grupo: np.ndarray, n: int) -> np.ndarray:
+    """
+    Media de los valores no NaN de cada grupo (bincount), NaN si el grupo no tiene ninguno
+    """
+    valido = ~np.isnan(valores)
+    cuenta = np.bincount(grupo[valido], minlength=n)
+    suma = np.bincount(grupo[valido], weights=valores[valido], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cuenta > 0, suma / cuenta, np.nan)
+
+
+def calcular_resumenes_apetito(db: Session, hoy: Optional[date] = None) -> int:
+    """
+    Compara la ultima semana de cada par animal-producto contra las semanas previas
+    usando solo el acumulado diario
+    """
+    hoy = hoy or date.today()
+    recientes = settings.APETITO_DIAS_RECIENTES
+    dias = settings.APETITO_DIAS_BASE + recientes
+    fin = hoy - timedelta(days=1)
+    inicio = fin - timedelta(days=dias - 1)
+
+    c = ConsumoAlimentacionDiario
+    filas = db.query(
+        c.animal_id, c.producto_id, c.fecha, c.entregada_con_consumo, c.cantidad_consumida
+    ).join(Animal, c.animal_id == Animal.id_animal)\
+     .filter(c.fecha >= inicio, c.fecha <= fin, Animal.is_active == True)\
+     .all()
+
+    db.execute(delete(ResumenApetito))
+    if not filas:
+        db.commit()
+        return 0
+
+    pares = {}
+    animales = {}
+    for f in filas:
+        if (f.animal_id, f.producto_id) not in pares:
+            pares[(f.animal_id, f.producto_id)] = len(pares)
+            animales.setdefault(f.animal_id, len(animales))
+
+    par_animal = np.empty(len(pares), dtype=np.int64)
+    for (animal_id, _), i in pares.items():
+        par_animal[i] = animales[animal_id]
+
+    entregado = np.zeros((len(pares), dias))
+    consumido = np.zeros((len(pares), dias))
+    fila = np.array([pares[(f.animal_id, f.producto_id)] for f in filas], dtype=np.int64)
+    columna = np.array([(f.fecha - inicio).days for f in filas], dtype=np.int64)
+    entregado[fila, columna] = [float(f.entregada_con_consumo) for f in filas]
+    consumido[fila, columna] = [float(f.cantidad_consumida) for f in filas]
+
+    registrado = entregado > _EPS
+    ventanas = {"base": slice(0, dias - recientes), "reciente": slice(dias - recientes, dias)}
+    n_dias, consumo_medio, ratio = {}, {}, {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for nombre, v in ventanas.items():
+            n_dias[nombre] = registrado[:, v].sum(axis=1)
+            total_entregado = entregado[:, v].sum(axis=1)
+            total_consumido = consumido[:, v].sum(axis=1)
+            consumo_medio[nombre] = np.where(n_dias[nombre] > 0, total_consumido / n_dias[nombre], np.nan)
+            ratio[nombre] = np.where(total_entregado > _EPS, np.minimum(total_consumido / total_entregado, 999), np.nan)
+
+        comparable = (n_dias["base"] >= MIN_DIAS) & (n_dias["reciente"] >= MIN_DIAS) & (consumo_medio["base"] > _EPS)
+        caida = np.where(comparable, (1 - consumo_medio["reciente"] / consumo_medio["base"]) * 100, np.nan)
+        caida = np.clip(caida, -99999, 100)
+
+    a = len(animales)
+    caida_animal = _media_por_grupo(caida, par_animal, a)
+    ratio_reciente = _media_por_grupo(ratio["reciente"], par_animal, a)
+    ratio_base = _media_por_grupo(ratio["base"], par_animal, a)
+    productos = np.bincount(par_animal, minlength=a)
+
+    dias_animal = np.zeros((a, dias), dtype=np.int64)
+    np.add.at(dias_animal, par_animal, registrado.astype(np.int64))
+    dias_con_registro = (dias_animal > 0).sum(axis=1)
+
+    def _num(valor, decimales):
+        return None if np.isnan(valor) else round(float(valor), decimales)
+
+    resumenes = []
+    for animal_id, i in animales.items():
+        resumenes.append({
+            "animal_id": animal_id,
+            "fecha_calculo": hoy,
+            "dias_con_registro": int(dias_con_registro[i]),
+            "productos": int(productos[i]),
+            "ratio_ingesta_reciente": _num(ratio_reciente[i], 3),
+            "ratio_ingesta_base": _num(ratio_base[i], 3),
+            "caida_pct": _num(caida_animal[i], 2),
+            "alerta": bool(not np.isnan(caida_animal[i]) and caida_animal[i] >= settings.APETITO_UMBRAL_CAIDA_PCT),
+        })
+
+    db.execute(insert(ResumenApetito), resumenes)
+    db.commit()
+    return len(resumenes)
@@ -0,0 +1,131 @@
+import hashlib
+import time
+from datetime import date
+from email.utils import formatdate
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.models.animal import Especie, Habitat, Animal
+
+# marca de agua del catalogo: epoch en milisegundos del ultimo cambio, estrictamente creciente
+WATERMARK_KEY = "catalogo:watermark_ms"
+# paginas serializadas, la clave incluye la marca de agua asi que un cambio las deja huerfanas
+PAGINA_PREFIX = "catalogo:pagina:"
+
+# dos escrituras en el mismo milisegundo (o con el reloj atrasado) igual avanzan la marca
+_AVANZAR = """
+local actual = tonumber(redis.call('GET', KEYS[1]) or '0')
+local nueva = math.max(tonumber(ARGV[1]), actual + 1)
+redis.call('SET', KEYS[1], nueva)
+return nueva
+"""
+_script = None
+
+
+def _watermark_db(db: Session) -> int:
+    """
+    Ultimo updated_at de especies, habitats y animales. Las medias no tienen
+    fecha, sus cambios solo se reflejan via invalidate()
+    """
+    ultimos = union_all(
+        select(func.max(Especie.updated_at).label("u")),
+        select(func.max(Habitat.updated_at).label("u")),
+        select(func.max(Animal.updated_at).label("u")),
+    ).subquery()
+    ultimo = db.execute(select(func.max(ultimos.c.u))).scalar()
+    return int(ultimo.timestamp() * 1000) if ultimo else 0
+
+
+def get_watermark(db: Session) -> int:
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            valor = cache.get(WATERMARK_KEY)
+            if valor is not None:
+                return int(valor)
+        except Exception as e:
+            print(f"Advertencia: cache del catalogo no disponible ({e})")
+            cache = None
+
+    watermark = _watermark_db(db)
+    if cache:
+        try:
+            #nx para no pisar una invalidacion concurrente
+            cache.set(WATERMARK_KEY, watermark, nx=True)
+        except Exception as e:
+            print(f"Advertencia: no se pudo guardar la marca del catalogo ({e})")
+    return watermark
+
+
+def invalidate() -> None:
+    """
+    Lo llaman las escrituras de app/crud/animal.py, cambia el ETag de todas las paginas
+    """
+    global _script
+    cache = get_sync_cache_client()
+    if not cache:
+        return
+    try:
+        if _script is None:
+            _script = cache.register_script(_AVANZAR)
+        _script(keys=[WATERMARK_KEY], args=[int(time.time() * 1000)])
+    except Exception as e:
+        print(f"Advertencia: no se pudo invalidar el cache del catalogo ({e})")
+
+
+def _etag(watermark: int, clave: str) -> str:
+    return '"' + hashlib.sha1(f"{watermark}:{clave}".encode()).hexdigest()[:20] + '"'
+
+
+def responder(
+    request: Request,
+    db: Session,
+    clave: str,
+    construir: Callable[[], BaseModel],
+    publico: bool = True
+) -> Response:
+    """
+    Responde una pagina del catalogo: 304 si el cliente ya la tiene, si no la
+    sirve desde redis y solo en el ultimo caso ejecuta construir()
+    """
+    #AnimalOut.age cambia con el dia aunque no cambien los datos
+    clave = f"{date.today().isoformat()}:{clave}"
+    watermark = get_watermark(db)
+    etag = _etag(watermark, clave)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(watermark // 1000, usegmt=True),
+        "Cache-Control": ("public" if publico else "private") + ", max-age=0, must-revalidate",
+    }
+
+    coincide = request.headers.get("if-none-match")
+    if coincide and etag in [e.strip().removeprefix("W/") for e in coincide.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    cache = get_sync_cache_client()
+    key = f"{PAGINA_PREFIX}{watermark}:{clave}"
+    contenido: Optional[str] = None
+    if cache:
+        try:
+            contenido = cache.get(key)
+        except Exception as e:
+            print(f"Advertencia: cache del catalogo no disponible ({e})")
+            cache = None
+
+    metricas.cache("catalogo", contenido is not None, contenido is None)
+    if contenido is None:
+        contenido = construir().model_dump_json()
+        if cache:
+            try:
+                cache.set(key, contenido, ex=settings.CATALOGO_CACHE_TTL_SECONDS)
+            except Exception as e:
+                print(f"Advertencia: no se pudo escribir el cache del catalogo ({e})")
+
+    return Response(content=contenido, media_type="application/json", headers=headers)
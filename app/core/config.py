@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, field_validator
-from typing import List, Union
+from typing import List, Optional, Union
 #correo
 from pydantic import validator, EmailStr
 
@@ -13,6 +13,10 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     MEDIA_DIR: str = "./media"
+    #media: cloudinary en produccion, local (MEDIA_DIR servido en MEDIA_URL) para desarrollo y pruebas
+    MEDIA_STORAGE_BACKEND: str = "cloudinary"
+    MEDIA_URL: str = "/media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     DEFAULT_ADMIN_EMAIL: str
     DEFAULT_ADMIN_PASSWORD: str
@@ -38,6 +42,32 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     #automatizacion tareas
     TIMEZONE: str = "America/La_Paz"
+    #cache dietas (el payload incluye el producto, el TTL acota su stock desactualizado)
+    DIETA_CACHE_TTL_SECONDS: int = 60 * 60
+    #pronostico de consumo
+    PRONOSTICO_VENTANA_DIAS: int = 90
+    PRONOSTICO_ALFA: float = 0.3
+    PRONOSTICO_LEAD_TIME_DIAS: int = 7
+    PRONOSTICO_Z_SERVICIO: float = 1.65
+    #apetito (consumo de alimentacion)
+    APETITO_DIAS_RECIENTES: int = 7
+    APETITO_DIAS_BASE: int = 21
+    APETITO_UMBRAL_CAIDA_PCT: float = 30.0
+    #cache del catalogo publico
+    CATALOGO_CACHE_TTL_SECONDS: int = 60 * 60
+    #conteos de encuestas (al expirar se recuentan desde las respuestas)
+    ENCUESTA_CONTEO_TTL_SECONDS: int = 60 * 60 * 24
+    #animales en tendencia (vida media del peso de cada favorito)
+    TENDENCIA_VIDA_MEDIA_HORAS: float = 72.0
+    #procesos para renderizar lotes de reportes pdf
+    REPORTES_PROCESOS: int = 2
+    #instrumentacion sql (con DEBUG se devuelve en headers X-DB-*)
+    DEBUG: bool = False
+    SQL_N_MAS_1_UMBRAL: int = 5
+    #/metrics: si se define, se exige "Authorization: Bearer <token>"
+    METRICS_TOKEN: Optional[str] = None
+    #busqueda
+    SEARCH_AUTOCOMPLETE_TTL_SECONDS: int = 60 * 5
     
     @property
     def REDIS_URL(self) -> str:
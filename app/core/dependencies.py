@@ -88,6 +88,14 @@ def require_task_management_permission(current_user: User = Depends(get_current_
 INVENTORY_READ_ROLES = {"ADMINISTRADOR", "VETERINARIO", "CUIDADOR"}
 
 
+def es_personal(user: User) -> bool:
+    #admin, veterinario o cuidador
+    if getattr(user, "is_admin", False):
+        return True
+    role_obj = user.role
+    return str(getattr(role_obj, "name", role_obj)).upper() in INVENTORY_READ_ROLES
+
+
 def require_inventory_read_permission(
     current_user: User = Depends(get_current_active_user),
 ):
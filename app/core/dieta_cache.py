@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.schemas.dieta import DietaSugeridaOut
+from app.models.tarea import Dieta, DetalleDieta
+
+# animal -> dieta efectiva (DietaSugeridaOut serializado o NULL_MARKER si no tiene)
+DIETA_ANIMAL_PREFIX = "dieta_efectiva:animal:"
+# especie -> set de animales cuya dieta efectiva se resolvio por la especie
+DIETA_ESPECIE_PREFIX = "dieta_efectiva:especie:"
+
+NULL_MARKER = "null"
+
+# lee y borra cada set de especie en un solo paso: un animal que se agrega
+# entre el SMEMBERS y el DEL del set no puede quedar cacheado sin indice
+_INVALIDAR_ESPECIES = """
+for _, especie in ipairs(KEYS) do
+    for _, animal in ipairs(redis.call('SMEMBERS', especie)) do
+        redis.call('DEL', ARGV[1] .. animal)
+    end
+    redis.call('DEL', especie)
+end
+return #KEYS
+"""
+_script = None
+
+
+def _animal_key(animal_id: int) -> str:
+    return f"{DIETA_ANIMAL_PREFIX}{animal_id}"
+
+
+def _especie_key(especie_id: int) -> str:
+    return f"{DIETA_ESPECIE_PREFIX}{especie_id}"
+
+
+def serialize_dieta(dieta: Optional[Dieta]) -> str:
+    if dieta is None:
+        return NULL_MARKER
+    return DietaSugeridaOut.model_validate(dieta).model_dump_json()
+
+
+def get_many(animal_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+    """
+    Lee del cache la dieta efectiva de varios animales en un solo MGET
+    Los animales que no estan en cache no aparecen en el resultado
+    """
+    cache = get_sync_cache_client()
+    ids = list(dict.fromkeys(animal_ids))
+    if not cache or not ids:
+        return {}
+
+    try:
+        values = cache.mget([_animal_key(a) for a in ids])
+    except Exception as e:
+        print(f"Advertencia: cache de dietas no disponible ({e})")
+        return {}
+
+    encontrados = {a: v for a, v in zip(ids, values) if v is not None}
+    metricas.cache("dietas", len(encontrados), len(ids) - len(encontrados))
+    return encontrados
+
+
+def set_many(entries: List[dict]) -> None:
+    """
+    Guarda dietas efectivas. Cada entry: animal_id, especie_id, payload y
+    via_especie (True si la dieta salio de la especie o no hay dieta)
+    """
+    cache = get_sync_cache_client()
+    if not cache or not entries:
+        return
+
+    try:
+        with cache.pipeline(transaction=False) as pipe:
+            for e in entries:
+                pipe.set(_animal_key(e["animal_id"]), e["payload"], ex=settings.DIETA_CACHE_TTL_SECONDS)
+                if e["via_especie"] and e["especie_id"] is not None:
+                    pipe.sadd(_especie_key(e["especie_id"]), e["animal_id"])
+                    pipe.expire(_especie_key(e["especie_id"]), settings.DIETA_CACHE_TTL_SECONDS)
+            pipe.execute()
+    except Exception as e:
+        print(f"Advertencia: no se pudo escribir el cache de dietas ({e})")
+
+
+def invalidate_animal(animal_id: int, especie_id: Optional[int] = None) -> None:
+    cache = get_sync_cache_client()
+    if not cache:
+        return
+    try:
+        with cache.pipeline(transaction=False) as pipe:
+            pipe.delete(_animal_key(animal_id))
+            if especie_id is not None:
+                pipe.srem(_especie_key(especie_id), animal_id)
+            pipe.execute()
+    except Exception as e:
+        print(f"Advertencia: no se pudo invalidar la dieta del animal {animal_id} ({e})")
+
+
+def invalidate_especie(especie_id: int) -> None:
+    """
+    Borra solo los animales que heredaban la dieta de la especie, los que
+    tienen dieta propia no se tocan
+    """
+    _invalidate_especies([especie_id])
+
+
+def _invalidate_especies(especie_ids: List[int]) -> None:
+    global _script
+    cache = get_sync_cache_client()
+    if not cache or not especie_ids:
+        return
+    try:
+        if _script is None:
+            _script = cache.register_script(_INVALIDAR_ESPECIES)
+        _script(keys=[_especie_key(e) for e in especie_ids], args=[DIETA_ANIMAL_PREFIX])
+    except Exception as e:
+        print(f"Advertencia: no se pudo invalidar la dieta de las especies {especie_ids} ({e})")
+
+
+def invalidate_producto(db: Session, producto_id: int) -> None:
+    """
+    Borra las dietas cacheadas que incluyen el producto, llevan su nombre,
+    foto y unidad. Se llama despues del commit
+    """
+    dietas = db.query(Dieta.animal_id, Dieta.especie_id).join(Dieta.detalles_dieta).filter(
+        DetalleDieta.producto_id == producto_id,
+        Dieta.is_active == True
+    ).distinct().all()
+
+    animal_ids = {d.animal_id for d in dietas if d.animal_id is not None}
+    cache = get_sync_cache_client()
+    if cache and animal_ids:
+        try:
+            cache.delete(*[_animal_key(a) for a in animal_ids])
+        except Exception as e:
+            print(f"Advertencia: no se pudo invalidar la dieta de los animales {sorted(animal_ids)} ({e})")
+    _invalidate_especies(sorted({d.especie_id for d in dietas if d.especie_id is not None}))
+
+
+def invalidate_target(animal_id: Optional[int], especie_id: Optional[int]) -> None:
+    if animal_id:
+        invalidate_animal(animal_id)
+    if especie_id:
+        invalidate_especie(especie_id)
@@ -0,0 +1,266 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.models.survey import (
+    Encuesta, PreguntaEncuesta, OpcionEncuesta, ParticipacionEncuesta, RespuestaUsuario,
+    ConteoEncuesta, ConteoOpcionEncuesta
+)
+
+# encuesta -> hash con "p" (participaciones completadas) y "o:<opcion_id>" (respuestas)
+CONTEO_PREFIX = "encuesta:conteo:"
+# encuestas con cambios en redis que aun no se volcaron a survey_option_tally
+PENDIENTES_KEY = "encuesta:conteo:pendientes"
+CAMPO_PARTICIPACIONES = "p"
+CAMPO_OPCION = "o:"
+LOTE_VOLCADO = 200
+
+#solo incrementa si el hash existe: si no existe la proxima lectura lo reconstruye
+#desde las filas y un HINCRBY sobre un hash vacio dejaria un conteo parcial
+_INCREMENTAR = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+_script = None
+
+Conteo = Tuple[int, Dict[int, int]]
+
+
+def _key(encuesta_id: int) -> str:
+    return f"{CONTEO_PREFIX}{encuesta_id}"
+
+
+def _desde_hash(valores: Dict[str, str]) -> Conteo:
+    participaciones = int(valores.get(CAMPO_PARTICIPACIONES, 0))
+    opciones = {
+        int(campo[len(CAMPO_OPCION):]): int(v)
+        for campo, v in valores.items() if campo.startswith(CAMPO_OPCION)
+    }
+    return participaciones, opciones
+
+
+def _a_hash(conteo: Conteo) -> Dict[str, int]:
+    participaciones, opciones = conteo
+    valores = {f"{CAMPO_OPCION}{o}": c for o, c in opciones.items()}
+    valores[CAMPO_PARTICIPACIONES] = participaciones
+    return valores
+
+
+#ESCRITURA
+
+def aplicar(encuesta_id: int, opciones: Optional[Dict[int, int]] = None, participaciones: int = 0) -> None:
+    """
+    Suma los deltas de una escritura ya confirmada. Lo llaman las funciones de
+    app/crud/survey.py despues del commit
+    """
+    global _script
+    deltas = [(f"{CAMPO_OPCION}{o}", d) for o, d in (opciones or {}).items() if d]
+    if participaciones:
+        deltas.append((CAMPO_PARTICIPACIONES, participaciones))
+    cache = get_sync_cache_client()
+    if not cache or not deltas:
+        return
+
+    args = [encuesta_id]
+    for campo, delta in deltas:
+        args += [campo, delta]
+    try:
+        if _script is None:
+            _script = cache.register_script(_INCREMENTAR)
+        _script(keys=[_key(encuesta_id), PENDIENTES_KEY], args=args)
+    except Exception as e:
+        print(f"Advertencia: no se pudo actualizar el conteo de la encuesta {encuesta_id} ({e})")
+
+
+def deltas_respuestas(opcion_ids: Iterable[Optional[int]], signo: int) -> Dict[int, int]:
+    return {o: c * signo for o, c in Counter(o for o in opcion_ids if o is not None).items()}
+
+
+def descartar(encuesta_id: int) -> None:
+    cache = get_sync_cache_client()
+    if not cache:
+        return
+    try:
+        with cache.pipeline(transaction=False) as pipe:
+            pipe.delete(_key(encuesta_id))
+            pipe.srem(PENDIENTES_KEY, encuesta_id)
+            pipe.execute()
+    except Exception as e:
+        print(f"Advertencia: no se pudo descartar el conteo de la encuesta {encuesta_id} ({e})")
+
+
+#TABLA
+
+def _guardar(db: Session, conteos: Dict[int, Conteo], reemplazar: bool) -> None:
+    """
+    Upsert de survey_tally y survey_option_tally (no hace commit). Con reemplazar
+    se borran antes las opciones de esas encuestas
+    """
+    if not conteos:
+        return
+    ids = list(conteos)
+    ahora = datetime.now(timezone.utc)
+
+    #una opcion borrada puede seguir en el hash de redis
+    existentes = {o for (o,) in db.query(OpcionEncuesta.id_opcion)
+                  .join(PreguntaEncuesta, OpcionEncuesta.pregunta_id == PreguntaEncuesta.id_pregunta)
+                  .filter(PreguntaEncuesta.encuesta_id.in_(ids)).all()}
+
+    if reemplazar:
+        db.execute(delete(ConteoOpcionEncuesta).where(ConteoOpcionEncuesta.encuesta_id.in_(ids)))
+
+    stmt = pg_insert(ConteoEncuesta)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["encuesta_id"],
+            set_={"participaciones_completadas": stmt.excluded.participaciones_completadas, "updated_at": ahora}
+        ),
+        [{"encuesta_id": e, "participaciones_completadas": p, "updated_at": ahora} for e, (p, _) in conteos.items()]
+    )
+
+    filas = [
+        {"opcion_id": o, "encuesta_id": e, "conteo": c, "updated_at": ahora}
+        for e, (_, opciones) in conteos.items()
+        for o, c in opciones.items() if o in existentes
+    ]
+    if filas:
+        stmt = pg_insert(ConteoOpcionEncuesta)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["opcion_id"],
+                set_={"conteo": stmt.excluded.conteo, "updated_at": ahora}
+            ),
+            filas
+        )
+
+
+def volcar(db: Session) -> int:
+    """
+    Copia a la tabla los hashes de las encuestas con cambios pendientes
+    """
+    cache = get_sync_cache_client()
+    if not cache:
+        return 0
+    try:
+        ids = [int(i) for i in cache.spop(PENDIENTES_KEY, LOTE_VOLCADO) or []]
+        if not ids:
+            return 0
+        with cache.pipeline(transaction=False) as pipe:
+            for encuesta_id in ids:
+                pipe.hgetall(_key(encuesta_id))
+            hashes = pipe.execute()
+    except Exception as e:
+        print(f"Advertencia: no se pudieron leer los conteos de encuestas ({e})")
+        return 0
+
+    #un hash que expiro no tiene nada que volcar, la reconciliacion corrige la tabla
+    conteos = {e: _desde_hash(h) for e, h in zip(ids, hashes) if h}
+    vigentes = {e for (e,) in db.query(Encuesta.id_encuesta).filter(Encuesta.id_encuesta.in_(list(conteos))).all()}
+    conteos = {e: c for e, c in conteos.items() if e in vigentes}
+    try:
+        _guardar(db, conteos, reemplazar=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        try:
+            cache.sadd(PENDIENTES_KEY, *ids)
+        except Exception as e:
+            print(f"Advertencia: no se pudieron reencolar los conteos de encuestas ({e})")
+        raise
+    return len(conteos)
+
+
+#RECONCILIACION
+
+def _contar(db: Session, encuesta_ids: List[int]) -> Dict[int, Conteo]:
+    """
+    Recuento desde las filas: solo cuentan las respuestas de participaciones completadas
+    """
+    conteos: Dict[int, Conteo] = {e: (0, {}) for e in encuesta_ids}
+
+    participaciones = db.query(ParticipacionEncuesta.encuesta_id, func.count())\
+        .filter(ParticipacionEncuesta.encuesta_id.in_(encuesta_ids), ParticipacionEncuesta.completada == True)\
+        .group_by(ParticipacionEncuesta.encuesta_id).all()
+    for encuesta_id, total in participaciones:
+        conteos[encuesta_id] = (total, conteos[encuesta_id][1])
+
+    respuestas = db.query(ParticipacionEncuesta.encuesta_id, RespuestaUsuario.opcion_id, func.count())\
+        .select_from(RespuestaUsuario)\
+        .join(ParticipacionEncuesta, RespuestaUsuario.participacion_id == ParticipacionEncuesta.id_participacion)\
+        .filter(
+            ParticipacionEncuesta.encuesta_id.in_(encuesta_ids),
+            ParticipacionEncuesta.completada == True,
+            RespuestaUsuario.opcion_id.isnot(None)
+        ).group_by(ParticipacionEncuesta.encuesta_id, RespuestaUsuario.opcion_id).all()
+    for encuesta_id, opcion_id, total in respuestas:
+        conteos[encuesta_id][1][opcion_id] = total
+
+    return conteos
+
+
+def reconciliar(db: Session, encuesta_ids: Optional[List[int]] = None) -> Dict[int, Conteo]:
+    """
+    Recalcula los conteos y reescribe tabla y redis. Sin ids toma las encuestas activas
+    """
+    if encuesta_ids is None:
+        encuesta_ids = [e for (e,) in db.query(Encuesta.id_encuesta).filter(Encuesta.is_active == True).all()]
+    if not encuesta_ids:
+        return {}
+
+    conteos = _contar(db, encuesta_ids)
+    _guardar(db, conteos, reemplazar=True)
+    db.commit()
+
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            with cache.pipeline(transaction=True) as pipe:
+                for encuesta_id, conteo in conteos.items():
+                    pipe.delete(_key(encuesta_id))
+                    pipe.hset(_key(encuesta_id), mapping=_a_hash(conteo))
+                    pipe.expire(_key(encuesta_id), settings.ENCUESTA_CONTEO_TTL_SECONDS)
+                pipe.srem(PENDIENTES_KEY, *encuesta_ids)
+                pipe.execute()
+        except Exception as e:
+            print(f"Advertencia: no se pudieron guardar los conteos de encuestas ({e})")
+    return conteos
+
+
+#LECTURA
+
+def leer(db: Session, encuesta_id: int) -> Conteo:
+    """
+    Redis si tiene el hash; con redis caido, la tabla; si no, recuento desde las filas
+    """
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            valores = cache.hgetall(_key(encuesta_id))
+            metricas.cache("encuestas", bool(valores), not valores)
+            if valores:
+                return _desde_hash(valores)
+        except Exception as e:
+            print(f"Advertencia: conteos de encuestas no disponibles en redis ({e})")
+            cache = None
+
+    if cache is None:
+        fila = db.query(ConteoEncuesta).filter(ConteoEncuesta.encuesta_id == encuesta_id).first()
+        if fila:
+            opciones = db.query(ConteoOpcionEncuesta.opcion_id, ConteoOpcionEncuesta.conteo)\
+                .filter(ConteoOpcionEncuesta.encuesta_id == encuesta_id).all()
+            return fila.participaciones_completadas, dict(opciones)
+
+    return reconciliar(db, [encuesta_id])[encuesta_id]
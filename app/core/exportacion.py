@@ -0,0 +1,153 @@
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import xlsxwriter
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.db.session import SessionLocal
+
+# columna -> (titulo, expresion sql)
+Columnas = Dict[str, Tuple[str, object]]
+
+LOTE = 2000 #filas por fetch del cursor del servidor
+_CHUNK = 64 * 1024
+_MAX_FILAS_HOJA = 1_048_576 - 1 #limite de excel menos el encabezado
+
+TIPOS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def seleccionar(columnas: Columnas, pedidas: Optional[str]) -> List[str]:
+    """
+    Columnas pedidas como "a,b,c" (en ese orden) o todas si no se pide ninguna
+    """
+    if not pedidas:
+        return list(columnas)
+    nombres = [c.strip() for c in pedidas.split(",") if c.strip()]
+    invalidas = [c for c in nombres if c not in columnas]
+    if invalidas or not nombres:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Columnas no validas: {', '.join(invalidas)}. Disponibles: {', '.join(columnas)}"
+        )
+    return list(dict.fromkeys(nombres))
+
+
+def _lotes(stmt: Select) -> Iterator[list]:
+    """
+    Cursor del lado del servidor: nunca hay mas de LOTE filas en memoria.
+    Sesion propia porque el cuerpo se genera despues de que el endpoint retorna
+    """
+    db = SessionLocal()
+    try:
+        resultado = db.execute(stmt.execution_options(yield_per=LOTE))
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        db.close()
+
+
+def _valor(v):
+    if isinstance(v, Enum):
+        return v.value
+    if isinstance(v, Decimal):
+        return float(v)
+    return v
+
+
+def _texto(v) -> str:
+    v = _valor(v)
+    if v is None:
+        return ""
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    v = str(v)
+    #evita que una celda se interprete como formula al abrir el csv en una hoja de calculo
+    #(tab y retorno de carro al inicio tambien los toman como prefijo de formula)
+    if v[:1] in ("=", "+", "-", "@", "\t", "\r") and not _es_numero(v):
+        return "'" + v
+    return v
+
+
+def _es_numero(v: str) -> bool:
+    try:
+        float(v)
+        return True
+    except ValueError:
+        return False
+
+
+def _csv(stmt: Select, titulos: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff") #BOM para que excel detecte utf-8
+    writer.writerow(titulos)
+    for lote in _lotes(stmt):
+        for fila in lote:
+            writer.writerow([_texto(v) for v in fila])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx(stmt: Select, titulos: List[str]) -> Iterator[bytes]:
+    """
+    xlsxwriter en modo constant_memory escribe cada fila a disco al pasar a la
+    siguiente. El zip final se arma en un temporal y se envia por bloques
+    """
+    with tempfile.TemporaryFile() as archivo:
+        libro = xlsxwriter.Workbook(archivo, {
+            "constant_memory": True,
+            "remove_timezone": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+        })
+        negrita = libro.add_format({"bold": True})
+        hoja, fila_actual = None, _MAX_FILAS_HOJA
+
+        for lote in _lotes(stmt):
+            for fila in lote:
+                if fila_actual >= _MAX_FILAS_HOJA:
+                    hoja = libro.add_worksheet()
+                    hoja.write_row(0, 0, titulos, negrita)
+                    fila_actual = 0
+                fila_actual += 1
+                hoja.write_row(fila_actual, 0, [_valor(v) for v in fila])
+
+        if hoja is None:
+            libro.add_worksheet().write_row(0, 0, titulos, negrita)
+        libro.close()
+
+        archivo.seek(0)
+        while bloque := archivo.read(_CHUNK):
+            yield bloque
+
+
+def exportar(stmt: Select, columnas: Columnas, elegidas: List[str], formato: str, nombre: str) -> StreamingResponse:
+    """
+    stmt ya filtrado y ordenado, sus columnas se reemplazan por las elegidas
+    """
+    if formato not in TIPOS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado (csv o xlsx)")
+
+    stmt = stmt.with_only_columns(*[columnas[c][1] for c in elegidas], maintain_column_froms=True)
+    titulos = [columnas[c][0] for c in elegidas]
+    generador = _csv(stmt, titulos) if formato == "csv" else _xlsx(stmt, titulos)
+    archivo = f"{nombre}_{date.today().isoformat()}.{formato}"
+    return StreamingResponse(
+        generador,
+        media_type=TIPOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'}
+    )
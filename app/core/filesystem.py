@@ -1,10 +1,20 @@
 from pathlib import Path
 from app.core.config import settings
 
+#subidas en espera de los workers de media
+SPOOL_SUBDIR = "ingestas"
+#carpetas con archivos ya publicados; son las unicas que se sirven en MEDIA_URL
+PUBLIC_SUBDIRS = ["animals", "habitats", "users", "productos"]
+
 def ensure_upload_dirs_exist():
     base_path = Path(settings.MEDIA_DIR)
-    subdirs = ["animals", "habitats", "users"]
+    subdirs = PUBLIC_SUBDIRS + [SPOOL_SUBDIR]
     base_path.mkdir(parents=True, exist_ok=True)
     for sub in subdirs:
         (base_path / sub).mkdir(parents=True, exist_ok=True)
     print(f"Directorios de media asegurados en: {base_path.resolve()}")
+
+def get_spool_dir() -> Path:
+    spool = Path(settings.MEDIA_DIR) / SPOOL_SUBDIR
+    spool.mkdir(parents=True, exist_ok=True)
+    return spool
@@ -0,0 +1,337 @@
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.filesystem import get_spool_dir
+from app.core.storage import get_storage
+from app.core import catalogo_cache, dieta_cache
+from app.db.session import SessionLocal
+from app.models.media_ingesta import MediaIngesta
+from app.models.animal import Animal, Habitat, MediaAnimal, MediaHabitat
+from app.models.inventario import Producto
+
+#lado mayor en px de cada variante, el original no se sube
+VARIANTES = {"grande": 1600, "mediano": 800, "miniatura": 320}
+CARPETAS = {"animal": "animals", "habitat": "habitats", "producto": "productos"}
+MAX_INTENTOS = 3
+MINUTOS_RECLAMO = 15 #una ingesta 'procesando' mas vieja se considera abandonada
+LOTE_BARRIDO = 50
+_CHUNK = 1024 * 1024
+
+
+class _IngestaPerdida(Exception):
+    """Otro worker finalizo o reclamo la ingesta mientras esta se procesaba"""
+
+
+#ENCOLAR
+
+def guardar_temporal(file: UploadFile) -> Path:
+    """
+    Copia la subida al spool por bloques y la valida (tamaño, vacio).
+    Sirve para rechazar el archivo antes de crear la entidad que lo usa
+    """
+    sufijo = Path(file.filename or "").suffix.lower()[:10]
+    ruta = get_spool_dir() / f"{uuid.uuid4().hex}{sufijo}"
+
+    total = 0
+    try:
+        with open(ruta, "wb") as destino:
+            while bloque := file.file.read(_CHUNK):
+                total += len(bloque)
+                if total > settings.MEDIA_MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="El archivo supera el tamaño maximo permitido"
+                    )
+                destino.write(bloque)
+    except Exception:
+        ruta.unlink(missing_ok=True)
+        raise
+
+    if total == 0:
+        ruta.unlink(missing_ok=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El archivo esta vacio")
+    return ruta
+
+
+def encolar(
+    db: Session,
+    entidad: str,
+    entidad_id: int,
+    file: UploadFile,
+    usuario_id: Optional[int],
+    datos: Optional[dict] = None,
+    ruta: Optional[Path] = None
+) -> MediaIngesta:
+    """
+    Crea la ingesta pendiente con la subida en disco (ruta, si ya paso por
+    guardar_temporal). No toca el storage remoto
+    """
+    if ruta is None:
+        ruta = guardar_temporal(file)
+
+    ingesta = MediaIngesta(
+        entidad=entidad,
+        entidad_id=entidad_id,
+        usuario_id=usuario_id,
+        estado="pendiente",
+        intentos=0,
+        ruta_temporal=str(ruta),
+        nombre_original=(file.filename or "")[:255],
+        content_type=file.content_type,
+        datos=datos or {}
+    )
+    db.add(ingesta)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        ruta.unlink(missing_ok=True)
+        raise
+    db.refresh(ingesta)
+    return ingesta
+
+
+#PROCESAR
+
+def _abandonada():
+    return datetime.now(timezone.utc) - timedelta(minutes=MINUTOS_RECLAMO)
+
+def _reclamable():
+    return or_(
+        MediaIngesta.estado == "pendiente",
+        and_(MediaIngesta.estado == "procesando", MediaIngesta.reclamado_en < _abandonada())
+    )
+
+def _reclamar(db: Session, ingesta_id: int) -> Optional[MediaIngesta]:
+    """
+    UPDATE condicional: solo un worker puede pasar la ingesta a 'procesando'
+    """
+    reclamadas = db.query(MediaIngesta).filter(
+        MediaIngesta.id_ingesta == ingesta_id, _reclamable()
+    ).update({
+        MediaIngesta.estado: "procesando",
+        MediaIngesta.reclamado_en: datetime.now(timezone.utc),
+        MediaIngesta.intentos: MediaIngesta.intentos + 1,
+    }, synchronize_session=False)
+    db.commit()
+    if not reclamadas:
+        return None
+    return db.query(MediaIngesta).filter(MediaIngesta.id_ingesta == ingesta_id).first()
+
+
+def _generar_variantes(ingesta: MediaIngesta, trabajo: Path) -> List[Tuple[str, Path]]:
+    """
+    Imagenes: una copia reducida por cada tamaño de VARIANTES. Otros archivos
+    (video) se suben tal cual
+    """
+    original = Path(ingesta.ruta_temporal)
+    if not (ingesta.content_type or "").startswith("image/"):
+        return [("original", original)]
+
+    with Image.open(original) as imagen:
+        imagen = ImageOps.exif_transpose(imagen)
+        con_alfa = imagen.mode in ("RGBA", "LA", "P")
+        formato, extension = ("PNG", ".png") if con_alfa else ("JPEG", ".jpg")
+        if not con_alfa and imagen.mode != "RGB":
+            imagen = imagen.convert("RGB")
+
+        archivos = []
+        for nombre, lado in VARIANTES.items():
+            copia = imagen.copy()
+            copia.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            destino = trabajo / f"{nombre}{extension}"
+            if formato == "JPEG":
+                copia.save(destino, formato, quality=85, optimize=True, progressive=True)
+            else:
+                copia.save(destino, formato, optimize=True)
+            archivos.append((nombre, destino))
+    return archivos
+
+
+def _finalizar(db: Session, ingesta: MediaIngesta, principal: Dict, variantes: Dict) -> List[str]:
+    """
+    Marca la ingesta como completada y crea/actualiza la media en la misma transaccion.
+    Devuelve los public_id que quedaron sin uso (imagen anterior del producto)
+    """
+    #el UPDATE condicional bloquea la fila: si otro worker la reclamo, no se finaliza dos veces
+    marcadas = db.query(MediaIngesta).filter(
+        MediaIngesta.id_ingesta == ingesta.id_ingesta,
+        MediaIngesta.estado == "procesando",
+        MediaIngesta.reclamado_en == ingesta.reclamado_en
+    ).update({
+        MediaIngesta.estado: "completado",
+        MediaIngesta.url: principal["secure_url"],
+        MediaIngesta.error: None,
+        MediaIngesta.finalizado_en: datetime.now(timezone.utc),
+    }, synchronize_session=False)
+    if marcadas != 1:
+        raise _IngestaPerdida()
+
+    datos = ingesta.datos or {}
+    sin_uso = []
+
+    if ingesta.entidad == "animal":
+        if not db.query(Animal.id_animal).filter(Animal.id_animal == ingesta.entidad_id).first():
+            raise ValueError("El animal ya no existe")
+        media = MediaAnimal(
+            animal_id=ingesta.entidad_id,
+            tipo_medio=datos.get("tipo_medio", True),
+            titulo_media_animal=datos.get("titulo", ""),
+            descripcion_media_animal=datos.get("descripcion"),
+            url_animal=principal["secure_url"],
+            public_id=principal["public_id"],
+            variantes=variantes
+        )
+        db.add(media)
+        db.flush()
+        media_id = media.id_media_animal
+
+    elif ingesta.entidad == "habitat":
+        if not db.query(Habitat.id_habitat).filter(Habitat.id_habitat == ingesta.entidad_id).first():
+            raise ValueError("El habitat ya no existe")
+        media = MediaHabitat(
+            habitat_id=ingesta.entidad_id,
+            tipo_medio=datos.get("tipo_medio", True),
+            titulo_media_habitat=datos.get("titulo", ""),
+            descripcion_media_habitat=datos.get("descripcion"),
+            url_habitat=principal["secure_url"],
+            public_id=principal["public_id"],
+            variantes=variantes
+        )
+        db.add(media)
+        db.flush()
+        media_id = media.id_media_habitat
+
+    else:
+        producto = db.query(Producto).filter(Producto.id_producto == ingesta.entidad_id).with_for_update().first()
+        if not producto:
+            raise ValueError("El producto ya no existe")
+        sin_uso = public_ids(producto.public_id, producto.photo_variantes)
+        producto.photo_url = principal["secure_url"]
+        producto.public_id = principal["public_id"]
+        producto.photo_variantes = variantes
+        media_id = producto.id_producto
+
+    db.query(MediaIngesta).filter(MediaIngesta.id_ingesta == ingesta.id_ingesta)\
+        .update({MediaIngesta.media_id: media_id, MediaIngesta.ruta_temporal: None}, synchronize_session=False)
+    db.commit()
+    return sin_uso
+
+
+def _registrar_fallo(db: Session, ingesta: MediaIngesta, error: str) -> bool:
+    """
+    Devuelve la ingesta a 'pendiente' para otro intento o la deja en 'error'.
+    True si ya no se reintentara
+    """
+    definitivo = ingesta.intentos >= MAX_INTENTOS
+    db.query(MediaIngesta).filter(
+        MediaIngesta.id_ingesta == ingesta.id_ingesta,
+        MediaIngesta.estado == "procesando",
+        MediaIngesta.reclamado_en == ingesta.reclamado_en
+    ).update({
+        MediaIngesta.estado: "error" if definitivo else "pendiente",
+        MediaIngesta.error: error[:2000],
+        MediaIngesta.finalizado_en: datetime.now(timezone.utc) if definitivo else None,
+        MediaIngesta.ruta_temporal: None if definitivo else ingesta.ruta_temporal,
+    }, synchronize_session=False)
+    db.commit()
+    return definitivo
+
+
+def procesar(ingesta_id: int) -> bool:
+    """
+    Worker de una ingesta (BackgroundTasks o barrido del scheduler), abre su propia sesion
+    """
+    db: Session = SessionLocal()
+    storage = get_storage()
+    subidos: List[str] = []
+    try:
+        ingesta = _reclamar(db, ingesta_id)
+        if not ingesta:
+            return False
+        spool = Path(ingesta.ruta_temporal)
+        entidad = ingesta.entidad
+        entidad_id = ingesta.entidad_id
+
+        try:
+            with tempfile.TemporaryDirectory(dir=get_spool_dir()) as trabajo:
+                variantes = {}
+                for nombre, ruta in _generar_variantes(ingesta, Path(trabajo)):
+                    variantes[nombre] = storage.subir(ruta, CARPETAS[ingesta.entidad])
+                    subidos.append(variantes[nombre]["public_id"])
+
+            principal = variantes.get("grande") or variantes["original"]
+            sin_uso = _finalizar(db, ingesta, principal, variantes)
+
+        except _IngestaPerdida:
+            db.rollback()
+            _eliminar_ids(storage, subidos)
+            print(f"Ingesta {ingesta_id} finalizada por otro worker, se descartan las subidas")
+            return False
+
+        except Exception as e:
+            db.rollback()
+            _eliminar_ids(storage, subidos)
+            print(f"Error procesando ingesta {ingesta_id}: {e}")
+            if _registrar_fallo(db, ingesta, str(e)):
+                spool.unlink(missing_ok=True)
+            return False
+
+        spool.unlink(missing_ok=True)
+        _eliminar_ids(storage, sin_uso)
+        if entidad in ("animal", "habitat"):
+            catalogo_cache.invalidate()
+        else:
+            dieta_cache.invalidate_producto(db, entidad_id)
+        return True
+
+    finally:
+        db.close()
+
+
+def barrer_pendientes() -> int:
+    """
+    Reintenta lo que quedo pendiente (reinicio del servidor, fallo del storage)
+    y lo que un worker abandono a medias
+    """
+    db: Session = SessionLocal()
+    try:
+        ids = [i for (i,) in db.query(MediaIngesta.id_ingesta)
+               .filter(_reclamable())
+               .order_by(MediaIngesta.created_at)
+               .limit(LOTE_BARRIDO).all()]
+    finally:
+        db.close()
+
+    return sum(1 for i in ids if procesar(i))
+
+
+#BORRADO
+
+def public_ids(public_id: Optional[str], variantes: Optional[Dict]) -> List[str]:
+    ids = [v.get("public_id") for v in (variantes or {}).values()]
+    return list(dict.fromkeys(i for i in [public_id, *ids] if i))
+
+
+def _eliminar_ids(storage, ids: List[str]) -> None:
+    for public_id in ids:
+        try:
+            storage.eliminar(public_id)
+        except Exception as e:
+            print(f"Advertencia: no se pudo eliminar {public_id} del storage: {e}")
+
+
+def eliminar_archivos(public_id: Optional[str], variantes: Optional[Dict]) -> None:
+    """
+    Borra del storage el archivo principal y todas sus variantes
+    """
+    _eliminar_ids(get_storage(), public_ids(public_id, variantes))
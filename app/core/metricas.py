@@ -0,0 +1,126 @@
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+#metricas de la api en formato prometheus. Con gunicorn (gunicorn.conf.py) cada worker
+#escribe en PROMETHEUS_MULTIPROC_DIR y /metrics suma los archivos de todos
+
+_LATENCIA_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+#REQUESTS
+REQUEST_LATENCIA = Histogram(
+    "zooconnect_request_duracion_segundos", "Duracion de los requests por ruta y status",
+    ["metodo", "ruta", "status"], buckets=_LATENCIA_BUCKETS
+)
+
+#SQL POR REQUEST (app/db/instrumentacion.py)
+SQL_CONSULTAS = Histogram(
+    "zooconnect_sql_consultas_por_request", "Consultas SQL ejecutadas por request",
+    ["ruta"], buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 500)
+)
+SQL_TIEMPO = Histogram(
+    "zooconnect_sql_tiempo_por_request_segundos", "Tiempo en la base de datos por request",
+    ["ruta"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+SQL_N_MAS_1 = Counter(
+    "zooconnect_sql_n_mas_1", "Requests con una misma consulta repetida por encima del umbral", ["ruta"]
+)
+SQL_PRESUPUESTO_EXCEDIDO = Counter(
+    "zooconnect_sql_presupuesto_excedido", "Requests que superaron su presupuesto de consultas", ["ruta"]
+)
+
+#POOL DE CONEXIONES
+DB_POOL_EN_USO = Gauge(
+    "zooconnect_db_pool_en_uso", "Conexiones prestadas por el pool", multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "zooconnect_db_pool_overflow", "Conexiones abiertas por encima de pool_size", multiprocess_mode="livesum"
+)
+DB_POOL_ESPERA = Histogram(
+    "zooconnect_db_pool_espera_segundos", "Espera para obtener una conexion del pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+#REDIS
+REDIS_LATENCIA = Histogram(
+    "zooconnect_redis_duracion_segundos", "Ida y vuelta de los comandos de redis",
+    ["comando"], buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+)
+CACHE_CONSULTAS = Counter(
+    "zooconnect_cache_consultas", "Lecturas de cada capa de cache", ["capa", "resultado"]
+)
+
+#SCHEDULER
+JOB_DURACION = Histogram(
+    "zooconnect_job_duracion_segundos", "Duracion de los jobs del scheduler",
+    ["job"], buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+)
+JOB_EJECUCIONES = Counter(
+    "zooconnect_job_ejecuciones", "Ejecuciones de los jobs por resultado (ok, error, omitido)", ["job", "resultado"]
+)
+
+#REPORTES
+REPORTE_RENDER = Histogram(
+    "zooconnect_reporte_render_segundos", "Render de cada pdf por plantilla",
+    ["plantilla"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+#AUDITORIA (las escrituras van en background tasks, no hay una cola explicita)
+AUDIT_PENDIENTES = Gauge(
+    "zooconnect_audit_pendientes", "Registros de auditoria en escritura", multiprocess_mode="livesum"
+)
+AUDIT_ESCRITOS = Counter(
+    "zooconnect_audit_escritos", "Registros de auditoria por resultado", ["resultado"]
+)
+
+
+def cache(capa: str, aciertos: int, fallos: int = 0) -> None:
+    if aciertos:
+        CACHE_CONSULTAS.labels(capa, "hit").inc(aciertos)
+    if fallos:
+        CACHE_CONSULTAS.labels(capa, "miss").inc(fallos)
+
+
+def generar() -> Tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricasMiddleware:
+    """
+    Latencia por plantilla de ruta (no por url, para acotar las series)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensaje: Message):
+            nonlocal status
+            if mensaje["type"] == "http.response.start":
+                status = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCIA.labels(
+                scope["method"], route.path if route else "sin_ruta", str(status)
+            ).observe(time.perf_counter() - inicio)
@@ -0,0 +1,43 @@
+import base64
+import json
+import math
+from datetime import datetime
+
+from fastapi import HTTPException
+
+#cursores opacos para paginacion keyset
+
+_INT_MAX = 2 ** 31 - 1 #columnas integer de postgres
+
+
+def encode_cursor(*valores) -> str:
+    valores = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+def _convertir(valor, tipo):
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if isinstance(valor, bool):
+        raise ValueError(valor)
+    if tipo is float and isinstance(valor, (int, float)) and math.isfinite(valor):
+        return float(valor)
+    if tipo is int and isinstance(valor, int) and -_INT_MAX - 1 <= valor <= _INT_MAX:
+        return valor
+    if tipo is str and isinstance(valor, str):
+        return valor
+    raise ValueError(valor)
+
+
+def decode_cursor(cursor: str, *tipos: type) -> list:
+    """
+    Valores del cursor, uno por cada tipo (int, float, str o datetime). Un cursor
+    manipulado (otra cantidad de valores u otros tipos) es un 400, no llega a la base
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise ValueError(valores)
+        return [_convertir(valor, tipo) for valor, tipo in zip(valores, tipos)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor invalido")
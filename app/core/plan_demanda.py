@@ -0,0 +1,270 @@
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, or_, delete, insert
+from sqlalchemy.orm import Session, aliased
+
+from app.models.animal import Animal
+from app.models.tarea import Dieta, DetalleDieta
+from app.models.inventario import Producto, StockLote, UnidadMedida, ProyeccionStock
+
+HORIZONTE_DEFAULT = 14
+HORIZONTE_MAX = 90
+_EPS = 1e-6
+
+
+#FRECUENCIAS
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode()
+    return texto.lower().strip()
+
+def frecuencia_a_veces_por_dia(frecuencia: str) -> float:
+    """
+    Convierte el texto libre de DetalleDieta.frecuencia en tomas por dia
+    ("2 veces al dia" -> 2, "cada 8 horas" -> 3, "semanal" -> 1/7)
+    Si no se reconoce se asume una vez al dia
+    """
+    f = _normalizar(frecuencia)
+
+    m = re.search(r"(\d+(?:[.,]\d+)?)\s*(?:veces|vez|x)\s*(?:al|por|a la|/)?\s*semana", f)
+    if m:
+        return float(m.group(1).replace(",", ".")) / 7
+    m = re.search(r"(\d+(?:[.,]\d+)?)\s*(?:veces|vez|x)\s*(?:al|por|/)?\s*dia", f)
+    if m:
+        return float(m.group(1).replace(",", "."))
+    m = re.search(r"cada\s*(\d+)\s*h", f)
+    if m and int(m.group(1)) > 0:
+        return 24 / int(m.group(1))
+    m = re.search(r"cada\s*(\d+)\s*dia", f)
+    if m and int(m.group(1)) > 0:
+        return 1 / int(m.group(1))
+
+    if "interdiari" in f or "por medio" in f:
+        return 0.5
+    if "quincenal" in f:
+        return 1 / 15
+    if "semanal" in f:
+        return 1 / 7
+    if "mensual" in f:
+        return 1 / 30
+    return 1.0
+
+
+#CARGA DE DATOS
+
+def _cargar_demanda(db: Session, productos_idx: Dict[int, int]):
+    """
+    Demanda diaria por producto (en la unidad del producto) de todas las dietas activas
+    Las dietas de especie se multiplican por los animales activos de la especie sin dieta propia
+    """
+    unidad_dieta = aliased(UnidadMedida)
+    unidad_producto = aliased(UnidadMedida)
+
+    detalles = db.query(
+        DetalleDieta.id_detalle_dieta,
+        DetalleDieta.producto_id,
+        DetalleDieta.cantidad,
+        DetalleDieta.frecuencia,
+        Dieta.animal_id,
+        Dieta.especie_id,
+        unidad_dieta.id_unidad.label("u_dieta_id"),
+        unidad_dieta.magnitud.label("u_dieta_magnitud"),
+        unidad_dieta.factor_base.label("u_dieta_factor"),
+        unidad_producto.id_unidad.label("u_prod_id"),
+        unidad_producto.magnitud.label("u_prod_magnitud"),
+        unidad_producto.factor_base.label("u_prod_factor"),
+    ).join(Dieta, DetalleDieta.dieta_id == Dieta.id_dieta)\
+     .join(Producto, DetalleDieta.producto_id == Producto.id_producto)\
+     .join(unidad_dieta, DetalleDieta.unidad_medida_id == unidad_dieta.id_unidad)\
+     .join(unidad_producto, Producto.unidad_medida_id == unidad_producto.id_unidad)\
+     .outerjoin(Animal, Dieta.animal_id == Animal.id_animal)\
+     .filter(
+        Dieta.is_active == True,
+        Producto.is_active == True,
+        or_(Dieta.animal_id == None, Animal.is_active == True)
+     ).all()
+
+    #animales activos por especie que no tienen dieta propia (la del animal pisa a la especie)
+    con_dieta_propia = db.query(Dieta.animal_id).filter(
+        Dieta.is_active == True, Dieta.animal_id != None
+    )
+    animales_por_especie = dict(
+        db.query(Animal.especie_id, func.count(Animal.id_animal))
+        .filter(Animal.is_active == True, ~Animal.id_animal.in_(con_dieta_propia))
+        .group_by(Animal.especie_id)
+        .all()
+    )
+
+    n = len(detalles)
+    idx = np.empty(n, dtype=np.int64)
+    cantidad = np.empty(n, dtype=np.float64)
+    sin_conversion = []
+
+    for i, d in enumerate(detalles):
+        idx[i] = productos_idx.get(d.producto_id, -1)
+
+        if d.animal_id is not None:
+            multiplicador = 1
+        else:
+            multiplicador = animales_por_especie.get(d.especie_id, 0)
+
+        if d.u_dieta_id == d.u_prod_id:
+            factor = 1.0
+        elif d.u_dieta_magnitud and d.u_dieta_magnitud == d.u_prod_magnitud and d.u_prod_factor:
+            factor = float(d.u_dieta_factor) / float(d.u_prod_factor)
+        else:
+            sin_conversion.append(d.id_detalle_dieta)
+            factor = 0.0
+
+        cantidad[i] = float(d.cantidad) * frecuencia_a_veces_por_dia(d.frecuencia) * multiplicador * factor
+
+    validos = idx >= 0
+    demanda = np.zeros(len(productos_idx), dtype=np.float64)
+    np.add.at(demanda, idx[validos], cantidad[validos])
+    return demanda, sin_conversion
+
+
+def _cargar_lotes(db: Session, productos_idx: Dict[int, int], stock_actual: np.ndarray, inicio: date):
+    """
+    Matriz (productos x lotes) de cantidades y dia de caducidad ordenada por FEFO
+    Si stock_actual supera la suma de lotes la diferencia se agrega como lote sin caducidad
+    """
+    lotes = db.query(
+        StockLote.producto_id, StockLote.cantidad_disponible, StockLote.fecha_caducidad
+    ).join(Producto, StockLote.producto_id == Producto.id_producto)\
+     .filter(StockLote.cantidad_disponible > 0, Producto.is_active == True)\
+     .all()
+
+    p = len(productos_idx)
+    lote_prod = np.array([productos_idx[l.producto_id] for l in lotes], dtype=np.int64)
+    lote_cant = np.array([float(l.cantidad_disponible) for l in lotes], dtype=np.float64)
+    lote_cad = np.array([(l.fecha_caducidad - inicio).days for l in lotes], dtype=np.int64)
+
+    #hueco entre stock_actual y lotes -> lote sin caducidad
+    suma_lotes = np.zeros(p, dtype=np.float64)
+    np.add.at(suma_lotes, lote_prod, lote_cant)
+    hueco = stock_actual - suma_lotes
+    con_hueco = np.nonzero(hueco > _EPS)[0]
+    lote_prod = np.concatenate([lote_prod, con_hueco])
+    lote_cant = np.concatenate([lote_cant, hueco[con_hueco]])
+    lote_cad = np.concatenate([lote_cad, np.full(len(con_hueco), np.iinfo(np.int64).max)])
+
+    orden = np.lexsort((lote_cad, lote_prod))
+    lote_prod, lote_cant, lote_cad = lote_prod[orden], lote_cant[orden], lote_cad[orden]
+
+    por_producto = np.bincount(lote_prod, minlength=p)
+    k = int(por_producto.max()) if len(lote_prod) else 1
+    inicio_grupo = np.concatenate([[0], np.cumsum(por_producto)[:-1]])
+    posicion = np.arange(len(lote_prod)) - inicio_grupo[lote_prod]
+
+    restante = np.zeros((p, max(k, 1)), dtype=np.float64)
+    caducidad = np.full((p, max(k, 1)), np.iinfo(np.int64).max, dtype=np.int64)
+    restante[lote_prod, posicion] = lote_cant
+    caducidad[lote_prod, posicion] = lote_cad
+    return restante, caducidad
+
+
+#MOTOR
+
+def proyectar(demanda_diaria: np.ndarray, restante: np.ndarray, caducidad: np.ndarray, horizonte: int):
+    """
+    Simula dia a dia, vectorizado sobre productos y lotes:
+    primero se pierden los lotes caducados y luego se consume la demanda por FEFO
+    """
+    restante = restante.copy()
+    p = len(demanda_diaria)
+    demanda = np.broadcast_to(demanda_diaria[:, None], (p, horizonte))
+
+    stock = np.zeros((p, horizonte))
+    deficit = np.zeros((p, horizonte))
+    merma = np.zeros(p)
+
+    for d in range(horizonte):
+        caducados = caducidad < d
+        merma += np.where(caducados, restante, 0).sum(axis=1)
+        restante[caducados] = 0
+
+        previo = np.cumsum(restante, axis=1) - restante
+        tomado = np.clip(demanda[:, d:d + 1] - previo, 0, restante)
+        restante -= tomado
+
+        deficit[:, d] = demanda[:, d] - tomado.sum(axis=1)
+        stock[:, d] = restante.sum(axis=1)
+
+    return stock, deficit, merma
+
+
+def calcular_plan(db: Session, horizonte: int = HORIZONTE_DEFAULT, inicio: Optional[date] = None) -> dict:
+    inicio = inicio or date.today()
+    horizonte = max(1, min(horizonte, HORIZONTE_MAX))
+
+    productos = db.query(
+        Producto.id_producto, Producto.nombre_producto, Producto.stock_actual, UnidadMedida.abreviatura
+    ).join(Producto.unidad_medida).filter(Producto.is_active == True)\
+     .order_by(Producto.id_producto).all()
+
+    productos_idx = {p.id_producto: i for i, p in enumerate(productos)}
+    stock_actual = np.array([float(p.stock_actual) for p in productos], dtype=np.float64)
+
+    demanda, sin_conversion = _cargar_demanda(db, productos_idx)
+    restante, caducidad = _cargar_lotes(db, productos_idx, stock_actual, inicio)
+    stock, deficit, merma = proyectar(demanda, restante, caducidad, horizonte)
+
+    con_deficit = deficit > _EPS
+    hay_quiebre = con_deficit.any(axis=1)
+    primer_quiebre = np.argmax(con_deficit, axis=1)
+
+    resultado = []
+    for i in np.nonzero(demanda > _EPS)[0]:
+        p = productos[i]
+        dias = int(primer_quiebre[i]) if hay_quiebre[i] else None
+        resultado.append({
+            "producto_id": p.id_producto,
+            "nombre_producto": p.nombre_producto,
+            "unidad": p.abreviatura,
+            "demanda_diaria": round(float(demanda[i]), 2),
+            "stock_inicial": round(float(stock_actual[i]), 2),
+            "dias_cobertura": dias,
+            "fecha_quiebre": inicio + timedelta(days=dias) if dias is not None else None,
+            "deficit_total": round(float(deficit[i].sum()), 2),
+            "merma_caducidad": round(float(merma[i]), 2),
+            "stock_proyectado": np.round(stock[i], 2).tolist(),
+            "deficit_diario": np.round(deficit[i], 2).tolist(),
+        })
+
+    #primero lo que se acaba antes
+    resultado.sort(key=lambda r: (r["dias_cobertura"] is None, r["dias_cobertura"] or 0, r["nombre_producto"]))
+
+    return {
+        "fecha_inicio": inicio,
+        "horizonte_dias": horizonte,
+        "productos": resultado,
+        "detalles_sin_conversion": sin_conversion,
+    }
+
+
+def guardar_plan(db: Session, plan: dict) -> int:
+    filas = [
+        {
+            "producto_id": r["producto_id"],
+            "fecha_calculo": plan["fecha_inicio"],
+            "horizonte_dias": plan["horizonte_dias"],
+            "demanda_diaria": r["demanda_diaria"],
+            "stock_inicial": r["stock_inicial"],
+            "dias_cobertura": r["dias_cobertura"],
+            "fecha_quiebre": r["fecha_quiebre"],
+            "deficit_total": r["deficit_total"],
+            "merma_caducidad": r["merma_caducidad"],
+        }
+        for r in plan["productos"]
+    ]
+
+    db.execute(delete(ProyeccionStock))
+    if filas:
+        db.execute(insert(ProyeccionStock), filas)
+    db.commit()
+    return len(filas)
@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+from typing import Optional, Set
+
+import numpy as np
+from sqlalchemy import func, cast, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.inventario import (
+    Producto, Salida, DetalleSalida, EntradaInventario, DetalleEntrada, PronosticoConsumo
+)
+
+_EPS = 1e-6
+DIAS_PROMEDIO_MOVIL = 7
+
+
+def _productos_movidos(db: Session, desde: date) -> Set[int]:
+    """
+    Productos con entradas o salidas desde la fecha (o sin pronostico todavia)
+    """
+    con_salidas = db.query(DetalleSalida.producto_id)\
+        .join(Salida, DetalleSalida.salida_id == Salida.id_salida)\
+        .filter(Salida.fecha_salida >= desde)
+    con_entradas = db.query(DetalleEntrada.producto_id)\
+        .join(EntradaInventario, DetalleEntrada.entrada_id == EntradaInventario.id_entrada_inventario)\
+        .filter(EntradaInventario.fecha_entrada >= desde)
+    sin_pronostico = db.query(Producto.id_producto)\
+        .outerjoin(PronosticoConsumo, PronosticoConsumo.producto_id == Producto.id_producto)\
+        .filter(PronosticoConsumo.producto_id == None, Producto.is_active == True)
+
+    filas = con_salidas.union(con_entradas, sin_pronostico).all()
+    return {f[0] for f in filas}
+
+
+def _matriz_consumo(db: Session, productos_idx: dict, inicio: date, fin: date, solo: Optional[Set[int]]):
+    """
+    Consumo diario (productos x dias) en una sola pasada GROUP BY sobre las salidas
+    """
+    dia = cast(Salida.fecha_salida, Date)
+    query = db.query(
+        DetalleSalida.producto_id, dia.label("dia"), func.sum(DetalleSalida.cantidad_salida)
+    ).join(Salida, DetalleSalida.salida_id == Salida.id_salida)\
+     .filter(Salida.fecha_salida >= inicio, Salida.fecha_salida < fin + timedelta(days=1))
+    if solo is not None:
+        query = query.filter(DetalleSalida.producto_id.in_(solo))
+    filas = query.group_by(DetalleSalida.producto_id, dia).all()
+
+    dias = (fin - inicio).days + 1
+    matriz = np.zeros((len(productos_idx), dias), dtype=np.float64)
+    filas = [f for f in filas if f[0] in productos_idx]
+    if filas:
+        fila = np.array([productos_idx[f[0]] for f in filas], dtype=np.int64)
+        columna = np.array([(f[1] - inicio).days for f in filas], dtype=np.int64)
+        matriz[fila, columna] = [float(f[2]) for f in filas]
+    return matriz
+
+
+def ajustar(consumo: np.ndarray, stock: np.ndarray, alfa: float, lead_time: int, z: float) -> dict:
+    """
+    Suavizado exponencial como producto matriz-vector con los pesos de cada dia,
+    mas promedio movil y stock de seguridad por la variabilidad diaria
+    """
+    dias = consumo.shape[1]
+    pesos = alfa * (1 - alfa) ** np.arange(dias - 1, -1, -1)
+    pesos /= pesos.sum()
+
+    demanda = consumo @ pesos
+    promedio = consumo[:, -DIAS_PROMEDIO_MOVIL:].mean(axis=1)
+    desviacion = consumo.std(axis=1)
+    seguridad = z * desviacion * np.sqrt(lead_time)
+    reorden = demanda * lead_time + seguridad
+
+    con_consumo = demanda > _EPS
+    cobertura = np.full(len(stock), np.nan)
+    np.divide(stock, demanda, out=cobertura, where=con_consumo)
+
+    return {
+        "promedio_movil": promedio,
+        "demanda_diaria": demanda,
+        "desviacion_diaria": desviacion,
+        "stock_seguridad": seguridad,
+        "punto_reorden": reorden,
+        "dias_cobertura": cobertura,
+    }
+
+
+def calcular_pronosticos(db: Session, completo: bool = False, hoy: Optional[date] = None) -> int:
+    """
+    Recalcula el pronostico. En modo incremental solo los productos que se movieron
+    desde el ultimo calculo
+    """
+    hoy = hoy or date.today()
+    fin = hoy - timedelta(days=1)
+    inicio = fin - timedelta(days=settings.PRONOSTICO_VENTANA_DIAS - 1)
+
+    solo = None
+    if not completo:
+        ultimo = db.query(func.max(PronosticoConsumo.fecha_calculo)).scalar()
+        if ultimo is not None:
+            solo = _productos_movidos(db, ultimo - timedelta(days=1))
+            if not solo:
+                return 0
+
+    query = db.query(Producto.id_producto, Producto.stock_actual).filter(Producto.is_active == True)
+    if solo is not None:
+        query = query.filter(Producto.id_producto.in_(solo))
+    productos = query.order_by(Producto.id_producto).all()
+    if not productos:
+        return 0
+
+    productos_idx = {p.id_producto: i for i, p in enumerate(productos)}
+    stock = np.array([float(p.stock_actual) for p in productos], dtype=np.float64)
+
+    consumo = _matriz_consumo(db, productos_idx, inicio, fin, solo)
+    modelo = ajustar(
+        consumo, stock,
+        settings.PRONOSTICO_ALFA, settings.PRONOSTICO_LEAD_TIME_DIAS, settings.PRONOSTICO_Z_SERVICIO
+    )
+
+    filas = []
+    for i, p in enumerate(productos):
+        cobertura = modelo["dias_cobertura"][i]
+        filas.append({
+            "producto_id": p.id_producto,
+            "fecha_calculo": hoy,
+            "promedio_movil": round(float(modelo["promedio_movil"][i]), 2),
+            "demanda_diaria": round(float(modelo["demanda_diaria"][i]), 2),
+            "desviacion_diaria": round(float(modelo["desviacion_diaria"][i]), 2),
+            "stock_seguridad": round(float(modelo["stock_seguridad"][i]), 2),
+            "punto_reorden": round(float(modelo["punto_reorden"][i]), 2),
+            "dias_cobertura": None if np.isnan(cobertura) else round(float(cobertura), 1),
+        })
+
+    stmt = pg_insert(PronosticoConsumo)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PronosticoConsumo.producto_id],
+        set_={
+            c: stmt.excluded[c] for c in (
+                "fecha_calculo", "promedio_movil", "demanda_diaria", "desviacion_diaria",
+                "stock_seguridad", "punto_reorden", "dias_cobertura"
+            )
+        } | {"updated_at": func.now()}
+    )
+    db.execute(stmt, filas)
+    db.commit()
+    return len(filas)
@@ -0,0 +1,299 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.models.trivia import ParticipacionTrivia
+from app.models.user import User
+
+PERIODOS = ("historico", "semana", "dia")
+
+RANKING_PREFIX = "trivia:ranking:"
+# existe solo despues de una reconstruccion completa, sin ella no se incrementa nada
+LISTO_KEY = "trivia:ranking:listo"
+RECONSTRUYENDO_KEY = "trivia:ranking:reconstruyendo"
+TTL_DIA = 60 * 60 * 24 * 2
+TTL_SEMANA = 60 * 60 * 24 * 8
+
+#un usuario puntua su mejor intento de cada trivia, repetir una trivia solo suma la mejora
+#KEYS: ranking de la trivia, global historico, global dia, mejores dia, global semana, mejores semana, listo
+#ARGV: usuario, aciertos, campo trivia:usuario de los hashes de mejores
+_REGISTRAR = """
+if redis.call('EXISTS', KEYS[7]) == 0 then
+    return 0
+end
+local usuario, aciertos = ARGV[1], tonumber(ARGV[2])
+local previo = tonumber(redis.call('ZSCORE', KEYS[1], usuario) or '-1')
+if aciertos > previo then
+    redis.call('ZADD', KEYS[1], aciertos, usuario)
+    redis.call('ZINCRBY', KEYS[2], aciertos - math.max(previo, 0), usuario)
+end
+local ttls = {[3] = %d, [5] = %d}
+for i = 3, 5, 2 do
+    previo = tonumber(redis.call('HGET', KEYS[i + 1], ARGV[3]) or '-1')
+    if aciertos > previo then
+        redis.call('HSET', KEYS[i + 1], ARGV[3], aciertos)
+        redis.call('ZINCRBY', KEYS[i], aciertos - math.max(previo, 0), usuario)
+        redis.call('EXPIRE', KEYS[i], ttls[i])
+        redis.call('EXPIRE', KEYS[i + 1], ttls[i])
+    end
+end
+return 1
+""" % (TTL_DIA, TTL_SEMANA)
+_script = None
+
+Entrada = Dict[str, int]
+
+
+#PERIODOS Y CLAVES
+
+def _hoy() -> date:
+    return datetime.now(ZoneInfo(settings.TIMEZONE)).date()
+
+
+def _inicio_periodo(periodo: str, hoy: date) -> Optional[datetime]:
+    if periodo == "historico":
+        return None
+    inicio = hoy if periodo == "dia" else hoy - timedelta(days=hoy.weekday())
+    return datetime.combine(inicio, time.min, tzinfo=ZoneInfo(settings.TIMEZONE))
+
+
+def _key_global(periodo: str, hoy: date) -> str:
+    if periodo == "dia":
+        return f"{RANKING_PREFIX}global:dia:{hoy.isoformat()}"
+    if periodo == "semana":
+        anio, semana, _ = hoy.isocalendar()
+        return f"{RANKING_PREFIX}global:semana:{anio}-W{semana:02d}"
+    return f"{RANKING_PREFIX}global:historico"
+
+
+def _key_trivia(trivia_id: int) -> str:
+    return f"{RANKING_PREFIX}trivia:{trivia_id}"
+
+
+def _key_mejores(key_global: str) -> str:
+    return f"{key_global}:mejores"
+
+
+def _key(periodo: str, trivia_id: Optional[int], hoy: date) -> str:
+    return _key_trivia(trivia_id) if trivia_id is not None else _key_global(periodo, hoy)
+
+
+#ESCRITURA
+
+def registrar(trivia_id: int, usuario_id: int, aciertos: int) -> None:
+    """
+    Actualiza el ranking de la trivia y los globales. Se llama despues del commit
+    de la participacion
+    """
+    global _script
+    cache = get_sync_cache_client()
+    if not cache:
+        return
+    hoy = _hoy()
+    dia, semana = _key_global("dia", hoy), _key_global("semana", hoy)
+    keys = [
+        _key_trivia(trivia_id), _key_global("historico", hoy),
+        dia, _key_mejores(dia), semana, _key_mejores(semana), LISTO_KEY
+    ]
+    try:
+        if _script is None:
+            _script = cache.register_script(_REGISTRAR)
+        _script(keys=keys, args=[usuario_id, aciertos, f"{trivia_id}:{usuario_id}"])
+    except Exception as e:
+        print(f"Advertencia: no se pudo actualizar el ranking de trivia ({e})")
+
+
+#CONSULTAS A LA BASE
+
+def _mejores_query(db: Session, desde: Optional[datetime] = None, trivia_id: Optional[int] = None):
+    """
+    Mejor intento de cada usuario en cada trivia
+    """
+    p = ParticipacionTrivia
+    query = db.query(
+        p.trivia_id.label("trivia_id"),
+        p.usuario_id.label("usuario_id"),
+        func.max(p.aciertos).label("aciertos")
+    )
+    if desde is not None:
+        query = query.filter(p.fecha_trivia >= desde)
+    if trivia_id is not None:
+        query = query.filter(p.trivia_id == trivia_id)
+    return query.group_by(p.trivia_id, p.usuario_id)
+
+
+def _puntajes_query(db: Session, periodo: str, trivia_id: Optional[int], hoy: date):
+    if trivia_id is not None:
+        mejores = _mejores_query(db, trivia_id=trivia_id).subquery()
+    else:
+        mejores = _mejores_query(db, desde=_inicio_periodo(periodo, hoy)).subquery()
+    return db.query(
+        mejores.c.usuario_id.label("usuario_id"),
+        func.sum(mejores.c.aciertos).label("puntaje")
+    ).group_by(mejores.c.usuario_id)
+
+
+def _ranking_db(db: Session, periodo: str, trivia_id: Optional[int], hoy: date):
+    """
+    Posicion con rank() (empates comparten posicion) y orden estable con row_number()
+    """
+    puntajes = _puntajes_query(db, periodo, trivia_id, hoy).subquery()
+    return db.query(
+        puntajes.c.usuario_id,
+        puntajes.c.puntaje,
+        func.rank().over(order_by=puntajes.c.puntaje.desc()).label("posicion"),
+        func.row_number().over(order_by=(puntajes.c.puntaje.desc(), puntajes.c.usuario_id.desc())).label("orden"),
+        func.count().over().label("total")
+    ).subquery()
+
+
+def _top_db(db: Session, periodo: str, trivia_id: Optional[int], hoy: date, limite: int) -> Tuple[List[Entrada], int]:
+    ranking = _ranking_db(db, periodo, trivia_id, hoy)
+    filas = db.query(ranking).order_by(ranking.c.orden).limit(limite).all()
+    entradas = [{"posicion": f.posicion, "usuario_id": f.usuario_id, "puntaje": int(f.puntaje)} for f in filas]
+    return entradas, (filas[0].total if filas else 0)
+
+
+def _posicion_db(db: Session, periodo: str, trivia_id: Optional[int], hoy: date, usuario_id: int, vecinos: int):
+    ranking = _ranking_db(db, periodo, trivia_id, hoy)
+    propio = db.query(ranking).filter(ranking.c.usuario_id == usuario_id).first()
+    if not propio:
+        total = db.query(func.count()).select_from(ranking).scalar()
+        return None, total, []
+    filas = db.query(ranking).filter(
+        ranking.c.orden.between(propio.orden - vecinos, propio.orden + vecinos)
+    ).order_by(ranking.c.orden).all()
+    entradas = [{"posicion": f.posicion, "usuario_id": f.usuario_id, "puntaje": int(f.puntaje)} for f in filas]
+    return {"posicion": propio.posicion, "puntaje": int(propio.puntaje)}, propio.total, entradas
+
+
+#RECONSTRUCCION
+
+def reconstruir(db: Session) -> int:
+    """
+    Reescribe desde la base los rankings de todas las trivias y los globales del
+    dia, la semana y el historico. Arranque en frio, perdida de redis y el job nocturno
+    """
+    cache = get_sync_cache_client()
+    if not cache:
+        return 0
+    hoy = _hoy()
+
+    por_trivia: Dict[int, Dict[str, int]] = {}
+    for f in _mejores_query(db).all():
+        por_trivia.setdefault(f.trivia_id, {})[str(f.usuario_id)] = f.aciertos
+
+    globales = {}
+    mejores = {}
+    for periodo in PERIODOS:
+        key = _key_global(periodo, hoy)
+        globales[key] = {str(f.usuario_id): int(f.puntaje) for f in _puntajes_query(db, periodo, None, hoy).all()}
+        if periodo != "historico":
+            filas = _mejores_query(db, desde=_inicio_periodo(periodo, hoy)).all()
+            mejores[_key_mejores(key)] = {f"{f.trivia_id}:{f.usuario_id}": f.aciertos for f in filas}
+
+    ttls = {_key_global("dia", hoy): TTL_DIA, _key_global("semana", hoy): TTL_SEMANA}
+    with cache.pipeline(transaction=True) as pipe:
+        for key in cache.scan_iter(match=f"{RANKING_PREFIX}trivia:*"):
+            pipe.delete(key)
+        for trivia_id, puntajes in por_trivia.items():
+            pipe.zadd(_key_trivia(trivia_id), puntajes)
+        for key, puntajes in {**globales, **mejores}.items():
+            pipe.delete(key)
+            if puntajes:
+                if key in mejores:
+                    pipe.hset(key, mapping=puntajes)
+                else:
+                    pipe.zadd(key, puntajes)
+        for key, ttl in ttls.items():
+            pipe.expire(key, ttl)
+            pipe.expire(_key_mejores(key), ttl)
+        pipe.set(LISTO_KEY, int(datetime.now().timestamp()))
+        pipe.execute()
+    return len(por_trivia)
+
+
+def _asegurar_listo(db: Session, cache) -> bool:
+    """
+    True si redis tiene los rankings. Si no, reconstruye (un solo worker a la vez)
+    """
+    if cache.exists(LISTO_KEY):
+        metricas.cache("ranking_trivia", 1)
+        return True
+    metricas.cache("ranking_trivia", 0, 1)
+    if not cache.set(RECONSTRUYENDO_KEY, 1, nx=True, ex=60):
+        return False
+    try:
+        reconstruir(db)
+        return True
+    finally:
+        cache.delete(RECONSTRUYENDO_KEY)
+
+
+#LECTURA
+
+def _entradas_redis(cache, key: str, inicio: int, fin: int) -> List[Entrada]:
+    """
+    Rango por indice (mayor puntaje primero). La posicion cuenta los puntajes
+    estrictamente mayores, asi los empates la comparten
+    """
+    filas = cache.zrevrange(key, inicio, fin, withscores=True)
+    entradas = []
+    for i, (usuario, puntaje) in enumerate(filas, start=inicio):
+        if entradas and puntaje == entradas[-1]["puntaje"]:
+            posicion = entradas[-1]["posicion"]
+        elif i == 0:
+            posicion = 1
+        elif not entradas:
+            posicion = cache.zcount(key, f"({puntaje}", "+inf") + 1
+        else:
+            posicion = i + 1
+        entradas.append({"posicion": posicion, "usuario_id": int(usuario), "puntaje": int(puntaje)})
+    return entradas
+
+
+def top(db: Session, periodo: str, trivia_id: Optional[int], limite: int) -> Tuple[List[Entrada], int]:
+    hoy = _hoy()
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            if _asegurar_listo(db, cache):
+                key = _key(periodo, trivia_id, hoy)
+                return _entradas_redis(cache, key, 0, limite - 1), cache.zcard(key)
+        except Exception as e:
+            print(f"Advertencia: ranking de trivia no disponible en redis ({e})")
+    return _top_db(db, periodo, trivia_id, hoy, limite)
+
+
+def posicion(db: Session, periodo: str, trivia_id: Optional[int], usuario_id: int, vecinos: int):
+    """
+    Posicion del usuario y los `vecinos` de arriba y abajo: (propio, total, entradas)
+    """
+    hoy = _hoy()
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            if _asegurar_listo(db, cache):
+                key = _key(periodo, trivia_id, hoy)
+                total = cache.zcard(key)
+                indice = cache.zrevrank(key, usuario_id)
+                if indice is None:
+                    return None, total, []
+                entradas = _entradas_redis(cache, key, max(indice - vecinos, 0), indice + vecinos)
+                propio = next(e for e in entradas if e["usuario_id"] == usuario_id)
+                return {"posicion": propio["posicion"], "puntaje": propio["puntaje"]}, total, entradas
+        except Exception as e:
+            print(f"Advertencia: ranking de trivia no disponible en redis ({e})")
+    return _posicion_db(db, periodo, trivia_id, hoy, usuario_id, vecinos)
+
+
+def con_usernames(db: Session, entradas: List[Entrada]) -> List[dict]:
+    ids = [e["usuario_id"] for e in entradas]
+    nombres = dict(db.query(User.id, User.username).filter(User.id.in_(ids)).all()) if ids else {}
+    return [{**e, "username": nombres.get(e["usuario_id"])} for e in entradas]
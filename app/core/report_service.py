@@ -1,122 +1,372 @@
+import io
+import mimetypes
+import multiprocessing
 import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+from concurrent.futures import ProcessPoolExecutor
 
 from pathlib import Path
 from datetime import datetime, date
-from typing import List, Optional
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML, CSS
+from typing import Dict, Iterator, List, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
+from weasyprint import HTML, CSS, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+from pypdf import PdfReader, PdfWriter
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
 
-from app.models.tarea import Tarea
+from app.core.config import settings
+from app.core import metricas
 from app.models.user import User
 from app.models import veterinario as models_vet
 from app.models import inventario as models_inv
 from app.crud import veterinario as crud_vet
 from app.crud import transacciones as crud_trans
+from app.crud import reportes as crud_reportes
 
 BASE_DIR = Path(__file__).resolve().parent.parent 
 TEMPLATE_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "templates" / "assets"
 CSS_DIR = BASE_DIR / "templates" / "css"
+#bytecode compilado de las plantillas, sobrevive a reinicios del proceso
+BYTECODE_DIR = Path(tempfile.gettempdir()) / "zooconnect_jinja"
+
+PLANTILLAS = (
+    "operativo/diario.html", "veterinaria/ficha_clinica.html",
+    "veterinaria/dossier_indice.html", "inventario/kardex.html"
+)
+MAX_FICHAS_DOSSIER = 1000 #zip: cada ficha se copia del disco al zip por bloques
+#pdf: pypdf guarda en memoria todo lo que se copia al writer hasta write(), el proceso
+#crece ~1.2 veces el tamaño sumado de las fichas. Los dossiers grandes van en zip
+MAX_FICHAS_DOSSIER_PDF = 250
+_CHUNK = 64 * 1024
+LOGO_URL = (STATIC_DIR / "logo.png").as_uri()
+CSS_PATH = CSS_DIR / "styles.css"
+
+BYTECODE_DIR.mkdir(parents=True, exist_ok=True)
+#auto_reload=False: las plantillas se compilan una vez y no se vuelve a hacer stat en cada render
+env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    bytecode_cache=FileSystemBytecodeCache(str(BYTECODE_DIR)),
+    auto_reload=False
+)
+
+_plantillas: Dict[str, Template] = {}
+_assets: Dict[str, Tuple[bytes, str]] = {} #url file:// -> (contenido, mime)
+_cache_imagenes: dict = {} #imagenes ya decodificadas por weasyprint, compartido entre renders
+#FontConfiguration y el CSS ligado a ella no se comparten entre hilos, uno por hilo del threadpool
+_recursos = threading.local()
+_lock = threading.Lock()
+#procesos para renderizar lotes de pdf en paralelo (weasyprint no suelta el GIL)
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _cargar_assets() -> None:
+    for carpeta in (STATIC_DIR, CSS_DIR):
+        for archivo in carpeta.iterdir():
+            if archivo.is_file():
+                mime = mimetypes.guess_type(archivo.name)[0] or "application/octet-stream"
+                _assets[archivo.resolve().as_uri()] = (archivo.read_bytes(), mime)
+
+
+def _url_fetcher(url: str, *args, **kwargs):
+    """
+    Sirve desde memoria los assets de templates/, el resto va al fetcher de weasyprint
+    """
+    asset = _assets.get(url)
+    if asset is None:
+        return default_url_fetcher(url, *args, **kwargs)
+    contenido, mime = asset
+    return {"string": contenido, "mime_type": mime, "redirected_url": url}
+
+
+def _plantilla(nombre: str) -> Template:
+    plantilla = _plantillas.get(nombre)
+    if plantilla is None:
+        with _lock:
+            plantilla = _plantillas.setdefault(nombre, env.get_template(nombre))
+    return plantilla
+
+
+def _recursos_hilo() -> Tuple[FontConfiguration, CSS]:
+    if getattr(_recursos, "css", None) is None:
+        if not _assets:
+            with _lock:
+                if not _assets:
+                    _cargar_assets()
+        fuentes = FontConfiguration()
+        contenido, _ = _assets[CSS_PATH.resolve().as_uri()]
+        _recursos.fuentes = fuentes
+        _recursos.css = CSS(
+            string=contenido.decode("utf-8"),
+            base_url=CSS_PATH.resolve().as_uri(),
+            font_config=fuentes,
+            url_fetcher=_url_fetcher
+        )
+    return _recursos.fuentes, _recursos.css
+
+
+def _pool_render() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                #spawn: no se hereda el estado de los hilos del servidor
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.REPORTES_PROCESOS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=ReportService.precargar
+                )
+    return _pool
+
+
+def _render_archivo(template_name: str, context: dict, ruta: str) -> str:
+    #en el proceso del pool: el pdf va directo a disco en vez de volver por el pipe
+    with open(ruta, "wb") as archivo:
+        archivo.write(ReportService._render_pdf(template_name, context))
+    return ruta
+
+
+def _leer_y_borrar(ruta: str, carpeta: str) -> Iterator[bytes]:
+    try:
+        with open(ruta, "rb") as archivo:
+            while bloque := archivo.read(_CHUNK):
+                yield bloque
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
 
-env = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
 
 class ReportService:
 
+    @staticmethod
+    def precargar() -> None:
+        """
+        Al iniciar la app: compila las plantillas, carga los assets y hace un
+        render minimo para inicializar fontconfig
+        """
+        for nombre in PLANTILLAS:
+            _plantilla(nombre)
+        fuentes, css = _recursos_hilo()
+        HTML(string="<p>ZooConnect</p>", url_fetcher=_url_fetcher).write_pdf(
+            stylesheets=[css], font_config=fuentes, cache=_cache_imagenes
+        )
+
+    @staticmethod
+    def cerrar() -> None:
+        global _pool
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
     @staticmethod
     def _render_pdf(template_name: str, context: dict) -> bytes:
-        context["logo_path"] = f"file://{STATIC_DIR}/logo.png"
-        context["css_path"] = f"file://{CSS_DIR}/styles.css"
+        context["logo_path"] = LOGO_URL
         context["fecha_generacion"] = datetime.now().strftime("%d/%m/%Y %H:%M")
         context["empresa"] = "ZooConnect"
 
-        template = env.get_template(template_name)
-        html_string = template.render(context)
+        inicio = time.perf_counter()
+        html_string = _plantilla(template_name).render(context)
 
-        pdf_bytes = HTML(string=html_string, base_url=str(BASE_DIR)).write_pdf()
+        #la hoja de estilos va ya parseada, base.html no la enlaza si no hay css_path
+        fuentes, css = _recursos_hilo()
+        pdf_bytes = HTML(string=html_string, base_url=str(BASE_DIR), url_fetcher=_url_fetcher).write_pdf(
+            stylesheets=[css],
+            font_config=fuentes,
+            cache=_cache_imagenes
+        )
+        metricas.REPORTE_RENDER.labels(template_name).observe(time.perf_counter() - inicio)
         
         return pdf_bytes
 
 
+    @classmethod
+    def _render_lote(cls, template_name: str, contextos: Dict[str, dict]) -> bytes:
+        """
+        Un zip con un pdf por contexto (nombre de archivo -> contexto)
+        """
+        if len(contextos) > 1 and settings.REPORTES_PROCESOS > 1:
+            pool = _pool_render()
+            futuros = {
+                nombre: pool.submit(cls._render_pdf, template_name, contexto)
+                for nombre, contexto in contextos.items()
+            }
+            pdfs = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+        else:
+            pdfs = {nombre: cls._render_pdf(template_name, contexto) for nombre, contexto in contextos.items()}
+
+        buffer = io.BytesIO()
+        #los pdf ya van comprimidos
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archivo:
+            for nombre, pdf in pdfs.items():
+                archivo.writestr(nombre, pdf)
+        return buffer.getvalue()
+
+    @classmethod
+    def _render_a_disco(cls, template_name: str, trabajos: Dict[str, dict]) -> None:
+        """
+        Renderiza cada contexto al archivo indicado (ruta -> contexto)
+        """
+        if len(trabajos) > 1 and settings.REPORTES_PROCESOS > 1:
+            pool = _pool_render()
+            futuros = [pool.submit(_render_archivo, template_name, contexto, ruta) for ruta, contexto in trabajos.items()]
+            for futuro in futuros:
+                futuro.result()
+        else:
+            for ruta, contexto in trabajos.items():
+                _render_archivo(template_name, contexto, ruta)
+
+    @staticmethod
+    def _contexto_diario(datos: dict, usuario_solicitante: User) -> dict:
+        return {
+            **datos,
+            "fecha_reporte": datos["fecha"].strftime("%d/%m/%Y"),
+            "usuario_generador": usuario_solicitante.email
+        }
+
     @classmethod
     def generate_diario_operativo(cls, db: Session, fecha: date, usuario_solicitante: User) -> bytes:
         
-        tareas = db.query(Tarea).filter(Tarea.fecha_programada == fecha).all()
+        datos = crud_reportes.get_diarios(db, fecha, fecha)[(fecha, None)]
+        return cls._render_pdf("operativo/diario.html", cls._contexto_diario(datos, usuario_solicitante))
 
-        total = len(tareas)
-        completadas = sum(1 for t in tareas if t.is_completed)
-        pendientes = total - completadas
+    @classmethod
+    def generate_diarios_zip(
+        cls,
+        db: Session,
+        fecha_desde: date,
+        fecha_hasta: date,
+        usuario_solicitante: User,
+        usuario_asignado_id: Optional[int] = None,
+        por_cuidador: bool = False
+    ) -> bytes:
         
-        alertas = [t for t in tareas if not t.is_completed and not t.usuario_asignado_id]
-
-        tareas_data = []
-        for t in tareas:
-            estado_str = "Completada" if t.is_completed else "Pendiente"
-            asignado = t.usuario_asignado.email if t.usuario_asignado else "SIN ASIGNAR"
-            ubicacion = f"{t.habitat.nombre_habitat}" if t.habitat else (t.animal.nombre_animal if t.animal else "General")
-
-            tareas_data.append({
-                "hora": "08:00",
-                "descripcion": t.titulo,
-                "zona": ubicacion,
-                "asignado_a": asignado,
-                "estado": estado_str
+        diarios = crud_reportes.get_diarios(db, fecha_desde, fecha_hasta, usuario_asignado_id, por_cuidador)
+
+        contextos = {}
+        for (fecha, usuario_id), datos in diarios.items():
+            nombre = f"Diario_Operativo_{fecha.strftime('%Y%m%d')}"
+            if por_cuidador:
+                nombre += f"_{usuario_id}" if usuario_id else "_sin_asignar"
+            contextos[f"{nombre}.pdf"] = cls._contexto_diario(datos, usuario_solicitante)
+
+        return cls._render_lote("operativo/diario.html", contextos)
+
+
+    @classmethod
+    def generate_dossier_clinico(
+        cls,
+        db: Session,
+        usuario_solicitante: User,
+        formato: str = "pdf",
+        animal_id: Optional[int] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None
+    ) -> Optional[Iterator[bytes]]:
+        """
+        Todas las fichas de un animal y/o periodo. Cada ficha se renderiza a un
+        temporal en el pool y la salida (un pdf con indice o un zip) se arma en
+        disco y se entrega por bloques. None si no hay historiales
+        """
+        maximo = MAX_FICHAS_DOSSIER_PDF if formato == "pdf" else MAX_FICHAS_DOSSIER
+        fichas = crud_vet.get_fichas_clinicas_context(
+            db, animal_id, fecha_desde, fecha_hasta, limite=maximo + 1
+        )
+        if not fichas:
+            return None
+        if len(fichas) > maximo:
+            if formato == "pdf":
+                raise ValueError(
+                    f"El dossier en pdf no puede superar {maximo} historiales, "
+                    f"use formato zip (hasta {MAX_FICHAS_DOSSIER})"
+                )
+            raise ValueError(f"El dossier no puede superar {maximo} historiales")
+
+        carpeta = tempfile.mkdtemp(prefix="dossier_")
+        try:
+            rutas = [os.path.join(carpeta, f"Historia_Clinica_{f['historial']['id']}.pdf") for f in fichas]
+            cls._render_a_disco("veterinaria/ficha_clinica.html", {
+                ruta: {**ficha, "usuario_generador": usuario_solicitante.email}
+                for ruta, ficha in zip(rutas, fichas)
             })
 
-        context = {
-            "usuario_generador": usuario_solicitante.email,
-            "tareas_total": total,
-            "tareas_completadas": completadas,
-            "tareas_pendientes": pendientes,
-            "alertas_tareas": alertas,
-            "tareas": tareas_data
-        }
+            salida = os.path.join(carpeta, f"dossier.{formato}")
+            if formato == "zip":
+                with zipfile.ZipFile(salida, "w", zipfile.ZIP_STORED) as archivo:
+                    for ruta in rutas:
+                        archivo.write(ruta, os.path.basename(ruta))
+            else:
+                periodo = None
+                if fecha_desde or fecha_hasta:
+                    periodo = f"{fecha_desde.strftime('%d/%m/%Y') if fecha_desde else '...'} - " \
+                              f"{fecha_hasta.strftime('%d/%m/%Y') if fecha_hasta else '...'}"
+                cls._unir_dossier(fichas, rutas, salida, {
+                    "usuario_generador": usuario_solicitante.email,
+                    "paciente": fichas[0]["animal"]["nombre"] if animal_id else None,
+                    "periodo": periodo
+                })
+        except Exception:
+            shutil.rmtree(carpeta, ignore_errors=True)
+            raise
+
+        return _leer_y_borrar(salida, carpeta)
+
+    @classmethod
+    def _unir_dossier(cls, fichas: List[dict], rutas: List[str], salida: str, context: dict) -> None:
+        """
+        Indice + fichas en un solo pdf con marcadores. Cada ficha se abre solo mientras
+        se cuentan sus paginas y mientras se copia: pypdf copia las paginas al writer en
+        append, asi que no hay cientos de archivos abiertos a la vez. Ese writer si tiene
+        todo el dossier en memoria hasta write() (por eso MAX_FICHAS_DOSSIER_PDF)
+        """
+        paginas_fichas = []
+        for ruta in rutas:
+            with open(ruta, "rb") as archivo:
+                paginas_fichas.append(len(PdfReader(archivo).pages))
+
+        #el numero de pagina de cada ficha depende de cuantas paginas ocupe el indice
+        paginas_indice = 1
+        while True:
+            entradas, pagina = [], paginas_indice + 1
+            for ficha, paginas in zip(fichas, paginas_fichas):
+                entradas.append({
+                    "id": ficha["historial"]["id"],
+                    "fecha": ficha["historial"]["fecha"],
+                    "paciente": ficha["animal"]["nombre"],
+                    "diagnostico": ficha["historial"]["diagnostico_definitivo"]
+                                   or ficha["historial"]["diagnostico_presuntivo"] or "Pendiente",
+                    "pagina": pagina
+                })
+                pagina += paginas
+            indice = PdfReader(io.BytesIO(
+                cls._render_pdf("veterinaria/dossier_indice.html", {**context, "entradas": entradas})
+            ))
+            if len(indice.pages) == paginas_indice:
+                break
+            paginas_indice = len(indice.pages)
+
+        writer = PdfWriter()
+        writer.append(indice, outline_item="Indice")
+        for entrada, ruta in zip(entradas, rutas):
+            with open(ruta, "rb") as archivo:
+                writer.append(PdfReader(archivo), outline_item=f"#{entrada['id']} - {entrada['fecha']} - {entrada['paciente']}")
+        with open(salida, "wb") as archivo:
+            writer.write(archivo)
 
-        return cls._render_pdf("operativo/diario.html", context)
 
     @classmethod
     def generate_ficha_clinica(cls, db: Session, historial_id: int, usuario_solicitante: User) -> bytes:
         
-        historial = crud_vet.get_historial(db, historial_id)
-        if not historial:
+        #los historiales cerrados salen del snapshot, sin cargar el historial completo
+        context = crud_vet.get_ficha_clinica_context(db, historial_id)
+        if not context:
             raise ValueError("Historial no encontrado")
 
-        animal = historial.animal
-        
-        recetas_data = []
-        for r in historial.recetas:
-            recetas_data.append({
-                "producto": r.producto.nombre_producto,
-                "dosis": r.dosis,
-                "unidad": r.unidad_medida.abreviatura if r.unidad_medida else "u",
-                "frecuencia": r.frecuencia,
-                "duracion": r.duracion_dias
-            })
-
-        context = {
-            "usuario_generador": usuario_solicitante.email,
-            "historial": {
-                "id": historial.id_historial,
-                "fecha": historial.fecha_atencion.strftime("%d/%m/%Y"),
-                "veterinario": historial.veterinario.email,
-                "anamnesis": historial.anamnesis,
-                "peso": historial.peso_actual,
-                "temperatura": historial.temperatura,
-                "fc": historial.frecuencia_cardiaca,
-                "fr": historial.frecuencia_respiratoria,
-                "observaciones_fisicas": historial.examen_fisico_obs,
-                "diagnostico_presuntivo": historial.diagnostico_presuntivo,
-                "diagnostico_definitivo": historial.diagnostico_definitivo
-            },
-            "animal": {
-                "nombre": animal.nombre_animal,
-                "especie": animal.especie.nombre_especie,
-                "sexo": "Macho" if animal.genero else "Hembra",
-                "edad": f"{animal.age} años" if animal.age else "Desc."
-            },
-            "recetas": recetas_data
-        }
+        context["usuario_generador"] = usuario_solicitante.email
 
         return cls._render_pdf("veterinaria/ficha_clinica.html", context)
 
@@ -1,17 +1,32 @@
+import time
 import redis
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.core.config import settings
-from app.core.scheduler_jobs import generar_tareas_diarias
+from app.core import metricas
+from app.core.scheduler_jobs import generar_tareas_diarias, calcular_proyeccion_stock, calcular_pronostico_consumo, generar_snapshot_stock, calcular_caducidades, calcular_signos_vitales, calcular_apetito, procesar_media_pendiente, volcar_conteos_encuestas, reconciliar_conteos_encuestas, reconstruir_rankings_trivia, reconstruir_tendencias
 
 SCHEDULER_LOCK_KEY = "scheduler:generar_tareas_diarias_lock"
+PROYECCION_STOCK_LOCK_KEY = "scheduler:proyeccion_stock_lock"
+PRONOSTICO_CONSUMO_LOCK_KEY = "scheduler:pronostico_consumo_lock"
+SNAPSHOT_STOCK_LOCK_KEY = "scheduler:snapshot_stock_lock"
+CADUCIDADES_LOCK_KEY = "scheduler:caducidades_lock"
+SIGNOS_VITALES_LOCK_KEY = "scheduler:signos_vitales_lock"
+APETITO_LOCK_KEY = "scheduler:apetito_lock"
+MEDIA_LOCK_KEY = "scheduler:media_ingesta_lock"
+CONTEOS_ENCUESTAS_LOCK_KEY = "scheduler:conteos_encuestas_lock"
+RANKING_TRIVIA_LOCK_KEY = "scheduler:ranking_trivia_lock"
+TENDENCIAS_LOCK_KEY = "scheduler:tendencias_lock"
 LOCK_TIMEOUT_SECONDS = 60 * 10
 
 scheduler = BackgroundScheduler(timezone=settings.TIMEZONE)
 
-def job_wrapper_generar_tareas():
+def _ejecutar_con_bloqueo(lock_key: str, job, nombre: str):
+    """
+    Ejecuta el job solo en el worker que consiga el bloqueo en redis
+    """
     redis_client = None
     lock = None
-    
+
     try:
         #Conectar con redis
         redis_client = redis.Redis(
@@ -19,25 +34,33 @@ def job_wrapper_generar_tareas():
             port=settings.REDIS_PORT,
             db=settings.REDIS_DB,
             decode_responses=True
-        )        
+        )
+
+        lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT_SECONDS)
 
-        lock = redis_client.lock(SCHEDULER_LOCK_KEY, timeout=LOCK_TIMEOUT_SECONDS)
-        
         have_lock = lock.acquire(blocking=False)
-        
+
         if have_lock:
-            print("[Scheduler] Ejecutando generacion de tareas...")
+            print(f"[Scheduler] Ejecutando {nombre}...")
+            inicio = time.perf_counter()
+            resultado = "ok"
             try:
-                generar_tareas_diarias()
+                job()
+            except Exception:
+                #el job ya registro el error
+                resultado = "error"
             finally:
+                metricas.JOB_DURACION.labels(nombre).observe(time.perf_counter() - inicio)
+                metricas.JOB_EJECUCIONES.labels(nombre, resultado).inc()
                 try:
                     lock.release()
                     print("Bloqueo liberado")
                 except redis.exceptions.LockError:
                     print("No se pudo liberar el bloqueo")
         else:
+            metricas.JOB_EJECUCIONES.labels(nombre, "omitido").inc()
             print("Bloqueo ocupado. Otro worker esta trabajando sin descanso")
-            
+
     except redis.ConnectionError:
         print("[Scheduler] Error: No se pudo conectar a Redis")
     except Exception as e:
@@ -46,6 +69,43 @@ def job_wrapper_generar_tareas():
         if redis_client:
             redis_client.close()
 
+def job_wrapper_generar_tareas():
+    _ejecutar_con_bloqueo(SCHEDULER_LOCK_KEY, generar_tareas_diarias, "generacion de tareas")
+
+def job_wrapper_proyeccion_stock():
+    _ejecutar_con_bloqueo(PROYECCION_STOCK_LOCK_KEY, calcular_proyeccion_stock, "proyeccion de stock")
+
+def job_wrapper_pronostico_consumo():
+    _ejecutar_con_bloqueo(PRONOSTICO_CONSUMO_LOCK_KEY, calcular_pronostico_consumo, "pronostico de consumo")
+
+def job_wrapper_snapshot_stock():
+    _ejecutar_con_bloqueo(SNAPSHOT_STOCK_LOCK_KEY, generar_snapshot_stock, "snapshot de stock")
+
+def job_wrapper_caducidades():
+    _ejecutar_con_bloqueo(CADUCIDADES_LOCK_KEY, calcular_caducidades, "alertas de caducidad")
+
+def job_wrapper_signos_vitales():
+    _ejecutar_con_bloqueo(SIGNOS_VITALES_LOCK_KEY, calcular_signos_vitales, "signos vitales")
+
+def job_wrapper_apetito():
+    _ejecutar_con_bloqueo(APETITO_LOCK_KEY, calcular_apetito, "analisis de apetito")
+
+def job_wrapper_media():
+    _ejecutar_con_bloqueo(MEDIA_LOCK_KEY, procesar_media_pendiente, "ingestas de media pendientes")
+
+def job_wrapper_volcar_conteos():
+    _ejecutar_con_bloqueo(CONTEOS_ENCUESTAS_LOCK_KEY, volcar_conteos_encuestas, "volcado de conteos de encuestas")
+
+def job_wrapper_reconciliar_conteos():
+    #mismo bloqueo: no volcar mientras se reescriben los conteos
+    _ejecutar_con_bloqueo(CONTEOS_ENCUESTAS_LOCK_KEY, reconciliar_conteos_encuestas, "reconciliacion de conteos de encuestas")
+
+def job_wrapper_ranking_trivia():
+    _ejecutar_con_bloqueo(RANKING_TRIVIA_LOCK_KEY, reconstruir_rankings_trivia, "reconstruccion de rankings de trivia")
+
+def job_wrapper_tendencias():
+    _ejecutar_con_bloqueo(TENDENCIAS_LOCK_KEY, reconstruir_tendencias, "reconstruccion de tendencias")
+
 def setup_scheduler():
     print("Configurando APScheduler...")
 
@@ -59,6 +119,116 @@ def setup_scheduler():
         replace_existing=True
     )
 
+    scheduler.add_job(
+        job_wrapper_proyeccion_stock,
+        trigger="cron",
+        hour=2,
+        minute=0,
+        id="job_proyeccion_stock",
+        name="Proyeccion de stock segun dietas",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_pronostico_consumo,
+        trigger="cron",
+        hour=1,
+        minute=30,
+        id="job_pronostico_consumo",
+        name="Pronostico de consumo y puntos de reorden",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_snapshot_stock,
+        trigger="cron",
+        hour=0,
+        minute=5,
+        id="job_snapshot_stock",
+        name="Snapshot diario de stock",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_caducidades,
+        trigger="cron",
+        hour=0,
+        minute=15,
+        id="job_caducidades",
+        name="Alertas de lotes por vencer",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_signos_vitales,
+        trigger="cron",
+        hour=3,
+        minute=0,
+        id="job_signos_vitales",
+        name="Resumen y anomalias de signos vitales",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_apetito,
+        trigger="cron",
+        hour=3,
+        minute=15,
+        id="job_apetito",
+        name="Alertas de apetito por animal",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_media,
+        trigger="interval",
+        minutes=1,
+        id="job_media_ingesta",
+        name="Reintento de ingestas de media",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_volcar_conteos,
+        trigger="interval",
+        minutes=1,
+        id="job_volcar_conteos_encuestas",
+        name="Volcado de conteos de encuestas",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_reconciliar_conteos,
+        trigger="cron",
+        minute=45,
+        id="job_reconciliar_conteos_encuestas",
+        name="Reconciliacion de conteos de encuestas",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_ranking_trivia,
+        trigger="cron",
+        hour=3,
+        minute=30,
+        id="job_ranking_trivia",
+        name="Reconstruccion de rankings de trivia",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        job_wrapper_tendencias,
+        trigger="cron",
+        minute=20,
+        id="job_tendencias",
+        name="Reconstruccion de animales en tendencia",
+        replace_existing=True
+    )
+
     if not scheduler.running:
         scheduler.start()
-        print("APScheduler iniciado en segundo plano")
\ No newline at end of file
+        print("APScheduler iniciado en segundo plano")
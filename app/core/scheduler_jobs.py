@@ -1,8 +1,19 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
 from croniter import croniter
 from app.db.session import SessionLocal
 from app.models.tarea import TareaRecurrente, Tarea
+from app.core.plan_demanda import calcular_plan, guardar_plan
+from app.core.pronostico_consumo import calcular_pronosticos
+from app.crud.stock_historico import generar_snapshots
+from app.crud.inventario import calcular_alertas_caducidad
+from app.core.signos_vitales import calcular_resumenes
+from app.core.apetito import calcular_resumenes_apetito
+from app.core.media_ingesta import barrer_pendientes
+from app.core import encuesta_conteo
+from app.core.ranking_trivia import reconstruir as reconstruir_ranking
+from app.core import tendencias
 
 def generar_tareas_diarias():
 
@@ -11,10 +22,20 @@ def generar_tareas_diarias():
 
     try:
         today = date.today()
+
+        #desactivar en bloque las plantillas cuyo tratamiento ya termino
+        vencidas = db.query(TareaRecurrente).filter(
+            TareaRecurrente.is_active == True,
+            TareaRecurrente.fecha_fin < today
+        ).update({TareaRecurrente.is_active: False}, synchronize_session=False)
+        db.commit()
+        if vencidas:
+            print(f" - Plantillas vencidas desactivadas: {vencidas}")
         
-        #obtener plantillas activas
+        #obtener plantillas activas dentro de su ventana
         plantillas = db.query(TareaRecurrente).filter(
-            TareaRecurrente.is_active == True
+            TareaRecurrente.is_active == True,
+            or_(TareaRecurrente.fecha_inicio == None, TareaRecurrente.fecha_inicio <= today)
         ).all()
 
         tareas_creadas_count = 0
@@ -68,6 +89,204 @@ def generar_tareas_diarias():
 
     except Exception as e:
         print(f" ERROR El job 'generar_tareas_diarias' fallo a nivel general: {e}")
+        raise
     
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def calcular_proyeccion_stock():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'calcular_proyeccion_stock'...")
+
+    try:
+        plan = calcular_plan(db)
+        guardados = guardar_plan(db, plan)
+        print(f"Job completado. Productos proyectados: {guardados}. Detalles sin conversion: {len(plan['detalles_sin_conversion'])}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'calcular_proyeccion_stock' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def calcular_pronostico_consumo():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'calcular_pronostico_consumo'...")
+
+    try:
+        #los domingos se recalcula todo para que decaiga el pronostico de lo que no se movio
+        completo = date.today().weekday() == 6
+        actualizados = calcular_pronosticos(db, completo=completo)
+        print(f"Job completado. Productos actualizados: {actualizados} ({'completo' if completo else 'incremental'})")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'calcular_pronostico_consumo' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def generar_snapshot_stock():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'generar_snapshot_stock'...")
+
+    try:
+        dias = generar_snapshots(db)
+        print(f"Job completado. Dias fotografiados: {dias}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'generar_snapshot_stock' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def calcular_caducidades():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'calcular_caducidades'...")
+
+    try:
+        productos = calcular_alertas_caducidad(db)
+        print(f"Job completado. Productos con lotes por vencer: {productos}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'calcular_caducidades' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def calcular_signos_vitales():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'calcular_signos_vitales'...")
+
+    try:
+        animales = calcular_resumenes(db)
+        print(f"Job completado. Animales evaluados: {animales}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'calcular_signos_vitales' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def calcular_apetito():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'calcular_apetito'...")
+
+    try:
+        animales = calcular_resumenes_apetito(db)
+        print(f"Job completado. Animales evaluados: {animales}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'calcular_apetito' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def procesar_media_pendiente():
+
+    print(f"[{datetime.now()}] Iniciando job: 'procesar_media_pendiente'...")
+
+    try:
+        #cada ingesta abre su propia sesion
+        procesadas = barrer_pendientes()
+        if procesadas:
+            print(f"Job completado. Ingestas procesadas: {procesadas}")
+
+    except Exception as e:
+        print(f" ERROR El job 'procesar_media_pendiente' fallo a nivel general: {e}")
+        raise
+
+
+def volcar_conteos_encuestas():
+
+    db: Session = SessionLocal()
+
+    try:
+        encuestas = encuesta_conteo.volcar(db)
+        if encuestas:
+            print(f"[{datetime.now()}] Conteos de encuestas volcados: {encuestas}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'volcar_conteos_encuestas' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def reconciliar_conteos_encuestas():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'reconciliar_conteos_encuestas'...")
+
+    try:
+        encuestas = encuesta_conteo.reconciliar(db)
+        print(f"Job completado. Encuestas reconciliadas: {len(encuestas)}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'reconciliar_conteos_encuestas' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def reconstruir_rankings_trivia():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'reconstruir_rankings_trivia'...")
+
+    try:
+        trivias = reconstruir_ranking(db)
+        print(f"Job completado. Trivias con ranking: {trivias}")
+
+    except Exception as e:
+        print(f" ERROR El job 'reconstruir_rankings_trivia' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
+
+
+def reconstruir_tendencias():
+
+    db: Session = SessionLocal()
+    print(f"[{datetime.now()}] Iniciando job: 'reconstruir_tendencias'...")
+
+    try:
+        corregidos = tendencias.reparar_contadores(db)
+        animales = tendencias.reconstruir(db)
+        print(f"Job completado. Animales en tendencia: {animales}, contadores corregidos: {corregidos}")
+
+    except Exception as e:
+        db.rollback()
+        print(f" ERROR El job 'reconstruir_tendencias' fallo a nivel general: {e}")
+        raise
+
+    finally:
+        db.close()
@@ -0,0 +1,191 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import delete, insert, func
+from sqlalchemy.orm import Session
+
+from app.models.animal import Animal
+from app.models.veterinario import HistorialMedico, ResumenSignosVitales
+
+VENTANA = 10 #ultimas mediciones por animal
+MIN_MEDICIONES = 3
+UMBRAL_Z = 3.0
+UMBRAL_PENDIENTE_PESO = 10.0 #% cada 30 dias
+_EPS = 1e-9
+_Z_MAX = 9999.0 #cabe en Numeric(8, 2)
+
+METRICAS = ("peso", "temperatura", "frecuencia_cardiaca", "frecuencia_respiratoria")
+#el peso varia demasiado por edad y sexo dentro de la especie, no se compara contra ella
+METRICAS_ESPECIE = ("temperatura", "frecuencia_cardiaca", "frecuencia_respiratoria")
+COLUMNAS = {
+    "peso": HistorialMedico.peso_actual,
+    "temperatura": HistorialMedico.temperatura,
+    "frecuencia_cardiaca": HistorialMedico.frecuencia_cardiaca,
+    "frecuencia_respiratoria": HistorialMedico.frecuencia_respiratoria,
+}
+
+
+def _cargar_series(db: Session):
+    """
+    Ultimas VENTANA atenciones de cada animal activo en matrices (animales x VENTANA),
+    la medicion mas reciente en la ultima columna y NaN donde no hay dato
+    """
+    #solo las ultimas VENTANA atenciones de cada animal (recorre el indice animal_id, fecha_atencion)
+    orden = func.row_number().over(
+        partition_by=HistorialMedico.animal_id, order_by=HistorialMedico.fecha_atencion.desc()
+    ).label("orden")
+    recientes = db.query(
+        HistorialMedico.animal_id, HistorialMedico.fecha_atencion, *COLUMNAS.values(), orden
+    ).subquery()
+
+    filas = db.query(
+        recientes.c.animal_id, Animal.especie_id, recientes.c.fecha_atencion,
+        *[recientes.c[c.key] for c in COLUMNAS.values()]
+    ).join(Animal, recientes.c.animal_id == Animal.id_animal)\
+     .filter(Animal.is_active == True, recientes.c.orden <= VENTANA)\
+     .order_by(recientes.c.animal_id, recientes.c.fecha_atencion.desc())\
+     .all()
+
+    animales: List[int] = []
+    especies: List[int] = []
+    ultima: Dict[int, datetime] = {}
+    posicion: Dict[int, int] = {}
+    seleccion = []
+
+    for f in filas:
+        if f.animal_id not in posicion:
+            posicion[f.animal_id] = 0
+            animales.append(f.animal_id)
+            especies.append(f.especie_id)
+            ultima[f.animal_id] = f.fecha_atencion
+        if posicion[f.animal_id] < VENTANA:
+            seleccion.append((len(animales) - 1, VENTANA - 1 - posicion[f.animal_id], f))
+            posicion[f.animal_id] += 1
+
+    a = len(animales)
+    series = {m: np.full((a, VENTANA), np.nan) for m in METRICAS}
+    dias = np.full((a, VENTANA), np.nan)
+    for i, j, f in seleccion:
+        dias[i, j] = f.fecha_atencion.timestamp() / 86400
+        for m, valor in zip(METRICAS, f[3:]):
+            if valor is not None:
+                series[m][i, j] = float(valor)
+
+    return animales, np.array(especies, dtype=np.int64), ultima, series, dias
+
+
+def _z_propio(serie: np.ndarray) -> np.ndarray:
+    """
+    z de la ultima medicion contra las anteriores del mismo animal
+    """
+    previas = serie[:, :-1]
+    n = np.sum(~np.isnan(previas), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(n > 0, np.nansum(previas, axis=1) / np.maximum(n, 1), np.nan)
+        var = np.nansum((previas - media[:, None]) ** 2, axis=1) / np.maximum(n - 1, 1)
+        std = np.sqrt(var)
+        z = (serie[:, -1] - media) / std
+    return np.where((n >= MIN_MEDICIONES - 1) & (std > _EPS), np.clip(z, -_Z_MAX, _Z_MAX), np.nan)
+
+
+def _z_especie(serie: np.ndarray, especies: np.ndarray) -> np.ndarray:
+    """
+    z de la ultima medicion contra todas las mediciones de la especie (bincount por especie)
+    """
+    if len(especies) == 0:
+        return np.array([])
+    _, grupo = np.unique(especies, return_inverse=True)
+    valido = ~np.isnan(serie)
+    grupo_m = np.broadcast_to(grupo[:, None], serie.shape)[valido]
+    valores = serie[valido]
+    g = grupo.max() + 1
+
+    n = np.bincount(grupo_m, minlength=g)
+    suma = np.bincount(grupo_m, weights=valores, minlength=g)
+    suma2 = np.bincount(grupo_m, weights=valores ** 2, minlength=g)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma / n
+        std = np.sqrt(np.maximum(suma2 / n - media ** 2, 0) * n / np.maximum(n - 1, 1))
+        z = (serie[:, -1] - media[grupo]) / std[grupo]
+    return np.where((n[grupo] >= MIN_MEDICIONES) & (std[grupo] > _EPS), np.clip(z, -_Z_MAX, _Z_MAX), np.nan)
+
+
+def _pendiente_peso(peso: np.ndarray, dias: np.ndarray) -> np.ndarray:
+    """
+    Pendiente por minimos cuadrados del peso (en % del peso medio cada 30 dias)
+    """
+    valido = ~np.isnan(peso) & ~np.isnan(dias)
+    n = valido.sum(axis=1)
+    t = np.where(valido, dias, 0)
+    y = np.where(valido, peso, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_media = t.sum(axis=1) / n
+        y_media = y.sum(axis=1) / n
+        dt = np.where(valido, dias - t_media[:, None], 0)
+        dy = np.where(valido, peso - y_media[:, None], 0)
+        den = (dt ** 2).sum(axis=1)
+        pendiente = (dt * dy).sum(axis=1) / den
+        relativa = pendiente * 30 / y_media * 100
+    return np.where((n >= MIN_MEDICIONES) & (den > _EPS) & (y_media > _EPS), np.clip(relativa, -_Z_MAX, _Z_MAX), np.nan)
+
+
+def _num(valor, decimales=2):
+    return None if valor is None or np.isnan(valor) else round(float(valor), decimales)
+
+
+def calcular_resumenes(db: Session) -> int:
+    animales, especies, ultima, series, dias = _cargar_series(db)
+    if not animales:
+        db.execute(delete(ResumenSignosVitales))
+        db.commit()
+        return 0
+
+    z = {m: _z_propio(series[m]) for m in METRICAS}
+    z_esp = {m: _z_especie(series[m], especies) for m in METRICAS_ESPECIE}
+    pendiente = _pendiente_peso(series["peso"], dias)
+
+    todas_z = np.column_stack([np.abs(v) for v in list(z.values()) + list(z_esp.values())])
+    with np.errstate(invalid="ignore"):
+        severidad = np.nan_to_num(np.nanmax(np.where(np.isnan(todas_z), -np.inf, todas_z), axis=1), neginf=0)
+    alerta = (severidad >= UMBRAL_Z) | (np.nan_to_num(np.abs(pendiente)) >= UMBRAL_PENDIENTE_PESO)
+
+    ahora = datetime.now(timezone.utc)
+    filas = []
+    for i, animal_id in enumerate(animales):
+        motivos = []
+        for m in METRICAS:
+            if not np.isnan(z[m][i]) and abs(z[m][i]) >= UMBRAL_Z:
+                motivos.append(f"{m} fuera de lo habitual del animal (z={z[m][i]:.1f})")
+        for m in METRICAS_ESPECIE:
+            if not np.isnan(z_esp[m][i]) and abs(z_esp[m][i]) >= UMBRAL_Z:
+                motivos.append(f"{m} fuera de lo habitual de la especie (z={z_esp[m][i]:.1f})")
+        if not np.isnan(pendiente[i]) and abs(pendiente[i]) >= UMBRAL_PENDIENTE_PESO:
+            motivos.append(f"peso {'sube' if pendiente[i] > 0 else 'baja'} {abs(pendiente[i]):.1f}% cada 30 dias")
+
+        filas.append({
+            "animal_id": animal_id,
+            "fecha_calculo": ahora,
+            "ultima_atencion": ultima[animal_id],
+            "mediciones": int(np.sum(~np.isnan(dias[i]))),
+            "peso": _num(series["peso"][i, -1]),
+            "temperatura": _num(series["temperatura"][i, -1]),
+            "frecuencia_cardiaca": None if np.isnan(series["frecuencia_cardiaca"][i, -1]) else int(series["frecuencia_cardiaca"][i, -1]),
+            "frecuencia_respiratoria": None if np.isnan(series["frecuencia_respiratoria"][i, -1]) else int(series["frecuencia_respiratoria"][i, -1]),
+            "z_peso": _num(z["peso"][i]),
+            "z_temperatura": _num(z["temperatura"][i]),
+            "z_frecuencia_cardiaca": _num(z["frecuencia_cardiaca"][i]),
+            "z_frecuencia_respiratoria": _num(z["frecuencia_respiratoria"][i]),
+            "z_especie_temperatura": _num(z_esp["temperatura"][i]),
+            "z_especie_frecuencia_cardiaca": _num(z_esp["frecuencia_cardiaca"][i]),
+            "z_especie_frecuencia_respiratoria": _num(z_esp["frecuencia_respiratoria"][i]),
+            "pendiente_peso_30d": _num(pendiente[i]),
+            "alerta": bool(alerta[i]),
+            "severidad": round(float(severidad[i]), 2),
+            "motivos": "; ".join(motivos) or None,
+        })
+
+    db.execute(delete(ResumenSignosVitales))
+    db.execute(insert(ResumenSignosVitales), filas)
+    db.commit()
+    return len(filas)
@@ -0,0 +1,83 @@
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+import cloudinary.uploader
+
+from app.core.config import settings
+from app.core import uploader #al importarlo configura cloudinary
+
+
+class StorageBackend:
+    """
+    Destino final de los archivos de media. subir() devuelve secure_url y public_id
+    igual que cloudinary para que el resto del codigo no dependa del backend
+    """
+
+    def subir(self, ruta: Path, carpeta: str, resource_type: str = "auto") -> Dict:
+        raise NotImplementedError
+
+    def eliminar(self, public_id: str) -> None:
+        raise NotImplementedError
+
+
+class CloudinaryStorage(StorageBackend):
+
+    def subir(self, ruta: Path, carpeta: str, resource_type: str = "auto") -> Dict:
+        resultado = cloudinary.uploader.upload(
+            str(ruta),
+            folder=f"zooconnect/{carpeta.strip('/')}",
+            resource_type=resource_type
+        )
+        return {"secure_url": resultado.get("secure_url"), "public_id": resultado.get("public_id")}
+
+    def eliminar(self, public_id: str) -> None:
+        uploader.delete_from_cloudinary(public_id)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Guarda bajo settings.MEDIA_DIR y sirve desde settings.MEDIA_URL (desarrollo y pruebas)
+    """
+
+    def __init__(self, base: Optional[str] = None, url: Optional[str] = None):
+        self.base = Path(base or settings.MEDIA_DIR)
+        self.url = (url or settings.MEDIA_URL).rstrip("/")
+
+    def subir(self, ruta: Path, carpeta: str, resource_type: str = "auto") -> Dict:
+        carpeta = carpeta.strip("/")
+        destino = self.base / carpeta
+        destino.mkdir(parents=True, exist_ok=True)
+        nombre = f"{uuid.uuid4().hex}{ruta.suffix.lower()}"
+        shutil.copyfile(ruta, destino / nombre)
+        public_id = f"{carpeta}/{nombre}"
+        return {"secure_url": f"{self.url}/{public_id}", "public_id": public_id}
+
+    def eliminar(self, public_id: str) -> None:
+        ruta = (self.base / public_id).resolve()
+        #no borrar nada fuera de MEDIA_DIR
+        if self.base.resolve() not in ruta.parents:
+            print(f"Advertencia: public_id fuera de MEDIA_DIR ignorado: {public_id}")
+            return
+        try:
+            ruta.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Error al eliminar archivo local {public_id}: {e}")
+
+
+_BACKENDS = {
+    "cloudinary": CloudinaryStorage,
+    "local": LocalStorage,
+}
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        backend = _BACKENDS.get(settings.MEDIA_STORAGE_BACKEND)
+        if backend is None:
+            raise ValueError(f"MEDIA_STORAGE_BACKEND no soportado: {settings.MEDIA_STORAGE_BACKEND}")
+        _storage = backend()
+    return _storage
@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.models.animal import Animal, AnimalFavorito
+
+# animal -> puntaje de tendencia con decaimiento hacia adelante: cada favorito suma
+# 2^((t - t0) / vida_media), asi el orden es el del puntaje decaido sin reescribir nada
+TENDENCIA_KEY = "animales:tendencia"
+# epoch (segundos) de referencia de los pesos, se mueve en cada reconstruccion
+T0_KEY = "animales:tendencia:t0"
+VIDAS_MEDIAS_VENTANA = 10 #mas atras el aporte es menor a 0.1%
+
+
+def _vida_media() -> float:
+    return settings.TENDENCIA_VIDA_MEDIA_HORAS * 3600
+
+
+def _peso(cuando: datetime, t0: float) -> float:
+    return 2 ** ((cuando.timestamp() - t0) / _vida_media())
+
+
+def _inicio_ventana(t0: float) -> datetime:
+    #favoritos mas viejos no entran en la reconstruccion con este t0
+    return datetime.fromtimestamp(t0 - VIDAS_MEDIAS_VENTANA * _vida_media(), tz=timezone.utc)
+
+
+#ESCRITURA
+
+def registrar(animal_id: int, cuando: datetime, signo: int = 1) -> None:
+    """
+    Suma (o resta, al quitar un favorito) el peso del favorito guardado en `cuando`.
+    Se llama despues del commit. Un favorito anterior a la ventana de la ultima
+    reconstruccion nunca se sumo, asi que quitarlo no resta nada
+    """
+    cache = get_sync_cache_client()
+    if not cache:
+        return
+    try:
+        t0 = cache.get(T0_KEY)
+        if t0 is None:
+            #sin reconstruccion previa no hay referencia, la proxima la incluira
+            return
+        t0 = float(t0)
+        if signo < 0 and cuando < _inicio_ventana(t0):
+            return
+        cache.zincrby(TENDENCIA_KEY, signo * _peso(cuando, t0), animal_id)
+    except Exception as e:
+        print(f"Advertencia: no se pudo actualizar la tendencia del animal {animal_id} ({e})")
+
+
+#RECONSTRUCCION
+
+def _puntajes_query(db: Session, t0: float):
+    """
+    Puntaje decaido por animal publico y activo con los favoritos de la ventana
+    """
+    vida_media = _vida_media()
+    desde = _inicio_ventana(t0)
+    edad = func.extract("epoch", AnimalFavorito.fecha_guardado) - t0
+    return db.query(
+        AnimalFavorito.animal_id,
+        func.sum(func.power(2, edad / vida_media)).label("puntaje")
+    ).join(Animal, AnimalFavorito.animal_id == Animal.id_animal)\
+     .filter(
+        AnimalFavorito.fecha_guardado >= desde,
+        Animal.is_active == True,
+        Animal.es_publico == True
+     ).group_by(AnimalFavorito.animal_id)
+
+
+def reparar_contadores(db: Session) -> int:
+    """
+    Corrige animals.favoritos_count donde no coincida con las filas (sin tocar updated_at)
+    """
+    real = select(func.count()).where(AnimalFavorito.animal_id == Animal.id_animal).scalar_subquery()
+    resultado = db.execute(
+        update(Animal)
+        .where(Animal.favoritos_count != real)
+        .values(favoritos_count=real, updated_at=Animal.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+def reconstruir(db: Session) -> int:
+    """
+    Recalcula el sorted set desde la base con un t0 nuevo (evita que los pesos crezcan sin limite)
+    """
+    cache = get_sync_cache_client()
+    if not cache:
+        return 0
+    t0 = time.time()
+    puntajes = {str(animal_id): float(p) for animal_id, p in _puntajes_query(db, t0).all()}
+
+    temporal = f"{TENDENCIA_KEY}:nuevo"
+    with cache.pipeline(transaction=True) as pipe:
+        pipe.delete(temporal)
+        if puntajes:
+            pipe.zadd(temporal, puntajes)
+            pipe.rename(temporal, TENDENCIA_KEY)
+        else:
+            pipe.delete(TENDENCIA_KEY)
+        pipe.set(T0_KEY, t0)
+        pipe.execute()
+    return len(puntajes)
+
+
+#LECTURA
+
+def top(db: Session, limite: int) -> List[Tuple[int, float]]:
+    """
+    (animal_id, puntaje) de mayor a menor. Con redis caido lo calcula en la base
+    """
+    cache = get_sync_cache_client()
+    if cache:
+        try:
+            t0 = cache.get(T0_KEY)
+            metricas.cache("tendencias", t0 is not None, t0 is None)
+            if t0 is None:
+                reconstruir(db)
+                t0 = cache.get(T0_KEY)
+            #el puntaje se devuelve decaido a hoy para que sea comparable entre reconstrucciones
+            factor = 2 ** ((float(t0) - time.time()) / _vida_media())
+            return [
+                (int(a), p * factor)
+                for a, p in cache.zrevrange(TENDENCIA_KEY, 0, limite - 1, withscores=True) if p > 0
+            ]
+        except Exception as e:
+            print(f"Advertencia: tendencias no disponibles en redis ({e})")
+
+    puntajes = _puntajes_query(db, time.time()).subquery()
+    filas = db.query(puntajes).order_by(puntajes.c.puntaje.desc()).limit(limite).all()
+    return [(f.animal_id, float(f.puntaje)) for f in filas]
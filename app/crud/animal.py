@@ -1,5 +1,5 @@
 from fastapi import Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import Dict, List, Optional
 
 from app.models.animal import Especie, Habitat, Animal, AnimalFavorito
@@ -7,12 +7,14 @@ from app.schemas.animal import EspecieCreate, EspecieUpdate, HabitatCreate, Habi
 
 from app.models.animal import MediaAnimal, MediaHabitat
 from app.schemas.animal import MediaCreateAnimal, MediaCreateHabitat
+from app.core import dieta_cache, catalogo_cache, tendencias
 # --- Especies ---
 
 def create_especie(db: Session, especie_in: EspecieCreate) -> Especie:
     db_especie = Especie(**especie_in.model_dump())
     db.add(db_especie)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(db_especie)
     return db_especie
 
@@ -33,6 +35,7 @@ def update_especie(db: Session, especie: Especie, especie_in: EspecieUpdate) ->
     for field, value in update_data.items():
         setattr(especie, field, value)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(especie)
     return especie
 
@@ -41,6 +44,7 @@ def delete_especie(db: Session, especie_id: int) -> Optional[Especie]:
     if db_especie:
         db_especie.is_active = False
         db.commit()
+        catalogo_cache.invalidate()
         db.refresh(db_especie)
     return db_especie
 
@@ -50,6 +54,7 @@ def create_habitat(db: Session, habitat_in: HabitatCreate) -> Habitat:
     db_habitat = Habitat(**habitat_in.model_dump())
     db.add(db_habitat)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(db_habitat)
     return db_habitat
 
@@ -69,6 +74,7 @@ def update_habitat(db: Session, habitat: Habitat, habitat_in: HabitatUpdate) ->
     for field, value in update_data.items():
         setattr(habitat, field, value)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(habitat)
     return habitat
 
@@ -77,6 +83,7 @@ def delete_habitat(db: Session, habitat_id: int) -> Optional[Habitat]:
     if db_habitat:
         db_habitat.is_active = False
         db.commit()
+        catalogo_cache.invalidate()
         db.refresh(db_habitat)
     return db_habitat
 
@@ -93,6 +100,7 @@ def create_animal(db: Session, animal_in: AnimalCreate) -> Animal:
     db_animal = Animal(**animal_in.model_dump())
     db.add(db_animal)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(db_animal)
     return db_animal
 
@@ -115,7 +123,8 @@ def list_animals(db: Session, es_publico: Optional[bool] = None, skip: int = 0,
 def list_animals(db: Session, es_publico: Optional[bool] = None) -> Query:
     query = db.query(Animal).options(
         joinedload(Animal.especie), 
-        joinedload(Animal.habitat)
+        joinedload(Animal.habitat),
+        selectinload(Animal.media)
     ).filter(Animal.is_active == True)
 
     if es_publico is not None:
@@ -125,6 +134,7 @@ def list_animals(db: Session, es_publico: Optional[bool] = None) -> Query:
 
 def update_animal(db: Session, animal: Animal, animal_in: AnimalUpdate) -> Animal:
     update_data = animal_in.model_dump(exclude_unset=True)
+    especie_anterior = animal.especie_id
 
     if "especie_id" in update_data:
         especie = db.query(Especie).filter(Especie.id_especie == update_data["especie_id"], Especie.is_active == True).first()
@@ -140,7 +150,12 @@ def update_animal(db: Session, animal: Animal, animal_in: AnimalUpdate) -> Anima
         setattr(animal, field, value)
         
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(animal)
+
+    #si cambia la especie puede cambiar la dieta heredada
+    if animal.especie_id != especie_anterior:
+        dieta_cache.invalidate_animal(animal.id_animal, especie_anterior)
     return animal
 
 def delete_animal(db: Session, animal_id: int) -> Optional[Animal]:
@@ -148,6 +163,7 @@ def delete_animal(db: Session, animal_id: int) -> Optional[Animal]:
     if db_animal:
         db_animal.is_active = False
         db.commit()
+        catalogo_cache.invalidate()
         db.refresh(db_animal)
     return db_animal
 
@@ -173,6 +189,7 @@ def add_media_to_animal(
     )
     db.add(db_media)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(db_media)
     return db_media
     
@@ -184,6 +201,7 @@ def delete_media_animal(db: Session, media_id: int) -> Optional[MediaAnimal]:
     if db_media:
         db.delete(db_media)
         db.commit()
+        catalogo_cache.invalidate()
     return db_media
 
 def get_media_by_animal_id(db: Session, animal_id: int) -> Query:
@@ -213,6 +231,7 @@ def add_media_to_habitat(
     )
     db.add(db_media)
     db.commit()
+    catalogo_cache.invalidate()
     db.refresh(db_media)
     return db_media
 
@@ -224,6 +243,7 @@ def delete_media_habitat(db: Session, media_id: int) -> Optional[MediaHabitat]:
     if db_media:
         db.delete(db_media)
         db.commit()
+        catalogo_cache.invalidate()
     return db_media
 
 def get_media_by_habitat_id(db: Session, habitat_id: int) -> Query:
@@ -253,17 +273,50 @@ def add_animal_to_favorites(db: Session, user_id: int, favorite_in: AnimalFavori
         animal_id=favorite_in.animal_id
     )
     db.add(db_favorite)
+    _sumar_favoritos(db, favorite_in.animal_id, 1)
     db.commit()
     db.refresh(db_favorite)
+    tendencias.registrar(favorite_in.animal_id, db_favorite.fecha_guardado)
     return db_favorite
 
 def remove_animal_from_favorites(db: Session, user_id: int, animal_id: int) -> bool:
     db_favorite = get_favorite(db, user_id, animal_id)
-    if db_favorite:
-        db.delete(db_favorite)
-        db.commit()
-        return True
-    return False
+    if not db_favorite:
+        return False
+    fecha_guardado = db_favorite.fecha_guardado
+    #DELETE por id: si otra peticion ya lo borro no se descuenta dos veces
+    borrados = db.query(AnimalFavorito).filter(
+        AnimalFavorito.id_animal_favorito == db_favorite.id_animal_favorito
+    ).delete(synchronize_session=False)
+    if not borrados:
+        db.rollback()
+        return False
+    _sumar_favoritos(db, animal_id, -1)
+    db.commit()
+    tendencias.registrar(animal_id, fecha_guardado, signo=-1)
+    return True
+
+def _sumar_favoritos(db: Session, animal_id: int, delta: int) -> None:
+    #updated_at se deja igual: un favorito no es un cambio del catalogo
+    db.query(Animal).filter(Animal.id_animal == animal_id).update({
+        Animal.favoritos_count: Animal.favoritos_count + delta,
+        Animal.updated_at: Animal.updated_at,
+    }, synchronize_session=False)
+
+def get_animales_tendencia(db: Session, limite: int) -> List[dict]:
+    """
+    Orden del sorted set de tendencias, los datos de los animales en una sola consulta
+    """
+    #margen para los que hayan dejado de ser publicos desde la ultima reconstruccion
+    ranking = tendencias.top(db, limite * 2)
+    animales = {
+        a.id_animal: a for a in list_animals(db, es_publico=True)
+        .filter(Animal.id_animal.in_([animal_id for animal_id, _ in ranking])).all()
+    } if ranking else {}
+    return [
+        {"puntaje_tendencia": round(puntaje, 4), "animal": animales[animal_id]}
+        for animal_id, puntaje in ranking if animal_id in animales
+    ][:limite]
 
 def list_user_favorites(db: Session, user_id: int) -> Query:
     return (
@@ -3,6 +3,7 @@ from typing import Optional
 from app.db.session import SessionLocal
 from app.models.audit_log import AuditLog
 from app.core.enums import AuditEvent
+from app.core import metricas
 
 def create_audit_log(
     *,
@@ -10,6 +11,7 @@ def create_audit_log(
     user_id: Optional[int] = None,
     attempted_email: Optional[str] = None
 ) -> None:
+    metricas.AUDIT_PENDIENTES.inc()
     db: Session = SessionLocal()
     
     try:
@@ -23,11 +25,14 @@ def create_audit_log(
         
         db.add(db_log)
         db.commit()
+        metricas.AUDIT_ESCRITOS.labels("ok").inc()
     except Exception as e:
         print(f"ERROR EN BACKGROUND TASK (create_audit_log): {e}")
         db.rollback()
+        metricas.AUDIT_ESCRITOS.labels("error").inc()
     finally:
         db.close()
+        metricas.AUDIT_PENDIENTES.dec()
 
 
 def get_audit_logs_query(db: Session) -> Query:
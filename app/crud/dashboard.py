@@ -5,8 +5,9 @@ from typing import Dict, List, Any
 
 from app.models.animal import Animal, Especie
 from app.models.user import User
-from app.models.inventario import Producto
+from app.models.inventario import Producto, AlertaCaducidad, PronosticoConsumo
 from app.models.tarea import Tarea
+from app.crud.inventario import umbral_reorden
 
 def get_dashboard_kpis(db: Session) -> Dict[str, int]:
     today = date.today()
@@ -17,12 +18,18 @@ def get_dashboard_kpis(db: Session) -> Dict[str, int]:
     total_usuarios = db.query(func.count(User.id))\
         .filter(User.is_active == True).scalar() or 0
 
+    #mismo criterio que la lista de stock bajo (get_productos_con_stock_bajo_query)
     alertas_stock = db.query(func.count(Producto.id_producto))\
+        .outerjoin(PronosticoConsumo, PronosticoConsumo.producto_id == Producto.id_producto)\
         .filter(
             Producto.is_active == True,
-            Producto.stock_actual <= Producto.stock_minimo
+            Producto.stock_actual <= umbral_reorden()
         ).scalar() or 0
 
+    #precalculado por el job de caducidades
+    lotes_por_vencer = db.query(func.count(AlertaCaducidad.producto_id))\
+        .filter(AlertaCaducidad.cantidad_7_dias > 0).scalar() or 0
+
     tareas_pendientes = db.query(func.count(Tarea.id_tarea))\
         .filter(
             Tarea.fecha_programada <= today,
@@ -33,6 +40,7 @@ def get_dashboard_kpis(db: Session) -> Dict[str, int]:
         "total_animales": total_animales,
         "total_usuarios": total_usuarios,
         "alertas_stock": alertas_stock,
+        "lotes_por_vencer": lotes_por_vencer,
         "tareas_pendientes": tareas_pendientes
     }
 
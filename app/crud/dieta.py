@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from sqlalchemy import or_
 from sqlalchemy.orm import Session, Query, joinedload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
@@ -10,6 +11,7 @@ from app.models.inventario import Producto, UnidadMedida
 from app.schemas.dieta import DietaCreate, DietaUpdate, DetalleDietaCreate
 
 from app.crud import inventario
+from app.core import dieta_cache
 
 
 def _validate_dieta_fks(
@@ -47,15 +49,18 @@ def _validate_dieta_fks(
             if not unidad or not unidad.is_active:
                 raise HTTPException(status_code=400, detail=f"Unidad ID {d.unidad_medida_id} no encontrada o inactiva")
 
+def _dieta_detalle_options():
+    return joinedload(Dieta.detalles_dieta).options(
+        joinedload(DetalleDieta.producto).options(
+            joinedload(Producto.tipo_producto),
+            joinedload(Producto.unidad_medida)
+        ),
+        joinedload(DetalleDieta.unidad_medida)
+    )
+
 def get_dieta(db: Session, id: int) -> Optional[Dieta]:
     return db.query(Dieta).options(
-        joinedload(Dieta.detalles_dieta).options(
-            joinedload(DetalleDieta.producto).options(
-                joinedload(Producto.tipo_producto),
-                joinedload(Producto.unidad_medida)
-            ),
-            joinedload(DetalleDieta.unidad_medida)
-        )
+        _dieta_detalle_options()
     ).filter(Dieta.id_dieta == id).first()
 
 def create_dieta(db: Session, dieta_in: DietaCreate) -> Dieta:
@@ -85,6 +90,8 @@ def create_dieta(db: Session, dieta_in: DietaCreate) -> Dieta:
         
         db.commit()
         db.refresh(db_dieta)
+
+        dieta_cache.invalidate_target(db_dieta.animal_id, db_dieta.especie_id)
         
         return get_dieta(db, db_dieta.id_dieta) 
         
@@ -120,12 +127,81 @@ def get_dieta_for_animal(db: Session, animal_id: int) -> Optional[Dieta]:
 
     return None
 
+def _resolve_dietas_efectivas(db: Session, animal_ids: List[int]) -> List[dict]:
+    #3 consultas sin importar cuantos animales: animales, dietas candidatas y dietas completas
+    animales = db.query(Animal.id_animal, Animal.especie_id).filter(
+        Animal.id_animal.in_(animal_ids)
+    ).all()
+    if not animales:
+        return []
+
+    especie_ids = {a.especie_id for a in animales}
+    candidatas = db.query(Dieta.id_dieta, Dieta.animal_id, Dieta.especie_id).filter(
+        Dieta.is_active == True,
+        or_(Dieta.animal_id.in_(animal_ids), Dieta.especie_id.in_(especie_ids))
+    ).all()
+
+    por_animal = {d.animal_id: d.id_dieta for d in candidatas if d.animal_id is not None}
+    por_especie = {d.especie_id: d.id_dieta for d in candidatas if d.especie_id is not None}
+
+    elegidas = {}
+    for a in animales:
+        if a.id_animal in por_animal:
+            elegidas[a.id_animal] = (por_animal[a.id_animal], False)
+        else:
+            elegidas[a.id_animal] = (por_especie.get(a.especie_id), True)
+
+    ids_dieta = {d for d, _ in elegidas.values() if d is not None}
+    dietas = {}
+    if ids_dieta:
+        dietas = {
+            d.id_dieta: d for d in db.query(Dieta).options(
+                _dieta_detalle_options()
+            ).filter(Dieta.id_dieta.in_(ids_dieta)).all()
+        }
+
+    payloads = {d_id: dieta_cache.serialize_dieta(d) for d_id, d in dietas.items()}
+
+    return [
+        {
+            "animal_id": a.id_animal,
+            "especie_id": a.especie_id,
+            "via_especie": elegidas[a.id_animal][1],
+            "payload": payloads.get(elegidas[a.id_animal][0], dieta_cache.NULL_MARKER),
+        }
+        for a in animales
+    ]
+
+def get_dieta_payloads_for_animals(db: Session, animal_ids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    Dieta efectiva (la del animal pisa a la de su especie) como DietaSugeridaOut
+    serializado. Lee del cache y resuelve los faltantes en bloque
+    None si el animal no existe o no tiene dieta
+    """
+    ids = list(dict.fromkeys(animal_ids))
+    cached = dieta_cache.get_many(ids)
+
+    faltantes = [a for a in ids if a not in cached]
+    if faltantes:
+        resueltas = _resolve_dietas_efectivas(db, faltantes)
+        dieta_cache.set_many(resueltas)
+        cached.update({e["animal_id"]: e["payload"] for e in resueltas})
+
+    return {
+        a: (None if cached.get(a) in (None, dieta_cache.NULL_MARKER) else cached[a])
+        for a in ids
+    }
+
+def get_dieta_payload_for_animal(db: Session, animal_id: int) -> Optional[str]:
+    return get_dieta_payloads_for_animals(db, [animal_id])[animal_id]
+
 def update_dieta(
     db: Session, 
     db_dieta: Dieta, 
     dieta_in: DietaUpdate
 ) -> Dieta:
     update_data = dieta_in.model_dump(exclude_unset=True)
+    target_anterior = (db_dieta.animal_id, db_dieta.especie_id)
     
     if "detalles" in update_data or "animal_id" in update_data or "especie_id" in update_data:
         _validate_dieta_fks(
@@ -160,6 +236,11 @@ def update_dieta(
         db.add(db_dieta)
         db.commit()
         db.refresh(db_dieta)
+
+        dieta_cache.invalidate_target(*target_anterior)
+        if (db_dieta.animal_id, db_dieta.especie_id) != target_anterior:
+            dieta_cache.invalidate_target(db_dieta.animal_id, db_dieta.especie_id)
+
         return get_dieta(db, db_dieta.id_dieta)
 
     except IntegrityError:
@@ -174,17 +255,12 @@ def delete_dieta(db: Session, db_dieta: Dieta) -> Dieta:
     db.add(db_dieta)
     db.commit()
     db.refresh(db_dieta)
+    dieta_cache.invalidate_target(db_dieta.animal_id, db_dieta.especie_id)
     return db_dieta
 
 def get_dietas_query(db: Session, include_inactive: bool = False) -> Query:
     query = db.query(Dieta).options(
-        joinedload(Dieta.detalles_dieta).options(
-            joinedload(DetalleDieta.producto).options(
-                joinedload(Producto.tipo_producto),
-                joinedload(Producto.unidad_medida)
-            ),
-            joinedload(DetalleDieta.unidad_medida)
-        )
+        _dieta_detalle_options()
     )
     
     if not include_inactive:
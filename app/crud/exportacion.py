@@ -0,0 +1,160 @@
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import aliased
+
+from app.core.exportacion import Columnas
+from app.crud.inventario import filtros_productos, umbral_reorden
+from app.crud.tarea import filtros_tareas
+from app.models.animal import Animal, Habitat
+from app.models.audit_log import AuditLog
+from app.models.inventario import Producto, TipoProducto, UnidadMedida, PronosticoConsumo
+from app.models.survey import ParticipacionEncuesta, PreguntaEncuesta, OpcionEncuesta, RespuestaUsuario
+from app.models.tarea import Tarea, TipoTarea
+from app.models.user import User
+
+#cada funcion devuelve el select filtrado y ordenado y las columnas que se pueden pedir
+#(los filtros son los mismos que usan los listados paginados)
+
+COLUMNAS_PRODUCTOS: Columnas = {
+    "id": ("ID", Producto.id_producto),
+    "nombre": ("Producto", Producto.nombre_producto),
+    "descripcion": ("Descripcion", Producto.descripcion_producto),
+    "tipo": ("Tipo", TipoProducto.nombre_tipo_producto),
+    "unidad": ("Unidad", UnidadMedida.abreviatura),
+    "stock_actual": ("Stock actual", Producto.stock_actual),
+    "stock_minimo": ("Stock minimo", Producto.stock_minimo),
+    "activo": ("Activo", Producto.is_active),
+    "creado": ("Creado", Producto.created_at),
+    "actualizado": ("Actualizado", Producto.updated_at),
+}
+
+
+def _productos_base() -> Select:
+    return select(Producto.id_producto).select_from(Producto)\
+        .join(TipoProducto, Producto.tipo_producto_id == TipoProducto.id_tipo_producto)\
+        .join(UnidadMedida, Producto.unidad_medida_id == UnidadMedida.id_unidad)
+
+
+def productos_stmt(
+    include_inactive: bool = False,
+    tipo_producto_id: Optional[int] = None,
+    nombre: Optional[str] = None
+) -> Tuple[Select, Columnas]:
+    stmt = _productos_base()\
+        .where(*filtros_productos(include_inactive, tipo_producto_id, nombre))\
+        .order_by(Producto.nombre_producto, Producto.id_producto)
+    return stmt, COLUMNAS_PRODUCTOS
+
+
+COLUMNAS_STOCK_BAJO: Columnas = {
+    **{c: COLUMNAS_PRODUCTOS[c] for c in ("id", "nombre", "tipo", "unidad", "stock_actual", "stock_minimo")},
+    "punto_reorden": ("Punto de reorden", PronosticoConsumo.punto_reorden),
+    "demanda_diaria": ("Demanda diaria", PronosticoConsumo.demanda_diaria),
+    "dias_cobertura": ("Dias de cobertura", func.round(Producto.stock_actual / func.nullif(PronosticoConsumo.demanda_diaria, 0), 1)),
+}
+
+
+def stock_bajo_stmt() -> Tuple[Select, Columnas]:
+    #mismo criterio que get_productos_con_stock_bajo_query
+    stmt = _productos_base()\
+        .outerjoin(PronosticoConsumo, PronosticoConsumo.producto_id == Producto.id_producto)\
+        .where(Producto.is_active == True, Producto.stock_actual <= umbral_reorden())\
+        .order_by(
+            (Producto.stock_actual / func.nullif(PronosticoConsumo.demanda_diaria, 0)).asc().nulls_last(),
+            (Producto.stock_actual / func.nullif(Producto.stock_minimo, 0)).asc().nulls_last(),
+            Producto.nombre_producto
+        )
+    return stmt, COLUMNAS_STOCK_BAJO
+
+
+Asignado = aliased(User)
+
+COLUMNAS_TAREAS: Columnas = {
+    "id": ("ID", Tarea.id_tarea),
+    "titulo": ("Titulo", Tarea.titulo),
+    "tipo": ("Tipo", TipoTarea.nombre_tipo_tarea),
+    "fecha_programada": ("Fecha programada", Tarea.fecha_programada),
+    "completada": ("Completada", Tarea.is_completed),
+    "fecha_completada": ("Fecha completada", Tarea.fecha_completada),
+    "asignado": ("Asignado a", Asignado.username),
+    "animal": ("Animal", Animal.nombre_animal),
+    "habitat": ("Habitat", Habitat.nombre_habitat),
+    "descripcion": ("Descripcion", Tarea.descripcion_tarea),
+    "notas": ("Notas", Tarea.notas_completacion),
+}
+
+
+def tareas_stmt(
+    is_completed: Optional[bool] = None,
+    usuario_asignado_id: Optional[int] = None,
+    sin_asignar: Optional[bool] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+) -> Tuple[Select, Columnas]:
+    stmt = select(Tarea.id_tarea).select_from(Tarea)\
+        .join(TipoTarea, Tarea.tipo_tarea_id == TipoTarea.id_tipo_tarea)\
+        .outerjoin(Asignado, Tarea.usuario_asignado_id == Asignado.id)\
+        .outerjoin(Animal, Tarea.animal_id == Animal.id_animal)\
+        .outerjoin(Habitat, Tarea.habitat_id == Habitat.id_habitat)\
+        .where(*filtros_tareas(
+            is_completed, usuario_asignado_id, sin_asignar,
+            fecha_desde=fecha_desde, fecha_hasta=fecha_hasta
+        ))\
+        .order_by(Tarea.fecha_programada.asc(), Tarea.is_completed.asc(), Tarea.titulo.asc(), Tarea.id_tarea)
+    return stmt, COLUMNAS_TAREAS
+
+
+COLUMNAS_RESPUESTAS: Columnas = {
+    "id": ("ID", RespuestaUsuario.id_respuesta),
+    "participacion": ("Participacion", ParticipacionEncuesta.id_participacion),
+    "usuario": ("Usuario", User.username),
+    "fecha": ("Fecha", ParticipacionEncuesta.fecha_participacion),
+    "completada": ("Completada", ParticipacionEncuesta.completada),
+    "pregunta": ("Pregunta", PreguntaEncuesta.texto_pregunta),
+    "opcion": ("Opcion", OpcionEncuesta.texto_opcion),
+    "respuesta_texto": ("Respuesta", RespuestaUsuario.respuesta_texto),
+}
+
+
+def respuestas_encuesta_stmt(encuesta_id: int, solo_completadas: bool = True) -> Tuple[Select, Columnas]:
+    stmt = select(RespuestaUsuario.id_respuesta).select_from(RespuestaUsuario)\
+        .join(ParticipacionEncuesta, RespuestaUsuario.participacion_id == ParticipacionEncuesta.id_participacion)\
+        .join(User, ParticipacionEncuesta.usuario_id == User.id)\
+        .join(PreguntaEncuesta, RespuestaUsuario.pregunta_id == PreguntaEncuesta.id_pregunta)\
+        .outerjoin(OpcionEncuesta, RespuestaUsuario.opcion_id == OpcionEncuesta.id_opcion)\
+        .where(ParticipacionEncuesta.encuesta_id == encuesta_id)
+    if solo_completadas:
+        stmt = stmt.where(ParticipacionEncuesta.completada == True)
+    stmt = stmt.order_by(
+        ParticipacionEncuesta.id_participacion, PreguntaEncuesta.orden.asc().nulls_last(), RespuestaUsuario.id_respuesta
+    )
+    return stmt, COLUMNAS_RESPUESTAS
+
+
+COLUMNAS_AUDITORIA: Columnas = {
+    "id": ("ID", AuditLog.id),
+    "fecha": ("Fecha", AuditLog.timestamp),
+    "evento": ("Evento", AuditLog.event),
+    "usuario_id": ("ID usuario", AuditLog.user_id),
+    "usuario": ("Usuario", User.username),
+    "email_intentado": ("Email intentado", AuditLog.attempted_email),
+}
+
+
+def audit_logs_stmt(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    evento: Optional[str] = None
+) -> Tuple[Select, Columnas]:
+    stmt = select(AuditLog.id).select_from(AuditLog)\
+        .outerjoin(User, AuditLog.user_id == User.id)
+    if desde is not None:
+        stmt = stmt.where(AuditLog.timestamp >= desde)
+    if hasta is not None:
+        stmt = stmt.where(AuditLog.timestamp <= hasta)
+    if evento:
+        stmt = stmt.where(AuditLog.event == evento)
+    #mismo orden que get_audit_logs_query
+    return stmt.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()), COLUMNAS_AUDITORIA
@@ -1,9 +1,12 @@
+from sqlalchemy import func, delete, insert, select, literal
 from sqlalchemy.orm import Session, Query, joinedload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from typing import Optional
+from datetime import date, timedelta
 
-from app.models.inventario import TipoProducto, UnidadMedida, Proveedor, Producto
+from app.models.inventario import TipoProducto, UnidadMedida, Proveedor, Producto, ProyeccionStock, PronosticoConsumo, StockLote, AlertaCaducidad
+from app.core import dieta_cache
 
 from app.schemas.inventario import (
     TipoProductoCreate, TipoProductoUpdate,
@@ -208,17 +211,24 @@ def get_productos_query(
     query = db.query(Producto).options(
         joinedload(Producto.tipo_producto),
         joinedload(Producto.unidad_medida)
-    )
+    ).filter(*filtros_productos(include_inactive, tipo_producto_id, nombre))
+
+    return query.order_by(Producto.nombre_producto)
+
+def filtros_productos(
+    include_inactive: bool = False,
+    tipo_producto_id: Optional[int] = None,
+    nombre: Optional[str] = None
+) -> list:
+    #compartidos con la exportacion (app/crud/exportacion.py)
+    filtros = []
     if not include_inactive:
-        query = query.filter(Producto.is_active == True)
-        
+        filtros.append(Producto.is_active == True)
     if tipo_producto_id:
-        query = query.filter(Producto.tipo_producto_id == tipo_producto_id)
-
+        filtros.append(Producto.tipo_producto_id == tipo_producto_id)
     if nombre:
-        query = query.filter(Producto.nombre_producto.ilike(f"%{nombre}%"))
-        
-    return query.order_by(Producto.nombre_producto)
+        filtros.append(Producto.nombre_producto.ilike(f"%{nombre}%"))
+    return filtros
 
 def create_producto(
     db: Session, 
@@ -276,16 +286,18 @@ def update_producto(
         db.commit()
         db.refresh(db_producto)
         db.refresh(db_producto, attribute_names=['tipo_producto', 'unidad_medida'])
-        return db_producto
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El nombre del producto ya existe")
+    dieta_cache.invalidate_producto(db, db_producto.id_producto)
+    return db_producto
     
 def delete_producto(db: Session, db_producto: Producto) -> Producto:
     db_producto.is_active = False
     db.add(db_producto)
     db.commit()
     db.refresh(db_producto)
+    dieta_cache.invalidate_producto(db, db_producto.id_producto)
     return db_producto
 
 #
@@ -293,15 +305,120 @@ def get_productos_con_stock_bajo_query(db: Session) -> Query:
     query = db.query(Producto).options(
         joinedload(Producto.tipo_producto),
         joinedload(Producto.unidad_medida)
-    )
+    ).outerjoin(PronosticoConsumo, PronosticoConsumo.producto_id == Producto.id_producto)
     query = query.filter(Producto.is_active == True)
-    
+
+    dias_cobertura = Producto.stock_actual / func.nullif(PronosticoConsumo.demanda_diaria, 0)
+
     query = query.filter(
-        Producto.stock_actual <= Producto.stock_minimo
-    ).order_by(Producto.nombre_producto)
+        Producto.stock_actual <= umbral_reorden()
+    ).order_by(
+        dias_cobertura.asc().nulls_last(),
+        (Producto.stock_actual / func.nullif(Producto.stock_minimo, 0)).asc().nulls_last(),
+        Producto.nombre_producto
+    )
     
     return query
 
+def umbral_reorden():
+    #el punto de reorden pronosticado manda, el stock_minimo manual queda como piso
+    #(requiere outer join con PronosticoConsumo)
+    return func.greatest(Producto.stock_minimo, func.coalesce(PronosticoConsumo.punto_reorden, 0))
+
+def get_proyeccion_stock_query(db: Session, solo_con_quiebre: bool = False) -> Query:
+    query = db.query(ProyeccionStock).options(
+        joinedload(ProyeccionStock.producto).joinedload(Producto.tipo_producto),
+        joinedload(ProyeccionStock.producto).joinedload(Producto.unidad_medida)
+    )
+    if solo_con_quiebre:
+        query = query.filter(ProyeccionStock.fecha_quiebre != None)
+
+    return query.order_by(
+        ProyeccionStock.fecha_quiebre.asc().nulls_last(),
+        ProyeccionStock.producto_id
+    )
+
+def get_pronostico_consumo_query(db: Session) -> Query:
+    query = db.query(PronosticoConsumo).options(
+        joinedload(PronosticoConsumo.producto).joinedload(Producto.tipo_producto),
+        joinedload(PronosticoConsumo.producto).joinedload(Producto.unidad_medida)
+    )
+    return query.order_by(
+        PronosticoConsumo.dias_cobertura.asc().nulls_last(),
+        PronosticoConsumo.producto_id
+    )
+
+#alertas de caducidad
+HORIZONTES_CADUCIDAD = {
+    7: AlertaCaducidad.cantidad_7_dias,
+    30: AlertaCaducidad.cantidad_30_dias,
+    90: AlertaCaducidad.cantidad_90_dias,
+}
+
+def calcular_alertas_caducidad(db: Session) -> int:
+    """
+    Cantidad por vencer de cada producto a 7/30/90 dias en una sola consulta
+    (usa el indice parcial ix_stock_lote_fefo)
+    """
+    hoy = date.today()
+    cantidad = StockLote.cantidad_disponible
+
+    def por_vencer(dias: int):
+        return func.coalesce(func.sum(cantidad).filter(StockLote.fecha_caducidad <= hoy + timedelta(days=dias)), 0)
+
+    resumen = select(
+        StockLote.producto_id,
+        literal(hoy),
+        func.min(StockLote.fecha_caducidad),
+        func.coalesce(func.sum(cantidad).filter(StockLote.fecha_caducidad < hoy), 0),
+        por_vencer(7),
+        por_vencer(30),
+        por_vencer(90),
+        func.count(),
+    ).where(
+        StockLote.cantidad_disponible > 0,
+        StockLote.fecha_caducidad <= hoy + timedelta(days=90)
+    ).group_by(StockLote.producto_id)
+
+    db.execute(delete(AlertaCaducidad))
+    resultado = db.execute(
+        insert(AlertaCaducidad).from_select(
+            ["producto_id", "fecha_calculo", "proxima_caducidad", "cantidad_vencida",
+             "cantidad_7_dias", "cantidad_30_dias", "cantidad_90_dias", "lotes_por_vencer"],
+            resumen
+        )
+    )
+    db.commit()
+    return resultado.rowcount
+
+def get_alertas_caducidad_query(
+    db: Session,
+    horizonte: Optional[int] = None,
+    tipo_producto_id: Optional[int] = None
+) -> Query:
+    query = db.query(AlertaCaducidad).join(AlertaCaducidad.producto).options(
+        joinedload(AlertaCaducidad.producto).joinedload(Producto.tipo_producto),
+        joinedload(AlertaCaducidad.producto).joinedload(Producto.unidad_medida)
+    ).filter(Producto.is_active == True)
+
+    if horizonte is not None:
+        if horizonte not in HORIZONTES_CADUCIDAD:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Horizonte invalido, use uno de {list(HORIZONTES_CADUCIDAD)}"
+            )
+        query = query.filter(HORIZONTES_CADUCIDAD[horizonte] > 0)
+
+    if tipo_producto_id:
+        query = query.filter(Producto.tipo_producto_id == tipo_producto_id)
+
+    #lo que vence antes primero, y a igual fecha lo que mas cantidad pierde
+    return query.order_by(
+        AlertaCaducidad.proxima_caducidad.asc(),
+        AlertaCaducidad.cantidad_7_dias.desc(),
+        Producto.nombre_producto
+    )
+
 def update_producto_imagen(
     db: Session,
     db_producto: Producto,
@@ -310,10 +427,13 @@ def update_producto_imagen(
 ) -> Producto:
     db_producto.photo_url = photo_url
     db_producto.public_id = public_id
+    if photo_url is None:
+        db_producto.photo_variantes = None
     
     db.add(db_producto)
     db.commit()
     db.refresh(db_producto)
     db.refresh(db_producto, attribute_names=['tipo_producto', 'unidad_medida'])
+    dieta_cache.invalidate_producto(db, db_producto.id_producto)
     
     return db_producto
\ No newline at end of file
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.orm import Session
+
+from app.crud.tarea import filtros_tareas
+from app.models.animal import Animal, Habitat
+from app.models.tarea import Tarea
+from app.models.user import User
+
+#datos de los reportes: proyecciones de columnas (sin objetos del orm) y agregados en la base
+
+# (fecha, usuario asignado) -> datos de un diario. El usuario es None cuando no se separa por cuidador
+ClaveDiario = Tuple[date, Optional[int]]
+
+
+def diario_stmt(
+    fecha_desde: date,
+    fecha_hasta: date,
+    usuario_asignado_id: Optional[int] = None,
+    por_cuidador: bool = False
+) -> Select:
+    """
+    Una fila por tarea con los totales de su diario como funciones de ventana,
+    asi los KPI salen de la misma consulta que el detalle
+    """
+    particion = [Tarea.fecha_programada]
+    if por_cuidador:
+        particion.append(Tarea.usuario_asignado_id)
+    pendiente_sin_asignar = and_(Tarea.is_completed == False, Tarea.usuario_asignado_id == None)
+
+    return select(
+        Tarea.fecha_programada,
+        Tarea.usuario_asignado_id,
+        Tarea.titulo,
+        Tarea.is_completed,
+        Tarea.fecha_completada,
+        User.email,
+        Habitat.nombre_habitat,
+        Animal.nombre_animal,
+        func.count().over(partition_by=particion).label("total"),
+        func.count().filter(Tarea.is_completed == True).over(partition_by=particion).label("completadas"),
+        func.count().filter(pendiente_sin_asignar).over(partition_by=particion).label("alertas"),
+    ).select_from(Tarea)\
+     .outerjoin(User, Tarea.usuario_asignado_id == User.id)\
+     .outerjoin(Habitat, Tarea.habitat_id == Habitat.id_habitat)\
+     .outerjoin(Animal, Tarea.animal_id == Animal.id_animal)\
+     .where(*filtros_tareas(
+        usuario_asignado_id=usuario_asignado_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta
+     ))\
+     .order_by(
+        Tarea.fecha_programada,
+        Tarea.usuario_asignado_id.asc().nulls_last(),
+        Tarea.fecha_completada.asc().nulls_last(),
+        Tarea.titulo,
+        Tarea.id_tarea
+     )
+
+
+def _tarea(fila) -> dict:
+    return {
+        "hora": fila.fecha_completada.strftime("%H:%M") if fila.fecha_completada else "--:--",
+        "descripcion": fila.titulo,
+        "zona": fila.nombre_habitat or fila.nombre_animal or "General",
+        "asignado_a": fila.email or "SIN ASIGNAR",
+        "estado": "Completada" if fila.is_completed else "Pendiente"
+    }
+
+
+def _diario_vacio(fecha: date) -> dict:
+    return {
+        "fecha": fecha, "cuidador": None,
+        "tareas_total": 0, "tareas_completadas": 0, "tareas_pendientes": 0,
+        "alertas_tareas": 0, "tareas": []
+    }
+
+
+def get_diarios(
+    db: Session,
+    fecha_desde: date,
+    fecha_hasta: date,
+    usuario_asignado_id: Optional[int] = None,
+    por_cuidador: bool = False
+) -> Dict[ClaveDiario, dict]:
+    """
+    Diarios del rango en orden. Sin separar por cuidador hay uno por dia aunque no tenga tareas
+    """
+    filas = db.execute(diario_stmt(fecha_desde, fecha_hasta, usuario_asignado_id, por_cuidador)).all()
+
+    diarios: Dict[ClaveDiario, dict] = {}
+    if not por_cuidador:
+        dias = (fecha_hasta - fecha_desde).days + 1
+        for i in range(dias):
+            fecha = fecha_desde + timedelta(days=i)
+            diarios[(fecha, None)] = _diario_vacio(fecha)
+
+    clave = (lambda f: (f.fecha_programada, f.usuario_asignado_id)) if por_cuidador \
+        else (lambda f: (f.fecha_programada, None))
+    for (fecha, usuario_id), grupo in groupby(filas, key=clave):
+        grupo = list(grupo)
+        primera = grupo[0]
+        diarios[(fecha, usuario_id)] = {
+            "fecha": fecha,
+            "cuidador": (primera.email or "SIN ASIGNAR") if por_cuidador else None,
+            "tareas_total": primera.total,
+            "tareas_completadas": primera.completadas,
+            "tareas_pendientes": primera.total - primera.completadas,
+            "alertas_tareas": primera.alertas,
+            "tareas": [_tarea(f) for f in grupo]
+        }
+    return diarios
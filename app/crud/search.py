@@ -0,0 +1,115 @@
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, literal
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import metricas
+from app.db.cache import get_sync_cache_client
+from app.models.animal import Animal, Especie, Habitat
+from app.models.inventario import Producto
+
+AUTOCOMPLETE_PREFIX = "search:autocompletar:"
+
+#entidad -> (modelo, id, columna principal, columnas buscadas, columna de detalle)
+ENTIDADES = {
+    "productos": (Producto, Producto.id_producto, Producto.nombre_producto,
+                  [Producto.nombre_producto], None),
+    "animales": (Animal, Animal.id_animal, Animal.nombre_animal,
+                 [Animal.nombre_animal], None),
+    "especies": (Especie, Especie.id_especie, Especie.nombre_especie,
+                 [Especie.nombre_especie, Especie.nombre_cientifico], Especie.nombre_cientifico),
+    "habitats": (Habitat, Habitat.id_habitat, Habitat.nombre_habitat,
+                 [Habitat.nombre_habitat], Habitat.tipo_habitat),
+}
+SOLO_PERSONAL = {"productos"}
+
+
+def _escape_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def tipos_visibles(tipos: Optional[List[str]], es_personal: bool) -> List[str]:
+    pedidos = tipos or list(ENTIDADES)
+    return [t for t in ENTIDADES if t in pedidos and (es_personal or t not in SOLO_PERSONAL)]
+
+
+def _base_query(db: Session, tipo: str, score, es_personal: bool):
+    modelo, id_col, nombre_col, _, detalle_col = ENTIDADES[tipo]
+    query = db.query(
+        id_col.label("id"),
+        nombre_col.label("nombre"),
+        (detalle_col if detalle_col is not None else literal(None)).label("detalle"),
+        score.label("score"),
+    ).filter(modelo.is_active == True)
+
+    if tipo == "animales" and not es_personal:
+        query = query.filter(Animal.es_publico == True)
+    return query
+
+
+def buscar(db: Session, q: str, tipos: List[str], es_personal: bool, limite: int = 10) -> Dict[str, list]:
+    """
+    Busqueda tolerante a errores: operador % de pg_trgm o subcadena (ambos usan los indices GIN),
+    ordenado por similitud
+    """
+    q = q.strip()
+    patron = f"%{_escape_like(q)}%"
+    resultados = {}
+
+    for tipo in tipos:
+        columnas = ENTIDADES[tipo][3]
+        score = func.greatest(*[func.similarity(c, q) for c in columnas]) if len(columnas) > 1 \
+            else func.similarity(columnas[0], q)
+        coincide = or_(*[c.op("%")(q) for c in columnas], *[c.ilike(patron) for c in columnas])
+
+        filas = _base_query(db, tipo, score, es_personal)\
+            .filter(coincide)\
+            .order_by(score.desc(), ENTIDADES[tipo][2])\
+            .limit(limite).all()
+
+        resultados[tipo] = [
+            {"id": f.id, "nombre": f.nombre, "detalle": f.detalle, "score": round(float(f.score), 3)}
+            for f in filas
+        ]
+    return resultados
+
+
+def autocompletar(db: Session, q: str, tipos: List[str], es_personal: bool, limite: int = 8) -> Dict[str, list]:
+    """
+    Sugerencias por prefijo para la caja de busqueda. Las consultas repetidas se sirven
+    desde redis durante unos minutos
+    """
+    q = q.strip().lower()
+    key = f"{AUTOCOMPLETE_PREFIX}{int(es_personal)}:{','.join(tipos)}:{limite}:{q}"
+    cache = get_sync_cache_client()
+
+    if cache:
+        try:
+            cached = cache.get(key)
+            metricas.cache("busqueda", cached is not None, cached is None)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            print(f"Advertencia: cache de busqueda no disponible ({e})")
+
+    patron = f"{_escape_like(q)}%"
+    resultados = {}
+    for tipo in tipos:
+        columnas = ENTIDADES[tipo][3]
+        nombre_col = ENTIDADES[tipo][2]
+        filas = _base_query(db, tipo, literal(1.0), es_personal)\
+            .filter(or_(*[c.ilike(patron) for c in columnas]))\
+            .order_by(func.length(nombre_col), nombre_col)\
+            .limit(limite).all()
+        resultados[tipo] = [
+            {"id": f.id, "nombre": f.nombre, "detalle": f.detalle, "score": 1.0} for f in filas
+        ]
+
+    if cache:
+        try:
+            cache.set(key, json.dumps(resultados), ex=settings.SEARCH_AUTOCOMPLETE_TTL_SECONDS)
+        except Exception as e:
+            print(f"Advertencia: no se pudo escribir el cache de busqueda ({e})")
+    return resultados
@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, union_all, func, cast, literal, Date, insert
+from sqlalchemy.orm import Session
+
+from app.models.inventario import (
+    Producto, StockLote, EntradaInventario, DetalleEntrada, Salida, DetalleSalida,
+    SnapshotStock, SnapshotStockLote
+)
+
+
+#helpers
+def _movimientos(desde: Optional[date], hasta: Optional[date]):
+    """
+    Entradas (+) y salidas (-) por dia entre el cierre de `desde` y el cierre de `hasta`
+    """
+    entradas = select(
+        DetalleEntrada.producto_id.label("producto_id"),
+        cast(EntradaInventario.fecha_entrada, Date).label("dia"),
+        DetalleEntrada.cantidad_entrada.label("cantidad"),
+    ).join(EntradaInventario, DetalleEntrada.entrada_id == EntradaInventario.id_entrada_inventario)
+
+    salidas = select(
+        DetalleSalida.producto_id.label("producto_id"),
+        cast(Salida.fecha_salida, Date).label("dia"),
+        (-DetalleSalida.cantidad_salida).label("cantidad"),
+    ).join(Salida, DetalleSalida.salida_id == Salida.id_salida)
+
+    if desde is not None:
+        entradas = entradas.where(EntradaInventario.fecha_entrada >= desde + timedelta(days=1))
+        salidas = salidas.where(Salida.fecha_salida >= desde + timedelta(days=1))
+    if hasta is not None:
+        entradas = entradas.where(EntradaInventario.fecha_entrada < hasta + timedelta(days=1))
+        salidas = salidas.where(Salida.fecha_salida < hasta + timedelta(days=1))
+
+    return union_all(entradas, salidas).subquery()
+
+
+def _neto_por_producto(db: Session, desde: Optional[date], hasta: Optional[date], producto_id: Optional[int] = None) -> dict:
+    mov = _movimientos(desde, hasta)
+    query = db.query(mov.c.producto_id, func.sum(mov.c.cantidad))
+    if producto_id:
+        query = query.filter(mov.c.producto_id == producto_id)
+    return dict(query.group_by(mov.c.producto_id).all())
+
+
+def _snapshot(db: Session, fecha: date, producto_id: Optional[int] = None) -> dict:
+    query = db.query(SnapshotStock.producto_id, SnapshotStock.stock).filter(SnapshotStock.fecha == fecha)
+    if producto_id:
+        query = query.filter(SnapshotStock.producto_id == producto_id)
+    return dict(query.all())
+
+
+#snapshots
+def generar_snapshots(db: Session, hasta: Optional[date] = None) -> int:
+    """
+    Completa los snapshots diarios hasta `hasta` (ayer por defecto) partiendo del
+    ultimo existente y sumando solo los movimientos de cada dia
+    """
+    hasta = hasta or date.today() - timedelta(days=1)
+    ultimo = db.query(func.max(SnapshotStock.fecha)).scalar()
+    if ultimo is not None and ultimo >= hasta:
+        return 0
+
+    productos = db.query(Producto.id_producto, Producto.stock_actual).all()
+
+    if ultimo is None:
+        #primer snapshot: se descuenta del stock actual lo que se movio despues de `hasta`
+        posteriores = _neto_por_producto(db, hasta, None)
+        stock = {p.id_producto: p.stock_actual - posteriores.get(p.id_producto, 0) for p in productos}
+        dias = [hasta]
+        por_dia = {}
+    else:
+        stock = {p.id_producto: Decimal("0") for p in productos}
+        stock.update(dict(
+            db.query(SnapshotStock.producto_id, SnapshotStock.stock)
+            .filter(SnapshotStock.fecha == ultimo).all()
+        ))
+        mov = _movimientos(ultimo, hasta)
+        por_dia = defaultdict(dict)
+        for producto_id, dia, neto in db.query(mov.c.producto_id, mov.c.dia, func.sum(mov.c.cantidad))\
+                .group_by(mov.c.producto_id, mov.c.dia).all():
+            por_dia[dia][producto_id] = neto
+        dias = [ultimo + timedelta(days=i) for i in range(1, (hasta - ultimo).days + 1)]
+
+    filas = []
+    for dia in dias:
+        for producto_id, neto in por_dia.get(dia, {}).items():
+            stock[producto_id] = stock.get(producto_id, Decimal("0")) + neto
+        filas.extend({"fecha": dia, "producto_id": p, "stock": s} for p, s in stock.items())
+
+    if filas:
+        db.execute(insert(SnapshotStock), filas)
+
+    #los lotes solo se pueden fotografiar en su estado actual
+    db.execute(
+        insert(SnapshotStockLote).from_select(
+            ["fecha", "stocklote_id", "producto_id", "cantidad"],
+            select(
+                literal(hasta, Date), StockLote.id_stocklote, StockLote.producto_id, StockLote.cantidad_disponible
+            ).where(StockLote.cantidad_disponible > 0)
+        )
+    )
+    db.commit()
+    return len(dias)
+
+
+#consultas
+def get_stock_a_fecha(db: Session, fecha: date, producto_id: Optional[int] = None) -> dict:
+    """
+    Stock al cierre de `fecha`: snapshot anterior mas cercano + movimientos desde entonces.
+    Antes del primer snapshot se parte del siguiente y se restan los movimientos intermedios
+    """
+    productos_q = db.query(Producto.id_producto, Producto.nombre_producto, Producto.stock_actual)
+    if producto_id:
+        productos_q = productos_q.filter(Producto.id_producto == producto_id)
+    productos = productos_q.order_by(Producto.nombre_producto).all()
+
+    fecha_snapshot = None
+    if fecha >= date.today():
+        stock = {p.id_producto: p.stock_actual for p in productos}
+    else:
+        fecha_snapshot = db.query(func.max(SnapshotStock.fecha)).filter(SnapshotStock.fecha <= fecha).scalar()
+
+        if fecha_snapshot is None:
+            fecha_snapshot = db.query(func.min(SnapshotStock.fecha)).filter(SnapshotStock.fecha > fecha).scalar()
+
+        if fecha_snapshot is None:
+            #sin ningun snapshot se retrocede desde el stock actual
+            posteriores = _neto_por_producto(db, fecha, None, producto_id)
+            stock = {p.id_producto: p.stock_actual - posteriores.get(p.id_producto, 0) for p in productos}
+        elif fecha_snapshot > fecha:
+            #fecha anterior al primer snapshot: solo los movimientos entre fecha y ese snapshot
+            base = _snapshot(db, fecha_snapshot, producto_id)
+            posteriores = _neto_por_producto(db, fecha, fecha_snapshot, producto_id)
+            stock = {
+                p.id_producto: base.get(p.id_producto, Decimal("0")) - posteriores.get(p.id_producto, 0)
+                for p in productos
+            }
+        else:
+            base = _snapshot(db, fecha_snapshot, producto_id)
+            delta = _neto_por_producto(db, fecha_snapshot, fecha, producto_id) if fecha_snapshot < fecha else {}
+            stock = {
+                p.id_producto: base.get(p.id_producto, Decimal("0")) + delta.get(p.id_producto, 0)
+                for p in productos
+            }
+
+    return {
+        "fecha": fecha,
+        "fecha_snapshot": fecha_snapshot,
+        "productos": [
+            {"producto_id": p.id_producto, "nombre_producto": p.nombre_producto, "stock": stock[p.id_producto]}
+            for p in productos
+        ],
+    }
+
+
+def get_lotes_a_fecha(db: Session, fecha: date, producto_id: Optional[int] = None) -> dict:
+    """
+    Lotes del snapshot mas cercano anterior o igual a `fecha` (o los actuales si es hoy)
+    """
+    if fecha >= date.today():
+        fecha_snapshot = None
+        query = db.query(
+            StockLote.id_stocklote, StockLote.producto_id, StockLote.lote,
+            StockLote.fecha_caducidad, StockLote.cantidad_disponible.label("cantidad")
+        ).filter(StockLote.cantidad_disponible > 0)
+    else:
+        fecha_snapshot = db.query(func.max(SnapshotStockLote.fecha))\
+            .filter(SnapshotStockLote.fecha <= fecha).scalar()
+        query = db.query(
+            StockLote.id_stocklote, StockLote.producto_id, StockLote.lote,
+            StockLote.fecha_caducidad, SnapshotStockLote.cantidad
+        ).join(StockLote, SnapshotStockLote.stocklote_id == StockLote.id_stocklote)\
+         .filter(SnapshotStockLote.fecha == fecha_snapshot)
+
+    if producto_id:
+        query = query.filter(StockLote.producto_id == producto_id)
+
+    lotes = [] if fecha < date.today() and fecha_snapshot is None else query.order_by(
+        StockLote.producto_id, StockLote.fecha_caducidad
+    ).all()
+
+    return {
+        "fecha": fecha,
+        "fecha_snapshot": fecha_snapshot,
+        "lotes": [
+            {
+                "stocklote_id": l.id_stocklote,
+                "producto_id": l.producto_id,
+                "lote": l.lote,
+                "fecha_caducidad": l.fecha_caducidad,
+                "cantidad": l.cantidad,
+            }
+            for l in lotes
+        ],
+    }
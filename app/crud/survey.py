@@ -1,9 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, delete
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from typing import List, Optional
 
 
+from app.core import encuesta_conteo
 from app.models.survey import Encuesta, PreguntaEncuesta, OpcionEncuesta, ParticipacionEncuesta, RespuestaUsuario
 
 from app.schemas.survey import (
@@ -11,7 +13,7 @@ from app.schemas.survey import (
     PreguntaEncuestaCreate, PreguntaEncuestaUpdate,
     OpcionEncuestaCreate, OpcionEncuestaUpdate,
     ParticipacionCreate, ParticipacionUpdate,
-    RespuestaCreate, RespuestaUpdate
+    RespuestaCreate, RespuestaUpdate, EnvioEncuestaCreate
 )
 
 
@@ -27,32 +29,42 @@ def create_encuesta(db: Session, encuesta_in: EncuestaCreate, usuario_id: int) -
     db.add(encuesta)
     db.flush()
 
-    if encuesta_in.preguntas:
-        for pregunta_in in encuesta_in.preguntas:
-            pregunta = PreguntaEncuesta(
-                encuesta_id=encuesta.id_encuesta,
-                texto_pregunta=pregunta_in.texto_pregunta,
-                es_opcion_unica=pregunta_in.es_opcion_unica, 
-                orden=pregunta_in.orden
-            )
-            db.add(pregunta)
-            db.flush()
-
-            if pregunta.es_opcion_unica and pregunta_in.opciones:
-                for opcion_in in pregunta_in.opciones:
-                    opcion = OpcionEncuesta(
-                        pregunta_id=pregunta.id_pregunta,
-                        texto_opcion=opcion_in.texto_opcion,
-                        orden=opcion_in.orden
-                    )
-                    db.add(opcion)
+    #un INSERT multi-fila para las preguntas y otro para todas las opciones
+    preguntas_in = encuesta_in.preguntas or []
+    if preguntas_in:
+        pregunta_ids = db.scalars(
+            insert(PreguntaEncuesta).returning(PreguntaEncuesta.id_pregunta, sort_by_parameter_order=True),
+            [
+                {
+                    "encuesta_id": encuesta.id_encuesta,
+                    "texto_pregunta": p.texto_pregunta,
+                    "es_opcion_unica": p.es_opcion_unica,
+                    "orden": p.orden,
+                }
+                for p in preguntas_in
+            ]
+        ).all()
+
+        opciones = [
+            {"pregunta_id": pregunta_id, "texto_opcion": o.texto_opcion, "orden": o.orden}
+            for pregunta_id, p in zip(pregunta_ids, preguntas_in)
+            if p.es_opcion_unica and p.opciones
+            for o in p.opciones
+        ]
+        if opciones:
+            db.execute(insert(OpcionEncuesta), opciones)
+
     db.commit()
-    db.refresh(encuesta)
-    return encuesta
+    return get_encuesta_completa(db, encuesta.id_encuesta)
 
 def get_encuesta(db: Session, encuesta_id: int) -> Optional[Encuesta]:
     return db.query(Encuesta).filter(Encuesta.id_encuesta == encuesta_id).first()
 
+def get_encuesta_completa(db: Session, encuesta_id: int) -> Optional[Encuesta]:
+    return db.query(Encuesta).options(
+        selectinload(Encuesta.preguntas).selectinload(PreguntaEncuesta.opciones)
+    ).filter(Encuesta.id_encuesta == encuesta_id).first()
+
 def list_encuestas(db: Session, skip: int = 0, limit: int = 100) -> List[Encuesta]:
     return db.query(Encuesta).offset(skip).limit(limit).all()
 
@@ -74,6 +86,7 @@ def delete_encuesta(db: Session, encuesta_id: int) -> bool:
 
     db.delete(encuesta)
     db.commit()
+    encuesta_conteo.descartar(encuesta_id)
     return True
 
 
@@ -164,7 +177,11 @@ def create_participacion(db: Session, participacion_in: ParticipacionEncuesta, u
         completada=False 
     )
     db.add(participacion)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("El usuario ya ha iniciado una participacion en esta encuesta")
     db.refresh(participacion)
     return participacion
 
@@ -175,21 +192,42 @@ def update_participacion(db: Session, participacion_id: int, participacion_in: P
     participacion = get_participacion(db, participacion_id)
     if not participacion:
         return None
+    completada_antes = participacion.completada
     update_data = participacion_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(participacion, field, value)
     db.commit()
     db.refresh(participacion)
+    if participacion.completada != completada_antes:
+        _contar_participacion(db, participacion, 1 if participacion.completada else -1)
     return participacion
 
 def delete_participacion(db: Session, participacion_id: int) -> bool:
     participacion = get_participacion(db, participacion_id)
     if not participacion:
         return False
+    encuesta_id, completada = participacion.encuesta_id, participacion.completada
+    opciones = _opciones_respondidas(db, participacion_id) if completada else []
     db.delete(participacion)
     db.commit()
+    if completada:
+        encuesta_conteo.aplicar(encuesta_id, encuesta_conteo.deltas_respuestas(opciones, -1), participaciones=-1)
     return True
 
+def _opciones_respondidas(db: Session, participacion_id: int) -> List[Optional[int]]:
+    return [o for (o,) in db.query(RespuestaUsuario.opcion_id).filter(RespuestaUsuario.participacion_id == participacion_id).all()]
+
+def _contar_participacion(db: Session, participacion: ParticipacionEncuesta, signo: int) -> None:
+    """
+    Al completarse (o reabrirse) una participacion sus respuestas entran (o salen) de los conteos
+    """
+    opciones = _opciones_respondidas(db, participacion.id_participacion)
+    encuesta_conteo.aplicar(
+        participacion.encuesta_id,
+        encuesta_conteo.deltas_respuestas(opciones, signo),
+        participaciones=signo
+    )
+
 #prueba
 def list_user_participaciones(db: Session, usuario_id: int, skip: int = 0, limit: int = 100) -> List[ParticipacionEncuesta]:
     return (
@@ -200,47 +238,32 @@ def list_user_participaciones(db: Session, usuario_id: int, skip: int = 0, limit
         .all()
     )
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from collections import defaultdict
 from typing import Optional
 
 def get_survey_stats(db: Session, encuesta_id: int):
-    encuesta = db.query(Encuesta).filter(Encuesta.id_encuesta == encuesta_id).first()
+    encuesta = db.query(Encuesta.id_encuesta).filter(Encuesta.id_encuesta == encuesta_id).first()
     if not encuesta:
         return None
 
-    total_participaciones_completadas = db.query(ParticipacionEncuesta).filter(
-        ParticipacionEncuesta.encuesta_id == encuesta_id,
-        ParticipacionEncuesta.completada == True
-    ).count()
+    #conteos mantenidos en cada escritura (app/core/encuesta_conteo.py)
+    total_participaciones_completadas, conteos = encuesta_conteo.leer(db, encuesta_id)
 
     if total_participaciones_completadas == 0:
         return {
             "total_participaciones": 0,
             "estadisticas_preguntas": {}
         }
-    
-    stats_query = db.query(
+
+    estructura = db.query(
         PreguntaEncuesta.id_pregunta.label('pregunta_id'),
         PreguntaEncuesta.texto_pregunta.label('pregunta_texto'),
         OpcionEncuesta.id_opcion.label('opcion_id'),
-        OpcionEncuesta.texto_opcion.label('opcion_texto'),
-        func.count(RespuestaUsuario.id_respuesta).label('conteo_respuestas')
+        OpcionEncuesta.texto_opcion.label('opcion_texto')
     ).outerjoin(
         OpcionEncuesta, PreguntaEncuesta.id_pregunta == OpcionEncuesta.pregunta_id
-    ).outerjoin(
-        RespuestaUsuario, 
-        RespuestaUsuario.opcion_id == OpcionEncuesta.id_opcion
-    ).outerjoin(
-        ParticipacionEncuesta, 
-        (RespuestaUsuario.participacion_id == ParticipacionEncuesta.id_participacion) & (ParticipacionEncuesta.completada == True)
     ).filter(
         PreguntaEncuesta.encuesta_id == encuesta_id
-    ).group_by(
-        PreguntaEncuesta.id_pregunta,
-        PreguntaEncuesta.texto_pregunta,
-        OpcionEncuesta.id_opcion,
-        OpcionEncuesta.texto_opcion
     ).all()
 
     estadisticas_preguntas = defaultdict(lambda: {
@@ -248,14 +271,14 @@ def get_survey_stats(db: Session, encuesta_id: int):
         'opciones': {}
     })
     
-    for row in stats_query:
+    for row in estructura:
         pregunta_id = str(row.pregunta_id)
         opcion_id = str(row.opcion_id)
         
         estadisticas_preguntas[pregunta_id]['texto_pregunta'] = row.pregunta_texto
         estadisticas_preguntas[pregunta_id]['opciones'][opcion_id] = {
             'texto_opcion': row.opcion_texto,
-            'conteo_respuestas': row.conteo_respuestas or 0
+            'conteo_respuestas': conteos.get(row.opcion_id, 0)
         }
     
     return {
@@ -286,6 +309,8 @@ def create_respuesta(db: Session, respuesta_in: RespuestaCreate, usuario_id: int
     db.add(respuesta)
     db.commit()
     db.refresh(respuesta)
+    if participacion.completada and respuesta.opcion_id:
+        encuesta_conteo.aplicar(participacion.encuesta_id, {respuesta.opcion_id: 1})
     return respuesta
 
 def get_respuesta(db: Session, respuesta_id: int) -> Optional[RespuestaUsuario]:
@@ -295,17 +320,120 @@ def update_respuesta(db: Session, respuesta_id: int, respuesta_in: RespuestaUpda
     respuesta = get_respuesta(db, respuesta_id)
     if not respuesta:
         return None
+    opcion_antes = respuesta.opcion_id
     update_data = respuesta_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(respuesta, field, value)
     db.commit()
     db.refresh(respuesta)
+    participacion = respuesta.participacion
+    if participacion.completada and respuesta.opcion_id != opcion_antes:
+        deltas = {}
+        if opcion_antes:
+            deltas[opcion_antes] = -1
+        if respuesta.opcion_id:
+            deltas[respuesta.opcion_id] = 1
+        encuesta_conteo.aplicar(participacion.encuesta_id, deltas)
     return respuesta
 
 def delete_respuesta(db: Session, respuesta_id: int) -> bool:
     respuesta = get_respuesta(db, respuesta_id)
     if not respuesta:
         return False
+    participacion = respuesta.participacion
+    encuesta_id, completada, opcion_id = participacion.encuesta_id, participacion.completada, respuesta.opcion_id
     db.delete(respuesta)
     db.commit()
-    return True
\ No newline at end of file
+    if completada and opcion_id:
+        encuesta_conteo.aplicar(encuesta_id, {opcion_id: -1})
+    return True
+
+def enviar_encuesta(db: Session, encuesta_id: int, envio_in: EnvioEncuestaCreate, usuario_id: int) -> ParticipacionEncuesta:
+    """
+    Valida todas las respuestas con una sola consulta de preguntas/opciones, las
+    inserta en un INSERT multi-fila y marca la participacion como completada
+    """
+    encuesta = get_encuesta(db, encuesta_id)
+    if not encuesta:
+        raise ValueError("Encuesta no encontrada")
+    if not encuesta.is_active:
+        raise ValueError("La encuesta no esta activa")
+    if not envio_in.respuestas:
+        raise ValueError("Se debe enviar al menos una respuesta")
+
+    estructura = db.query(
+        PreguntaEncuesta.id_pregunta, PreguntaEncuesta.es_opcion_unica, OpcionEncuesta.id_opcion
+    ).outerjoin(
+        OpcionEncuesta, PreguntaEncuesta.id_pregunta == OpcionEncuesta.pregunta_id
+    ).filter(PreguntaEncuesta.encuesta_id == encuesta_id).all()
+
+    preguntas = {}
+    for pregunta_id, es_opcion_unica, opcion_id in estructura:
+        _, opciones = preguntas.setdefault(pregunta_id, (es_opcion_unica, set()))
+        if opcion_id is not None:
+            opciones.add(opcion_id)
+
+    respondidas = set()
+    for r in envio_in.respuestas:
+        if r.pregunta_id not in preguntas:
+            raise ValueError(f"La pregunta {r.pregunta_id} no pertenece a esta encuesta")
+        if r.pregunta_id in respondidas:
+            raise ValueError(f"La pregunta {r.pregunta_id} tiene mas de una respuesta")
+        respondidas.add(r.pregunta_id)
+
+        es_opcion_unica, opciones = preguntas[r.pregunta_id]
+        if r.opcion_id:
+            if not es_opcion_unica:
+                raise ValueError("No se puede dar una opcion como respuesta a una pregunta de texto")
+            if r.opcion_id not in opciones:
+                raise ValueError("La opcion proporcionada no es valida para esta pregunta")
+        elif es_opcion_unica:
+            raise ValueError("No se puede dar una respuesta de texto a una pregunta de opcion multiple")
+
+    participacion = db.query(ParticipacionEncuesta).filter_by(
+        encuesta_id=encuesta_id,
+        usuario_id=usuario_id
+    ).with_for_update().first()
+
+    if participacion and participacion.completada:
+        raise ValueError("El usuario ya completo esta encuesta")
+
+    if participacion:
+        #una participacion iniciada por el flujo anterior: el envio reemplaza sus respuestas
+        db.execute(delete(RespuestaUsuario).where(RespuestaUsuario.participacion_id == participacion.id_participacion))
+        participacion.fecha_participacion = datetime.utcnow()
+        participacion.completada = True
+    else:
+        participacion = ParticipacionEncuesta(
+            encuesta_id=encuesta_id,
+            usuario_id=usuario_id,
+            fecha_participacion=datetime.utcnow(),
+            completada=True
+        )
+        db.add(participacion)
+    try:
+        db.flush()
+    except IntegrityError:
+        #otro envio del mismo usuario creo la participacion primero
+        db.rollback()
+        raise ValueError("El usuario ya completo esta encuesta")
+
+    db.execute(insert(RespuestaUsuario), [
+        {
+            "participacion_id": participacion.id_participacion,
+            "pregunta_id": r.pregunta_id,
+            "opcion_id": r.opcion_id,
+            "respuesta_texto": r.respuesta_texto,
+        }
+        for r in envio_in.respuestas
+    ])
+    db.commit()
+
+    encuesta_conteo.aplicar(
+        encuesta_id,
+        encuesta_conteo.deltas_respuestas((r.opcion_id for r in envio_in.respuestas), 1),
+        participaciones=1
+    )
+    return db.query(ParticipacionEncuesta).options(
+        selectinload(ParticipacionEncuesta.respuestas)
+    ).filter(ParticipacionEncuesta.id_participacion == participacion.id_participacion).first()
\ No newline at end of file
@@ -1,14 +1,17 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session, Query, joinedload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 
 from app.models.tarea import (
     TipoTarea, TareaRecurrente, Tarea,
-    RegistroAlimentacion, DetalleAlimentacion
+    RegistroAlimentacion, DetalleAlimentacion,
+    ConsumoAlimentacionDiario, ResumenApetito
 )
 from app.models.animal import Animal, Habitat
+from app.models.inventario import Producto, UnidadMedida
 from app.models.user import User
 from app.core.enums import UserRole
 
@@ -21,6 +24,7 @@ from app.schemas.tarea import (
 from app.schemas.transacciones import DetalleSalidaCreate
 
 from app.crud.transacciones import _procesar_salida_transaccional
+from app.core.apetito import registrar_consumo
 
 #TIPO TAREA
 def get_tipo_tarea(db: Session, id: int) -> Optional[TipoTarea]:
@@ -172,16 +176,7 @@ def get_tareas_query(
         joinedload(Tarea.usuario_asignado),
         joinedload(Tarea.animal),
         joinedload(Tarea.habitat)
-    )
-
-    if is_completed is not None:
-        query = query.filter(Tarea.is_completed == is_completed)
-    if usuario_asignado_id is not None:
-        query = query.filter(Tarea.usuario_asignado_id == usuario_asignado_id)
-    if sin_asignar is True:
-        query = query.filter(Tarea.usuario_asignado_id == None)
-    if fecha_programada is not None:
-        query = query.filter(Tarea.fecha_programada == fecha_programada)
+    ).filter(*filtros_tareas(is_completed, usuario_asignado_id, sin_asignar, fecha_programada))
 
     return query.order_by(
         Tarea.fecha_programada.asc(), 
@@ -189,6 +184,30 @@ def get_tareas_query(
         Tarea.titulo.asc()
     )
 
+def filtros_tareas(
+    is_completed: Optional[bool] = None,
+    usuario_asignado_id: Optional[int] = None,
+    sin_asignar: Optional[bool] = None,
+    fecha_programada: Optional[date] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
+) -> list:
+    #compartidos con la exportacion (app/crud/exportacion.py)
+    filtros = []
+    if is_completed is not None:
+        filtros.append(Tarea.is_completed == is_completed)
+    if usuario_asignado_id is not None:
+        filtros.append(Tarea.usuario_asignado_id == usuario_asignado_id)
+    if sin_asignar is True:
+        filtros.append(Tarea.usuario_asignado_id == None)
+    if fecha_programada is not None:
+        filtros.append(Tarea.fecha_programada == fecha_programada)
+    if fecha_desde is not None:
+        filtros.append(Tarea.fecha_programada >= fecha_desde)
+    if fecha_hasta is not None:
+        filtros.append(Tarea.fecha_programada <= fecha_hasta)
+    return filtros
+
 def get_tarea(db: Session, id_tarea: int) -> Optional[Tarea]:
     return db.query(Tarea).options(
         joinedload(Tarea.tipo_tarea),
@@ -197,6 +216,19 @@ def get_tarea(db: Session, id_tarea: int) -> Optional[Tarea]:
         joinedload(Tarea.habitat)
     ).filter(Tarea.id_tarea == id_tarea).first()
 
+def es_tarea_alimentacion(tipo_tarea_id: int, nombre_tipo_tarea: Optional[str]) -> bool:
+    return tipo_tarea_id == 1 or "alimentacion" in str(nombre_tipo_tarea).lower()
+
+def get_tareas_destino(db: Session, ids_tarea: List[int]) -> Dict[int, object]:
+    #solo columnas, sin cargar los objetos relacionados
+    rows = db.query(
+        Tarea.id_tarea,
+        Tarea.animal_id,
+        Tarea.tipo_tarea_id,
+        TipoTarea.nombre_tipo_tarea
+    ).join(Tarea.tipo_tarea).filter(Tarea.id_tarea.in_(ids_tarea)).all()
+    return {r.id_tarea: r for r in rows}
+
 def asignar_tarea(db: Session, db_tarea: Tarea, db_usuario_asignar: User) -> Tarea:
     if db_tarea.usuario_asignado_id is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Esta tarea ya ha sido asignada")
@@ -312,6 +344,12 @@ def completar_tarea_alimentacion(
         ]
         db.add_all(detalles_log_objects)
 
+        #acumulado diario para el analisis de apetito
+        habitat_acumulado = target_habitat_id
+        if habitat_acumulado is None and target_animal_id is not None:
+            habitat_acumulado = db.query(Animal.habitat_id).filter(Animal.id_animal == target_animal_id).scalar()
+        registrar_consumo(db, date.today(), target_animal_id, habitat_acumulado, payload.detalles)
+
         #actuliazar tarea
         db_tarea.is_completed = True
         db_tarea.fecha_completada = datetime.now()
@@ -399,4 +437,55 @@ def completar_tarea_tratamiento(
     except Exception as e:
         db.rollback()
         print(f"Error crítico completando tratamiento: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor")
+
+#APETITO
+
+def get_alertas_apetito_query(db: Session) -> Query:
+    return db.query(ResumenApetito).options(
+        joinedload(ResumenApetito.animal).joinedload(Animal.especie),
+        joinedload(ResumenApetito.animal).joinedload(Animal.habitat),
+    ).filter(ResumenApetito.alerta == True).order_by(ResumenApetito.caida_pct.desc())
+
+def get_desperdicio_por_habitat(db: Session, desde: date, hasta: date) -> List[dict]:
+    """
+    Entregado vs consumido por habitat y producto sobre el acumulado diario
+    (cada producto en su unidad, no se suman kilos con unidades)
+    """
+    c = ConsumoAlimentacionDiario
+    filas = db.query(
+        Habitat.id_habitat.label("habitat_id"),
+        Habitat.nombre_habitat,
+        Producto.id_producto.label("producto_id"),
+        Producto.nombre_producto,
+        UnidadMedida.abreviatura.label("unidad"),
+        func.sum(c.cantidad_entregada).label("cantidad_entregada"),
+        func.sum(c.entregada_con_consumo).label("entregada_con_consumo"),
+        func.sum(c.cantidad_consumida).label("cantidad_consumida"),
+        func.sum(c.registros).label("registros"),
+    ).join(Habitat, c.habitat_id == Habitat.id_habitat)\
+     .join(Producto, c.producto_id == Producto.id_producto)\
+     .join(UnidadMedida, Producto.unidad_medida_id == UnidadMedida.id_unidad)\
+     .filter(c.fecha >= desde, c.fecha <= hasta)\
+     .group_by(Habitat.id_habitat, Producto.id_producto, UnidadMedida.abreviatura)\
+     .all()
+
+    resultado = []
+    for f in filas:
+        desperdicio = f.entregada_con_consumo - f.cantidad_consumida
+        resultado.append({
+            "habitat_id": f.habitat_id,
+            "nombre_habitat": f.nombre_habitat,
+            "producto_id": f.producto_id,
+            "nombre_producto": f.nombre_producto,
+            "unidad": f.unidad,
+            "cantidad_entregada": f.cantidad_entregada,
+            "entregada_con_consumo": f.entregada_con_consumo,
+            "cantidad_consumida": f.cantidad_consumida,
+            "desperdicio": desperdicio,
+            "desperdicio_pct": round(float(desperdicio / f.entregada_con_consumo * 100), 2) if f.entregada_con_consumo else None,
+            "registros": f.registros,
+        })
+
+    resultado.sort(key=lambda r: (r["desperdicio_pct"] is None, -(r["desperdicio_pct"] or 0)))
+    return resultado
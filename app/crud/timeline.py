@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, union_all, literal, func, tuple_, String, Integer, cast
+from sqlalchemy.orm import Session
+
+from app.core.paginacion import encode_cursor, decode_cursor
+from app.models import veterinario as models_vet
+from app.models.tarea import RegistroAlimentacion, Tarea
+from app.models.inventario import Producto, Salida, DetalleSalida
+
+TIPOS_TIMELINE = (
+    "historial", "receta", "procedimiento", "resultado_examen", "alimentacion", "tarea", "consumo"
+)
+
+
+def _rama(tipo: str, animal_id: int):
+    """
+    Select de cada fuente con columnas comunes: tipo, id, fecha, titulo, detalle, historial_id
+    """
+    hm = models_vet.HistorialMedico
+
+    if tipo == "historial":
+        return select(
+            hm.id_historial.label("id"), hm.fecha_atencion.label("fecha"),
+            func.coalesce(hm.diagnostico_definitivo, hm.diagnostico_presuntivo, "Atencion veterinaria").label("titulo"),
+            hm.anamnesis.label("detalle"), hm.id_historial.label("historial_id"),
+        ).where(hm.animal_id == animal_id), hm.fecha_atencion, hm.id_historial
+
+    if tipo == "receta":
+        r = models_vet.RecetaMedica
+        return select(
+            r.id_receta.label("id"), r.created_at.label("fecha"),
+            Producto.nombre_producto.label("titulo"),
+            func.concat(r.dosis, " - ", r.frecuencia, " por ", r.duracion_dias, " dias").label("detalle"),
+            r.historial_medico_id.label("historial_id"),
+        ).join(hm, r.historial_medico_id == hm.id_historial)\
+         .join(Producto, r.producto_id == Producto.id_producto)\
+         .where(hm.animal_id == animal_id), r.created_at, r.id_receta
+
+    if tipo == "procedimiento":
+        p = models_vet.ProcedimientoMedico
+        return select(
+            p.id_procedimiento.label("id"), p.created_at.label("fecha"),
+            p.nombre.label("titulo"), p.descripcion.label("detalle"),
+            p.historial_medico_id.label("historial_id"),
+        ).join(hm, p.historial_medico_id == hm.id_historial)\
+         .where(hm.animal_id == animal_id), p.created_at, p.id_procedimiento
+
+    if tipo == "resultado_examen":
+        re, oe, te = models_vet.ResultadoExamen, models_vet.OrdenExamen, models_vet.TipoExamen
+        return select(
+            re.id_resultado.label("id"), re.fecha_resultado.label("fecha"),
+            te.nombre_tipo_examen.label("titulo"), re.conclusiones.label("detalle"),
+            oe.historial_medico_id.label("historial_id"),
+        ).join(oe, re.orden_examen_id == oe.id_orden)\
+         .join(te, oe.tipo_examen_id == te.id_tipo_examen)\
+         .join(hm, oe.historial_medico_id == hm.id_historial)\
+         .where(hm.animal_id == animal_id, re.fecha_resultado != None), re.fecha_resultado, re.id_resultado
+
+    if tipo == "alimentacion":
+        ra = RegistroAlimentacion
+        return select(
+            ra.id_registro_alimentacion.label("id"), ra.fecha_alimentacion.label("fecha"),
+            literal("Alimentacion").label("titulo"), ra.notas_observaciones.label("detalle"),
+            cast(None, Integer).label("historial_id"),
+        ).where(ra.animal_id == animal_id), ra.fecha_alimentacion, ra.id_registro_alimentacion
+
+    if tipo == "tarea":
+        return select(
+            Tarea.id_tarea.label("id"), Tarea.fecha_completada.label("fecha"),
+            Tarea.titulo.label("titulo"), Tarea.notas_completacion.label("detalle"),
+            cast(None, Integer).label("historial_id"),
+        ).where(
+            Tarea.animal_id == animal_id, Tarea.is_completed == True, Tarea.fecha_completada != None
+        ), Tarea.fecha_completada, Tarea.id_tarea
+
+    #consumo de inventario
+    return select(
+        DetalleSalida.id_detalle_salida.label("id"), Salida.fecha_salida.label("fecha"),
+        Producto.nombre_producto.label("titulo"),
+        cast(DetalleSalida.cantidad_salida, String).label("detalle"),
+        cast(None, Integer).label("historial_id"),
+    ).join(Salida, DetalleSalida.salida_id == Salida.id_salida)\
+     .join(Producto, DetalleSalida.producto_id == Producto.id_producto)\
+     .where(DetalleSalida.animal_id == animal_id), Salida.fecha_salida, DetalleSalida.id_detalle_salida
+
+
+def get_timeline_animal(
+    db: Session,
+    animal_id: int,
+    tipos: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    limite: int = 30
+) -> dict:
+    """
+    Linea de tiempo del animal: UNION ALL de todas las fuentes ordenado por fecha,
+    paginado por cursor (fecha, tipo, id). Cada rama ya viene cortada al limite
+    """
+    tipos = [t for t in TIPOS_TIMELINE if not tipos or t in tipos]
+
+    cursor_valores = None
+    if cursor:
+        cursor_valores = decode_cursor(cursor, datetime, str, int)
+        if cursor_valores[1] not in TIPOS_TIMELINE:
+            raise HTTPException(status_code=400, detail="Cursor invalido")
+
+    ramas = []
+    for tipo in tipos:
+        rama, fecha_col, id_col = _rama(tipo, animal_id)
+        rama = rama.add_columns(literal(tipo).label("tipo"))
+        if cursor_valores:
+            rama = rama.where(
+                tuple_(fecha_col, literal(tipo), id_col) < tuple_(*[literal(v) for v in cursor_valores])
+            )
+        sub = rama.order_by(fecha_col.desc(), id_col.desc()).limit(limite + 1).subquery()
+        ramas.append(select(sub.c.tipo, sub.c.id, sub.c.fecha, sub.c.titulo, sub.c.detalle, sub.c.historial_id))
+
+    if not ramas:
+        return {"items": [], "siguiente_cursor": None}
+
+    timeline = (union_all(*ramas) if len(ramas) > 1 else ramas[0]).subquery()
+    filas = db.execute(
+        select(timeline).order_by(timeline.c.fecha.desc(), timeline.c.tipo.desc(), timeline.c.id.desc())
+        .limit(limite + 1)
+    ).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = encode_cursor(ultima.fecha, ultima.tipo, ultima.id)
+
+    return {"items": filas, "siguiente_cursor": siguiente}
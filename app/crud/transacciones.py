@@ -4,7 +4,8 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, Query, status
 from datetime import date
 from decimal import Decimal
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.models.inventario import (
     Producto, StockLote, EntradaInventario, DetalleEntrada, 
@@ -21,28 +22,31 @@ from app.schemas.transacciones import (
 from app.crud.inventario import get_proveedor
 
 #helpers
-def _get_or_create_stock_lote(
+def _sumar_stock_lote(
     db: Session, 
     producto_id: int, 
     lote: str, 
-    fecha_caducidad: date
-) -> StockLote:
-
-    db_stock_lote = db.query(StockLote).filter(
-        StockLote.producto_id == producto_id,
-        StockLote.lote == lote,
-        StockLote.fecha_caducidad == fecha_caducidad
-    ).with_for_update().first()
-    
-    if not db_stock_lote:
-        db_stock_lote = StockLote(
-            producto_id=producto_id,
-            lote=lote,
-            fecha_caducidad=fecha_caducidad,
-            cantidad_disponible=Decimal("0.0")
-        )
-    
-    return db_stock_lote
+    fecha_caducidad: date,
+    cantidad: Decimal
+) -> int:
+    """
+    Suma la cantidad al lote, creandolo si no existe, en un solo INSERT ... ON CONFLICT
+    (dos entradas concurrentes del mismo lote nuevo no lo duplican)
+    """
+    stmt = pg_insert(StockLote).values(
+        producto_id=producto_id,
+        lote=lote,
+        fecha_caducidad=fecha_caducidad,
+        cantidad_disponible=cantidad
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_stock_lote_producto_lote_caducidad",
+        set_={
+            "cantidad_disponible": StockLote.cantidad_disponible + stmt.excluded.cantidad_disponible,
+            "updated_at": func.now()
+        }
+    ).returning(StockLote.id_stocklote)
+    return db.execute(stmt).scalar_one()
 
 #tiposalida
 def get_tipo_salida(db: Session, id: int) -> Optional[TipoSalida]:
@@ -103,32 +107,23 @@ def create_entrada_inventario(db: Session, entrada_in: EntradaInventarioCreate,
             proveedor_id=entrada_in.proveedor_id
         )
         db.add(db_entrada)
-        lotes_a_actualizar = []
-        productos_a_actualizar = []
+        cantidades_lote = {}
 
         #procesar las lineas
         for detalle_in in entrada_in.detalles:
             if detalle_in.cantidad_entrada <= 0:
                 raise ValueError("La cantidad de entrada debe ser positiva")
             
-            #obtener y bloquear el producto
+            #obtener el producto (sin bloquearlo, stock_actual lo mantiene el trigger de stock_lote)
             db_producto = db.query(Producto).filter(
                 Producto.id_producto == detalle_in.producto_id
-            ).with_for_update().first()
+            ).first()
             
             if not db_producto or not db_producto.is_active:
                 raise ValueError(
                     f"El Producto ID {detalle_in.producto_id} no existe o esta inactivo"
                 )
 
-            #Obtener o crear y bloquear el stockote
-            db_stock_lote = _get_or_create_stock_lote(
-                db,
-                producto_id=detalle_in.producto_id,
-                lote=detalle_in.lote,
-                fecha_caducidad=detalle_in.fecha_caducidad
-            )
-            
             #Crear detalleentrada
             db_detalle = DetalleEntrada(
                 entrada=db_entrada,
@@ -139,15 +134,12 @@ def create_entrada_inventario(db: Session, entrada_in: EntradaInventarioCreate,
             )
             db.add(db_detalle)
 
-            #actualizar stocks
-            db_stock_lote.cantidad_disponible += detalle_in.cantidad_entrada
-            db_producto.stock_actual += detalle_in.cantidad_entrada
-            
-            lotes_a_actualizar.append(db_stock_lote)
-            productos_a_actualizar.append(db_producto)
-        
-        db.add_all(lotes_a_actualizar)
-        db.add_all(productos_a_actualizar)
+            clave = (detalle_in.producto_id, detalle_in.lote, detalle_in.fecha_caducidad)
+            cantidades_lote[clave] = cantidades_lote.get(clave, Decimal("0")) + detalle_in.cantidad_entrada
+
+        #actualizar stock de los lotes, siempre en el mismo orden para no cruzar bloqueos con otra entrada
+        for (producto_id, lote, fecha_caducidad), cantidad in sorted(cantidades_lote.items()):
+            _sumar_stock_lote(db, producto_id, lote, fecha_caducidad, cantidad)
         
         # Confirmar transacciom
         db.commit() 
@@ -198,8 +190,6 @@ def _procesar_salida_transaccional(
         tipo_salida_id=tipo_salida_id,
     )
     
-    productos_a_actualizar = {} 
-    
     #procesar detalles
     for detalle_in in detalles:
         cantidad_a_descontar = detalle_in.cantidad_salida
@@ -208,13 +198,10 @@ def _procesar_salida_transaccional(
 
         db_producto = db.query(Producto).filter(
             Producto.id_producto == detalle_in.producto_id
-        ).with_for_update().first()
+        ).first()
 
         if not db_producto or not db_producto.is_active:
             raise ValueError(f"El Producto ID {detalle_in.producto_id} no existe o esta inactivo")
-        
-        if db_producto.stock_actual < cantidad_a_descontar:
-            raise ValueError(f"Stock insuficiente para '{db_producto.nombre_producto}'. Disponible: {db_producto.stock_actual}, Requerido: {cantidad_a_descontar}")
         #logica de destino
         db_animal = None
         db_habitat = None
@@ -229,7 +216,7 @@ def _procesar_salida_transaccional(
             if not db_habitat:
                 raise ValueError(f"El Habitat ID {detalle_in.habitat_id} no existe")
         
-        #FEFO
+        #FEFO (los lotes bloqueados son la fuente de verdad del stock)
         cantidad_restante_por_descontar = cantidad_a_descontar
         lotes_disponibles = db.query(StockLote).filter(
             StockLote.producto_id == detalle_in.producto_id,
@@ -239,7 +226,7 @@ def _procesar_salida_transaccional(
         total_stock_en_lotes = sum(lote.cantidad_disponible for lote in lotes_disponibles)
 
         if total_stock_en_lotes < cantidad_a_descontar:
-             raise ValueError(f"Stock inconsistente en lotes para '{db_producto.nombre_producto}'.")
+            raise ValueError(f"Stock insuficiente para '{db_producto.nombre_producto}'. Disponible: {total_stock_en_lotes}, Requerido: {cantidad_a_descontar}")
 
         for lote in lotes_disponibles:
             if cantidad_restante_por_descontar <= 0:
@@ -260,14 +247,8 @@ def _procesar_salida_transaccional(
             cantidad_salida=detalle_in.cantidad_salida
         )
         db.add(db_detalle)
-        
-        #Actualizar stock
-        if db_producto.id_producto not in productos_a_actualizar:
-            productos_a_actualizar[db_producto.id_producto] = db_producto
-        productos_a_actualizar[db_producto.id_producto].stock_actual -= detalle_in.cantidad_salida
 
     db.add(db_salida)
-    db.add_all(productos_a_actualizar.values())
     
     return db_salida
 
@@ -373,4 +354,22 @@ def get_salidas_inventario_query(
             get_sort_col(Salida.fecha_salida)
         )
 
-    return query
\ No newline at end of file
+    return query
+
+def get_reconciliacion_stock_query(db: Session) -> Query:
+    """
+    Productos cuyo stock_actual no coincide con la suma de sus lotes, en una sola consulta
+    """
+    stock_lotes = func.coalesce(func.sum(StockLote.cantidad_disponible), 0)
+    diferencia = Producto.stock_actual - stock_lotes
+
+    return db.query(
+        Producto.id_producto.label("producto_id"),
+        Producto.nombre_producto,
+        Producto.stock_actual,
+        stock_lotes.label("stock_lotes"),
+        diferencia.label("diferencia"),
+    ).outerjoin(StockLote, StockLote.producto_id == Producto.id_producto)\
+     .group_by(Producto.id_producto)\
+     .having(Producto.stock_actual != stock_lotes)\
+     .order_by(func.abs(diferencia).desc())
@@ -1,6 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, Query
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
+
+from app.core import ranking_trivia
 
 from app.models.trivia import Trivia, ParticipacionTrivia
 from app.schemas.trivia import TriviaCreate, ParticipacionTriviaCreate
@@ -23,8 +25,8 @@ def get_trivia(db: Session, trivia_id: int) -> Optional[Trivia]:
     return db.query(Trivia).filter(Trivia.id_trivia == trivia_id).first()
 
 
-def list_trivias(db: Session) -> List[Trivia]:
-    return db.query(Trivia).all()
+def get_trivias_query(db: Session) -> Query:
+    return db.query(Trivia).order_by(Trivia.fecha_trivia.desc(), Trivia.id_trivia.desc())
 
 
 def create_participacion_trivia(db: Session, participacion_in: ParticipacionTriviaCreate, usuario_id: int) -> ParticipacionTrivia:
@@ -37,8 +39,32 @@ def create_participacion_trivia(db: Session, participacion_in: ParticipacionTriv
     db.add(participacion)
     db.commit()
     db.refresh(participacion)
+    ranking_trivia.registrar(participacion.trivia_id, usuario_id, participacion.aciertos)
     return participacion
 
 
-def list_participaciones_trivia(db: Session, trivia_id: int) -> List[ParticipacionTrivia]:
-    return db.query(ParticipacionTrivia).filter(ParticipacionTrivia.trivia_id == trivia_id).all()
+def get_participaciones_trivia_query(db: Session, trivia_id: int) -> Query:
+    return db.query(ParticipacionTrivia).filter(ParticipacionTrivia.trivia_id == trivia_id)\
+        .order_by(ParticipacionTrivia.aciertos.desc(), ParticipacionTrivia.fecha_trivia)
+
+
+def get_ranking(db: Session, periodo: str, trivia_id: Optional[int], limite: int) -> dict:
+    entradas, total = ranking_trivia.top(db, periodo, trivia_id, limite)
+    return {
+        "periodo": periodo,
+        "trivia_id": trivia_id,
+        "total_participantes": total,
+        "entradas": ranking_trivia.con_usernames(db, entradas),
+    }
+
+
+def get_mi_posicion(db: Session, periodo: str, trivia_id: Optional[int], usuario_id: int, vecinos: int) -> dict:
+    propio, total, entradas = ranking_trivia.posicion(db, periodo, trivia_id, usuario_id, vecinos)
+    return {
+        "periodo": periodo,
+        "trivia_id": trivia_id,
+        "posicion": propio["posicion"] if propio else None,
+        "puntaje": propio["puntaje"] if propio else None,
+        "total_participantes": total,
+        "vecinos": ranking_trivia.con_usernames(db, entradas),
+    }
@@ -1,4 +1,7 @@
-from sqlalchemy.orm import Session, joinedload
+import html
+import json
+from sqlalchemy import Float, cast, func, select, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from typing import Optional, List
@@ -9,9 +12,10 @@ from app.models.animal import Animal
 from app.models.user import User
 from app.models.inventario import Producto, UnidadMedida
 from app.models.tarea import TareaRecurrente, Tarea
-from datetime import date
+from datetime import date, timedelta
 
 from app.schemas import veterinario as schemas_vet
+from app.core.paginacion import encode_cursor, decode_cursor
 
 #HELPERS
 
@@ -165,18 +169,178 @@ def create_historial(
     db.refresh(db_historial)
     return db_historial
 
+def _historial_detalle_options():
+    #selectinload en las colecciones: una consulta por coleccion en vez del producto cartesiano
+    hm = models_vet.HistorialMedico
+    return [
+        joinedload(hm.animal),
+        joinedload(hm.veterinario),
+        joinedload(hm.tipo_atencion),
+        selectinload(hm.recetas).options(
+            joinedload(models_vet.RecetaMedica.producto).options(
+                joinedload(Producto.tipo_producto),
+                joinedload(Producto.unidad_medida)
+            ),
+            joinedload(models_vet.RecetaMedica.unidad_medida),
+            joinedload(models_vet.RecetaMedica.usuario_asignado),
+        ),
+        selectinload(hm.ordenes_examen).options(
+            joinedload(models_vet.OrdenExamen.tipo_examen),
+            selectinload(models_vet.OrdenExamen.resultados),
+        ),
+        selectinload(hm.procedimientos),
+    ]
+
 def get_historial(db: Session, historial_id: int) -> Optional[models_vet.HistorialMedico]:
     return db.query(models_vet.HistorialMedico).options(
-        joinedload(models_vet.HistorialMedico.animal),
-        joinedload(models_vet.HistorialMedico.veterinario),
-        joinedload(models_vet.HistorialMedico.tipo_atencion),
-        joinedload(models_vet.HistorialMedico.recetas).joinedload(models_vet.RecetaMedica.producto),
-        joinedload(models_vet.HistorialMedico.recetas).joinedload(models_vet.RecetaMedica.unidad_medida),
-        joinedload(models_vet.HistorialMedico.recetas).joinedload(models_vet.RecetaMedica.usuario_asignado),
-        joinedload(models_vet.HistorialMedico.ordenes_examen).joinedload(models_vet.OrdenExamen.tipo_examen),
-        joinedload(models_vet.HistorialMedico.procedimientos),
+        *_historial_detalle_options()
     ).filter(models_vet.HistorialMedico.id_historial == historial_id).first()
 
+def ficha_clinica_context(historial: models_vet.HistorialMedico) -> dict:
+    """
+    Datos clinicos de la ficha (sin los datos del solicitante), serializables a json
+    """
+    animal = historial.animal
+    return {
+        "historial": {
+            "id": historial.id_historial,
+            "fecha": historial.fecha_atencion.strftime("%d/%m/%Y"),
+            "veterinario": historial.veterinario.email,
+            "anamnesis": historial.anamnesis,
+            "peso": historial.peso_actual,
+            "temperatura": historial.temperatura,
+            "fc": historial.frecuencia_cardiaca,
+            "fr": historial.frecuencia_respiratoria,
+            "observaciones_fisicas": historial.examen_fisico_obs,
+            "diagnostico_presuntivo": historial.diagnostico_presuntivo,
+            "diagnostico_definitivo": historial.diagnostico_definitivo
+        },
+        "animal": {
+            "nombre": animal.nombre_animal,
+            "especie": animal.especie.nombre_especie,
+            "sexo": "Macho" if animal.genero else "Hembra",
+            "edad": f"{animal.age} años" if animal.age else "Desc."
+        },
+        "recetas": [
+            {
+                "producto": r.producto.nombre_producto,
+                "dosis": r.dosis,
+                "unidad": r.unidad_medida.abreviatura if r.unidad_medida else "u",
+                "frecuencia": r.frecuencia,
+                "duracion": r.duracion_dias
+            }
+            for r in historial.recetas
+        ]
+    }
+
+def _get_snapshot(db: Session, historial_id: int) -> Optional[models_vet.HistorialSnapshot]:
+    return db.query(models_vet.HistorialSnapshot).filter(
+        models_vet.HistorialSnapshot.historial_id == historial_id
+    ).first()
+
+def guardar_snapshot_historial(db: Session, historial_id: int) -> Optional[models_vet.HistorialSnapshot]:
+    """
+    Congela el detalle de un historial cerrado. Si ya existe lo devuelve
+    """
+    snapshot = _get_snapshot(db, historial_id)
+    if snapshot:
+        return snapshot
+
+    historial = get_historial(db, historial_id)
+    if not historial or historial.estado:
+        return None
+
+    snapshot = models_vet.HistorialSnapshot(
+        historial_id=historial_id,
+        detalle_json=schemas_vet.HistorialMedicoOut.model_validate(historial).model_dump_json(),
+        ficha_json=json.dumps(ficha_clinica_context(historial), default=str),
+    )
+    db.add(snapshot)
+    try:
+        db.commit()
+    except IntegrityError:
+        #otro request lo guardo primero
+        db.rollback()
+        return _get_snapshot(db, historial_id)
+    return snapshot
+
+def get_historial_detalle_json(db: Session, historial_id: int) -> Optional[str]:
+    """
+    Detalle serializado: cerrados desde el snapshot (una lectura por clave),
+    abiertos desde la base
+    """
+    snapshot = _get_snapshot(db, historial_id)
+    if snapshot:
+        return snapshot.detalle_json
+
+    historial = get_historial(db, historial_id)
+    if not historial:
+        return None
+    if not historial.estado:
+        #cerrado antes de existir el snapshot
+        snapshot = guardar_snapshot_historial(db, historial_id)
+        if snapshot:
+            return snapshot.detalle_json
+    return schemas_vet.HistorialMedicoOut.model_validate(historial).model_dump_json()
+
+def get_ficha_clinica_context(db: Session, historial_id: int) -> Optional[dict]:
+    snapshot = _get_snapshot(db, historial_id)
+    if snapshot:
+        return json.loads(snapshot.ficha_json)
+
+    historial = get_historial(db, historial_id)
+    if not historial:
+        return None
+    if not historial.estado:
+        snapshot = guardar_snapshot_historial(db, historial_id)
+        if snapshot:
+            return json.loads(snapshot.ficha_json)
+    return ficha_clinica_context(historial)
+
+def get_fichas_clinicas_context(
+    db: Session,
+    animal_id: Optional[int] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    limite: Optional[int] = None
+) -> List[dict]:
+    """
+    Contextos de ficha de varios historiales por fecha de atencion: los cerrados
+    salen del snapshot en la misma consulta, el resto en un solo lote
+    """
+    hm = models_vet.HistorialMedico
+    query = db.query(hm.id_historial, models_vet.HistorialSnapshot.ficha_json)\
+        .outerjoin(models_vet.HistorialSnapshot, models_vet.HistorialSnapshot.historial_id == hm.id_historial)
+    if animal_id:
+        query = query.filter(hm.animal_id == animal_id)
+    if fecha_desde:
+        query = query.filter(hm.fecha_atencion >= datetime.combine(fecha_desde, datetime.min.time()))
+    if fecha_hasta:
+        query = query.filter(hm.fecha_atencion < datetime.combine(fecha_hasta + timedelta(days=1), datetime.min.time()))
+    query = query.order_by(hm.fecha_atencion.asc(), hm.id_historial.asc())
+    if limite:
+        query = query.limit(limite)
+    filas = query.all()
+
+    faltantes = [historial_id for historial_id, ficha_json in filas if ficha_json is None]
+    historiales = {}
+    if faltantes:
+        historiales = {
+            h.id_historial: h for h in db.query(hm).options(
+                joinedload(hm.animal).joinedload(Animal.especie),
+                joinedload(hm.veterinario),
+                selectinload(hm.recetas).options(
+                    joinedload(models_vet.RecetaMedica.producto),
+                    joinedload(models_vet.RecetaMedica.unidad_medida)
+                )
+            ).filter(hm.id_historial.in_(faltantes))
+        }
+
+    return [
+        json.loads(ficha_json) if ficha_json is not None else ficha_clinica_context(historiales[historial_id])
+        for historial_id, ficha_json in filas
+    ]
+
 def get_historiales_query(
     db: Session, 
     animal_id: Optional[int] = None, 
@@ -200,6 +364,67 @@ def get_historiales_query(
         
     return query.order_by(models_vet.HistorialMedico.fecha_atencion.desc())
 
+_MARCA_INICIO = "\x02"
+_MARCA_FIN = "\x03"
+
+def _resaltar(fragmento: Optional[str]) -> Optional[str]:
+    if fragmento is None:
+        return None
+    return html.escape(fragmento).replace(_MARCA_INICIO, "<mark>").replace(_MARCA_FIN, "</mark>")
+
+def buscar_historiales(
+    db: Session,
+    q: str,
+    cursor: Optional[str] = None,
+    limite: int = 20,
+    animal_id: Optional[int] = None
+) -> dict:
+    """
+    Busqueda de texto completo (espanol) sobre el historial clinico, ordenada por
+    relevancia con paginacion por cursor (rank, id)
+    """
+    hm = models_vet.HistorialMedico
+    consulta = func.websearch_to_tsquery("spanish", q)
+    #ts_rank_cd es real: se pasa a double (exacto) para que el rank del cursor compare igual
+    rank = cast(func.ts_rank_cd(hm.busqueda_clinica, consulta), Float(53))
+
+    pagina = select(hm.id_historial, rank.label("rank"))\
+        .where(hm.busqueda_clinica.op("@@")(consulta))
+    if animal_id:
+        pagina = pagina.where(hm.animal_id == animal_id)
+    if cursor:
+        cursor_rank, cursor_id = decode_cursor(cursor, float, int)
+        pagina = pagina.where(tuple_(rank, hm.id_historial) < tuple_(cursor_rank, cursor_id))
+    pagina = pagina.order_by(rank.desc(), hm.id_historial.desc()).limit(limite + 1).subquery()
+
+    #ts_headline es caro, solo se calcula para la pagina
+    texto = func.concat_ws(
+        " ", hm.diagnostico_presuntivo, hm.diagnostico_definitivo, hm.anamnesis, hm.examen_fisico_obs
+    )
+    #marcas de control en vez de html: el texto clinico se escapa antes de poner los <mark>
+    fragmento = func.ts_headline(
+        "spanish", texto, consulta,
+        f"StartSel={_MARCA_INICIO}, StopSel={_MARCA_FIN}, MaxFragments=2, MaxWords=25, MinWords=8"
+    )
+
+    filas = db.query(
+        hm.id_historial, hm.animal_id, Animal.nombre_animal, hm.fecha_atencion, hm.estado,
+        hm.diagnostico_presuntivo, hm.diagnostico_definitivo,
+        pagina.c.rank, fragmento.label("fragmento")
+    ).join(pagina, pagina.c.id_historial == hm.id_historial)\
+     .join(Animal, hm.animal_id == Animal.id_animal)\
+     .order_by(pagina.c.rank.desc(), hm.id_historial.desc())\
+     .all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = encode_cursor(float(ultima.rank), ultima.id_historial)
+
+    items = [{**fila._asdict(), "fragmento": _resaltar(fila.fragmento)} for fila in filas]
+    return {"items": items, "siguiente_cursor": siguiente}
+
 def update_historial(
     db: Session, 
     db_historial: models_vet.HistorialMedico, 
@@ -217,6 +442,10 @@ def update_historial(
     db.add(db_historial)
     db.commit()
     db.refresh(db_historial)
+
+    if not db_historial.estado:
+        #al cerrarse ya no cambia mas, se congela su detalle
+        guardar_snapshot_historial(db, db_historial.id_historial)
     return db_historial
 
 #PROCEDIMIENTOS MEDICOS
@@ -307,10 +536,13 @@ def create_receta(
              raise HTTPException(status_code=404, detail="El usuario asignado para la tarea no existe")
         
 
-    #4 Crear objeto receta
+    #4 Crear objeto receta con su vigencia
+    fecha_inicio = date.today()
     db_receta = models_vet.RecetaMedica(
         **receta_in.model_dump(),
-        historial_medico_id=historial_id
+        historial_medico_id=historial_id,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_inicio + timedelta(days=receta_in.duracion_dias - 1)
     )
     db.add(db_receta)
     db.flush() 
@@ -330,7 +562,10 @@ def create_receta(
                 frecuencia_cron=receta_in.frecuencia_cron,
                 is_active=True,
                 animal_id=historial.animal_id,
-                habitat_id=historial.animal.habitat_id
+                habitat_id=historial.animal.habitat_id,
+                fecha_inicio=db_receta.fecha_inicio,
+                fecha_fin=db_receta.fecha_fin,
+                receta_id=db_receta.id_receta
             )
             db.add(nueva_plantilla)
         
@@ -372,10 +607,55 @@ def delete_receta(db: Session, receta_id: int):
     if not db_receta.historial.estado:
          raise HTTPException(status_code=409, detail="El historial esta cerrado")
 
+    #la plantilla del tratamiento deja de generar tareas
+    db.query(TareaRecurrente).filter(
+        TareaRecurrente.receta_id == receta_id
+    ).update({TareaRecurrente.is_active: False}, synchronize_session=False)
+
     db.delete(db_receta)
     db.commit()
     return {"detail": "Receta eliminada"}
 
+def get_tratamientos_activos_query(
+    db: Session,
+    animal_id: Optional[int] = None,
+    habitat_id: Optional[int] = None,
+    usuario_asignado_id: Optional[int] = None
+):
+    """
+    Recetas vigentes hoy, recorre ix_receta_medica_vigencia desde fecha_fin >= hoy
+    """
+    receta = models_vet.RecetaMedica
+    hoy = date.today()
+
+    query = db.query(
+        receta.id_receta,
+        receta.historial_medico_id,
+        Animal.id_animal.label("animal_id"),
+        Animal.nombre_animal,
+        Animal.habitat_id,
+        receta.producto_id,
+        Producto.nombre_producto,
+        receta.dosis,
+        receta.frecuencia,
+        receta.fecha_inicio,
+        receta.fecha_fin,
+        (receta.fecha_fin - hoy).label("dias_restantes"),
+        receta.usuario_asignado_id,
+    ).join(models_vet.HistorialMedico, receta.historial_medico_id == models_vet.HistorialMedico.id_historial)\
+     .join(Animal, models_vet.HistorialMedico.animal_id == Animal.id_animal)\
+     .join(Producto, receta.producto_id == Producto.id_producto)\
+     .filter(receta.fecha_fin >= hoy, receta.fecha_inicio <= hoy, Animal.is_active == True)
+
+    if animal_id:
+        query = query.filter(Animal.id_animal == animal_id)
+    if habitat_id:
+        query = query.filter(Animal.habitat_id == habitat_id)
+    if usuario_asignado_id:
+        query = query.filter(receta.usuario_asignado_id == usuario_asignado_id)
+
+    return query.order_by(receta.fecha_fin, receta.id_receta)
+
 #EXAMEN
 
 def create_orden_examen(
@@ -473,4 +753,29 @@ def delete_resultado_examen(db: Session, resultado_id: int):
         db.add(orden_asociada)
 
     db.commit()
-    return {"detail": "Resultado eliminado", "public_id": public_id_to_delete}
\ No newline at end of file
+    return {"detail": "Resultado eliminado", "public_id": public_id_to_delete}
+
+#SIGNOS VITALES
+
+def get_signos_vitales_animal(db: Session, animal_id: int, limite: int = 100) -> dict:
+    hm = models_vet.HistorialMedico
+    serie = db.query(
+        hm.id_historial, hm.fecha_atencion, hm.peso_actual, hm.temperatura,
+        hm.frecuencia_cardiaca, hm.frecuencia_respiratoria
+    ).filter(hm.animal_id == animal_id)\
+     .order_by(hm.fecha_atencion.desc())\
+     .limit(limite).all()
+
+    resumen = db.query(models_vet.ResumenSignosVitales).filter(
+        models_vet.ResumenSignosVitales.animal_id == animal_id
+    ).first()
+
+    return {"animal_id": animal_id, "serie": list(reversed(serie)), "resumen": resumen}
+
+def get_alertas_signos_vitales_query(db: Session):
+    rsv = models_vet.ResumenSignosVitales
+    return db.query(rsv).options(
+        joinedload(rsv.animal).joinedload(Animal.especie),
+        joinedload(rsv.animal).joinedload(Animal.habitat),
+        selectinload(rsv.animal).selectinload(Animal.media),
+    ).filter(rsv.alerta == True).order_by(rsv.severidad.desc(), rsv.ultima_atencion.desc())
@@ -1,5 +1,28 @@
+import time
+import redis as redis_sync
 import redis.asyncio as redis
 from app.core.config import settings
+from app.core import metricas
+
+
+#clientes que registran la latencia de cada comando (los pipelines se miden como un solo comando)
+class RedisMedido(redis.Redis):
+    async def execute_command(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            metricas.REDIS_LATENCIA.labels(str(args[0]).upper()).observe(time.perf_counter() - inicio)
+
+
+class RedisSyncMedido(redis_sync.Redis):
+    def execute_command(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            metricas.REDIS_LATENCIA.labels(str(args[0]).upper()).observe(time.perf_counter() - inicio)
+
 
 try:
     pool = redis.ConnectionPool.from_url(
@@ -8,7 +31,7 @@ try:
     )
     
 
-    cache_client = redis.Redis.from_pool(pool)
+    cache_client = RedisMedido.from_pool(pool)
     
     print("Conectado a Redis")
 
@@ -17,9 +40,24 @@ except Exception as e:
     print(f"Detalle: {e}")
     cache_client = None
 
+#cliente sincrono para el codigo crud (los endpoints def corren en threadpool)
+try:
+    sync_pool = redis_sync.ConnectionPool.from_url(
+        settings.REDIS_URL,
+        decode_responses=True
+    )
+    sync_cache_client = RedisSyncMedido(connection_pool=sync_pool)
+
+except Exception as e:
+    print(f"Error: No se pudo crear el cliente Redis sincrono: {e}")
+    sync_cache_client = None
+
 async def get_cache_client() -> redis.Redis | None:
     return cache_client
 
+def get_sync_cache_client() -> redis_sync.Redis | None:
+    return sync_cache_client
+
 async def ping_redis():
     if not cache_client:
         return False
@@ -27,4 +65,4 @@ async def ping_redis():
         await cache_client.ping()
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
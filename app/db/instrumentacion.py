@@ -0,0 +1,190 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metricas
+from app.core.config import settings
+
+#consultas sql por request: cantidad, tiempo en la base y huellas de sentencias repetidas
+
+_PARAMETRO = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)") #IN con cantidad variable de parametros
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+#con el fixture sql_estricto (app/db/pytest_presupuesto.py) superar el presupuesto es un error
+estricto = False
+
+
+class PresupuestoSQLExcedido(AssertionError):
+    pass
+
+
+class ConsultasSQL:
+    __slots__ = ("total", "tiempo", "huellas")
+
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+        self.huellas: Counter = Counter()
+
+    def repetidas(self, umbral: Optional[int] = None) -> Dict[str, int]:
+        umbral = umbral or settings.SQL_N_MAS_1_UMBRAL
+        return {huella: n for huella, n in self.huellas.items() if n >= umbral}
+
+
+_actual: ContextVar[Optional[ConsultasSQL]] = ContextVar("consultas_sql", default=None)
+
+
+@lru_cache(maxsize=4096)
+def huella(sentencia: str) -> str:
+    """
+    Sentencia sin parametros ni literales: dos consultas con la misma huella solo cambian en sus valores
+    """
+    sentencia = _PARAMETRO.sub("?", sentencia)
+    sentencia = _LITERAL.sub("?", sentencia)
+    sentencia = _LISTA.sub("(?)", sentencia)
+    return _ESPACIOS.sub(" ", sentencia).strip()
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if _actual.get() is not None:
+        conn.info.setdefault("sql_inicio", []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    consultas = _actual.get()
+    if consultas is None or not conn.info.get("sql_inicio"):
+        return
+    consultas.total += 1
+    consultas.tiempo += time.perf_counter() - conn.info["sql_inicio"].pop()
+    consultas.huellas[huella(statement)] += 1
+
+
+class QueuePoolMedido(QueuePool):
+    """
+    QueuePool que mide la espera por una conexion (incluye abrirla si hace falta)
+    """
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metricas.DB_POOL_ESPERA.observe(time.perf_counter() - inicio)
+
+
+def _overflow(engine: Engine) -> None:
+    if isinstance(engine.pool, QueuePool):
+        metricas.DB_POOL_OVERFLOW.set(max(engine.pool.overflow(), 0))
+
+
+def instrumentar(engine: Engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _antes):
+        return
+    event.listen(engine, "before_cursor_execute", _antes)
+    event.listen(engine, "after_cursor_execute", _despues)
+
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metricas.DB_POOL_EN_USO.inc()
+        _overflow(engine)
+
+    def _checkin(dbapi_connection, connection_record):
+        metricas.DB_POOL_EN_USO.dec()
+        _overflow(engine)
+
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+
+
+@contextmanager
+def contar_consultas() -> Iterator[ConsultasSQL]:
+    """
+    Cuenta las consultas del bloque (fuera de un request, p.ej. en jobs o pruebas)
+    """
+    consultas = ConsultasSQL()
+    token = _actual.set(consultas)
+    try:
+        yield consultas
+    finally:
+        _actual.reset(token)
+
+
+def presupuesto_sql(maximo: int):
+    """
+    Declara cuantas consultas puede hacer un endpoint. Va debajo del decorador de la ruta:
+
+        @router.get("/diario")
+        @presupuesto_sql(5)
+        def download_diario_operativo(...):
+    """
+    def decorador(endpoint):
+        endpoint.presupuesto_sql = maximo
+        return endpoint
+    return decorador
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Atribuye las consultas de cada request a su ruta (plantilla, no la url).
+    Con DEBUG las devuelve en headers X-DB-*
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consultas = ConsultasSQL()
+        token = _actual.set(consultas)
+
+        async def enviar(mensaje: Message):
+            if settings.DEBUG and mensaje["type"] == "http.response.start":
+                headers = MutableHeaders(scope=mensaje)
+                headers["X-DB-Queries"] = str(consultas.total)
+                headers["X-DB-Time-Ms"] = f"{consultas.tiempo * 1000:.1f}"
+                headers["X-DB-Repeated"] = str(sum(consultas.repetidas().values()))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _actual.reset(token)
+            _registrar(scope, consultas)
+
+
+def _registrar(scope: Scope, consultas: ConsultasSQL) -> None:
+    route = scope.get("route")
+    if route is None:
+        return
+    ruta = f"{scope['method']} {route.path}"
+
+    metricas.SQL_CONSULTAS.labels(ruta).observe(consultas.total)
+    metricas.SQL_TIEMPO.labels(ruta).observe(consultas.tiempo)
+
+    repetidas = consultas.repetidas()
+    if repetidas:
+        metricas.SQL_N_MAS_1.labels(ruta).inc()
+        for sentencia, n in repetidas.items():
+            print(f"Advertencia: posible N+1 en {ruta}: {n}x {sentencia[:200]}")
+
+    presupuesto = getattr(scope.get("endpoint"), "presupuesto_sql", None)
+    if presupuesto is not None and consultas.total > presupuesto:
+        metricas.SQL_PRESUPUESTO_EXCEDIDO.labels(ruta).inc()
+        mensaje = f"{ruta} hizo {consultas.total} consultas (presupuesto {presupuesto})"
+        if estricto:
+            raise PresupuestoSQLExcedido(mensaje)
+        print(f"Advertencia: {mensaje}")
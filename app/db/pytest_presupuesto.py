@@ -0,0 +1,30 @@
+"""
+Plugin de pytest para los presupuestos de consultas. En conftest.py:
+
+    pytest_plugins = ["app.db.pytest_presupuesto"]
+
+    def test_diario(client, sql_estricto):
+        client.get("/zooconnect/reportes/diario")  #falla si supera @presupuesto_sql
+"""
+import pytest
+
+from app.db import instrumentacion
+from app.db.session import engine
+
+
+@pytest.fixture
+def sql_estricto():
+    instrumentacion.instrumentar(engine)
+    anterior = instrumentacion.estricto
+    instrumentacion.estricto = True
+    yield
+    instrumentacion.estricto = anterior
+
+
+@pytest.fixture
+def contar_sql():
+    """
+    Fuera de un request: with contar_sql() as consultas: ...; assert consultas.total <= 3
+    """
+    instrumentacion.instrumentar(engine)
+    return instrumentacion.contar_consultas
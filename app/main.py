@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from fastapi.concurrency import run_in_threadpool
 
@@ -8,11 +9,17 @@ from app.core.config import settings
 from app.scripts.create_admin import create_default_admin
 from app.scripts.seeds import init_db 
 from app.core.scheduler import scheduler, setup_scheduler
+from app.core.filesystem import ensure_upload_dirs_exist, PUBLIC_SUBDIRS
+from app.core.report_service import ReportService
+from app.db.session import engine
+from app.db.instrumentacion import instrumentar, InstrumentacionSQLMiddleware
+from app.core.metricas import MetricasMiddleware
 
 from app.api.v1 import (
     auth, animals, admin_users, favorite_animals, surveys, 
     trivia, vendp, inventario_admin, transacciones, 
-    alimentacion, tareas, veterinario, dashboards, reportes
+    alimentacion, tareas, veterinario, dashboards, reportes, search, media,
+    exportaciones, metricas
 )
 
 @asynccontextmanager
@@ -27,12 +34,19 @@ async def lifespan(app: FastAPI):
     
     print("Iniciando Scheduler")
     setup_scheduler()
+
+    print("Precargando plantillas de reportes")
+    try:
+        await run_in_threadpool(ReportService.precargar)
+    except Exception as e:
+        print(f"Advertencia: no se pudieron precargar los reportes ({e})")
     
     print("Verificacion exitosa")
     
     yield
     
     print("Apagando Zoocoonect")
+    ReportService.cerrar()
     if scheduler.running:
         scheduler.shutdown()
         print("APScheduler detenido")
@@ -46,6 +60,10 @@ app = FastAPI(
     version="5.0.0",
 )
 
+instrumentar(engine)
+app.add_middleware(InstrumentacionSQLMiddleware)
+app.add_middleware(MetricasMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -69,5 +87,20 @@ app.include_router(tareas.router, prefix="/zooconnect/tareas", tags=["Tareas"])
 app.include_router(veterinario.router, prefix="/zooconnect/veterinario", tags=["Cruz Roja"]) 
 app.include_router(dashboards.router, prefix="/zooconnect/dashboards", tags=["Jesus"]) 
 app.include_router(reportes.router, prefix="/zooconnect/reportes", tags=["VI"]) 
+app.include_router(search.router, prefix="/zooconnect/search", tags=["Busqueda"])
+app.include_router(media.router, prefix="/zooconnect/media", tags=["Media"])
+app.include_router(exportaciones.router, prefix="/zooconnect/exportaciones", tags=["Exportaciones"])
+app.include_router(metricas.router)
+
+#con el backend local los archivos se sirven desde la propia API
+#(solo las carpetas publicadas, las subidas en espera de ingestas/ no)
+ensure_upload_dirs_exist()
+if settings.MEDIA_STORAGE_BACKEND == "local":
+    for carpeta in PUBLIC_SUBDIRS:
+        app.mount(
+            f"{settings.MEDIA_URL.rstrip('/')}/{carpeta}",
+            StaticFiles(directory=f"{settings.MEDIA_DIR}/{carpeta}"),
+            name=f"media_{carpeta}"
+        )
 
 add_pagination(app)
\ No newline at end of file
@@ -1,12 +1,13 @@
 from .user import User
 from .role import Role
 from .animal import Animal, Especie, Habitat, MediaAnimal, MediaHabitat, AnimalFavorito
-from .survey import Encuesta, EncuestaTema, PreguntaEncuesta, OpcionEncuesta, ParticipacionEncuesta, RespuestaUsuario
+from .survey import Encuesta, EncuestaTema, PreguntaEncuesta, OpcionEncuesta, ParticipacionEncuesta, RespuestaUsuario, ConteoEncuesta, ConteoOpcionEncuesta
 from .refresh_token import RefreshToken
 from .trivia import Trivia, ParticipacionTrivia
 from .password_reset_token import PasswordResetToken
 from .two_factor_codes import TwoFactorCodes
 from .audit_log import AuditLog
-from .inventario import TipoProducto, UnidadMedida, Proveedor, Producto, StockLote, EntradaInventario, DetalleEntrada, Salida, DetalleSalida
-from .tarea import TipoTarea, Tarea, DetalleAlimentacion, TareaRecurrente, Dieta, DetalleDieta, RegistroAlimentacion
-from .veterinario import TipoAtencion, TipoExamen, HistorialMedico, OrdenExamen, ResultadoExamen, RecetaMedica, ProcedimientoMedico
\ No newline at end of file
+from .inventario import TipoProducto, UnidadMedida, Proveedor, Producto, StockLote, EntradaInventario, DetalleEntrada, Salida, DetalleSalida, ProyeccionStock, PronosticoConsumo, SnapshotStock, SnapshotStockLote, AlertaCaducidad
+from .tarea import TipoTarea, Tarea, DetalleAlimentacion, TareaRecurrente, Dieta, DetalleDieta, RegistroAlimentacion, ConsumoAlimentacionDiario, ResumenApetito
+from .veterinario import TipoAtencion, TipoExamen, HistorialMedico, HistorialSnapshot, OrdenExamen, ResultadoExamen, RecetaMedica, ProcedimientoMedico, ResumenSignosVitales
+from .media_ingesta import MediaIngesta
\ No newline at end of file
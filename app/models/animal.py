@@ -1,5 +1,6 @@
 from datetime import date
-from sqlalchemy import CheckConstraint, Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Enum as SQLAlchemyEnum, UniqueConstraint
+from sqlalchemy import CheckConstraint, Index, Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Enum as SQLAlchemyEnum, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
@@ -27,6 +28,12 @@ class Especie(Base):
     #tarea
     dieta = relationship("Dieta", back_populates="especie", uselist=False)
 
+    #busqueda por trigramas (pg_trgm)
+    __table_args__ = (
+        Index('ix_especies_nombre_trgm', 'nombre', postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'}),
+        Index('ix_especies_nombre_cientifico_trgm', 'nombre_cientifico', postgresql_using='gin', postgresql_ops={'nombre_cientifico': 'gin_trgm_ops'}),
+    )
+
     @validates('nombre_especie', 'nombre_cientifico', 'filo', 'clase', 'orden', 'familia', 'genero')
     def normalize_text_fields(self, key, value):
         if isinstance(value, str):
@@ -54,6 +61,9 @@ class Habitat(Base):
     tareas_recurrentes = relationship("TareaRecurrente", back_populates="habitat")
     registros_alimentacion = relationship("RegistroAlimentacion", back_populates="habitat")
     consumo_inventarios = relationship("DetalleSalida", back_populates="habitat")
+    __table_args__ = (
+        Index('ix_habitats_nombre_trgm', 'nombre_habitat', postgresql_using='gin', postgresql_ops={'nombre_habitat': 'gin_trgm_ops'}),
+    )
     @validates('nombre_habitat', 'tipo_habitat')
     def normalize_text_fields(self, key, value):
         if isinstance(value, str):
@@ -78,6 +88,8 @@ class Animal(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    #contador desnormalizado de animalfavorito, lo mantienen add/remove_animal_from_favorites
+    favoritos_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     especie = relationship("Especie", back_populates="animales")
     habitat = relationship("Habitat", back_populates="animales")
@@ -112,6 +124,7 @@ class Animal(Base):
     #un CheckConstraint impone la regla a nivel de base de datos, haciéndola imposible de saltar
     __table_args__ = (
         CheckConstraint('fecha_ingreso >= fecha_nacimiento', name='_fecha_ingreso_no_antes_nacimiento'),
+        Index('ix_animals_nombre_trgm', 'nombre_animal', postgresql_using='gin', postgresql_ops={'nombre_animal': 'gin_trgm_ops'}),
     )
 
 
@@ -125,6 +138,7 @@ class MediaAnimal(Base):
     public_id = Column(String(100), nullable=True)
     titulo_media_animal = Column(String(150), nullable=False)
     descripcion_media_animal = Column(Text, nullable=True)
+    variantes = Column(JSONB, nullable=True) #tamaño -> {secure_url, public_id}
 
     animal = relationship("Animal", back_populates="media")
 
@@ -138,6 +152,7 @@ class MediaHabitat(Base):
     titulo_media_habitat = Column(String(150), nullable=False)
     descripcion_media_habitat = Column(Text, nullable=True)
     tipo_medio = Column(Boolean, nullable=False)#1 imagen 0 video
+    variantes = Column(JSONB, nullable=True) #tamaño -> {secure_url, public_id}
     habitat = relationship("Habitat", back_populates="media")
 
 class AnimalFavorito(Base):
@@ -153,4 +168,5 @@ class AnimalFavorito(Base):
     animal = relationship("Animal", back_populates="favorited_by_users")
     __table_args__ = (
         UniqueConstraint('usuario_id', 'animal_id', name='_usuario_animal_uc'),
+        Index('ix_animalfavorito_fecha_guardado', 'fecha_guardado'),
     )
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, func, Text, Numeric, Date, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, func, Text, Numeric, Date, CheckConstraint, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -20,6 +21,9 @@ class UnidadMedida(Base):
     id_unidad = Column(Integer, primary_key=True, index=True)
     nombre_unidad = Column(String(100), nullable=False, unique=True)
     abreviatura = Column(String(20), nullable=False, unique=True)
+    #conversion: cantidad_en_base = cantidad * factor_base, solo entre unidades de la misma magnitud
+    magnitud = Column(String(20), nullable=True) #masa, volumen, unidad
+    factor_base = Column(Numeric(18, 6), default=1, server_default="1", nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -56,7 +60,9 @@ class Producto(Base):
 
     photo_url = Column(String(2048), nullable=True)
     public_id = Column(String(255), nullable=True)
+    photo_variantes = Column(JSONB, nullable=True) #tamaño -> {secure_url, public_id}
 
+    #suma de stock_lote.cantidad_disponible, la mantiene el trigger trg_stock_lote_total (no tocar desde la app)
     stock_actual = Column(Numeric(10, 2), default=0, nullable=False)
     stock_minimo = Column(Numeric(10, 2), default=0, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -78,6 +84,11 @@ class Producto(Base):
     #veterinario
     recetas_asociadas = relationship("RecetaMedica", back_populates="producto")
 
+    #busqueda por trigramas (pg_trgm), tambien acelera el ilike '%nombre%' del listado
+    __table_args__ = (
+        Index('ix_productos_nombre_trgm', 'nombre_producto', postgresql_using='gin', postgresql_ops={'nombre_producto': 'gin_trgm_ops'}),
+    )
+
 
 class StockLote(Base):
     __tablename__ = "stock_lote"
@@ -95,6 +106,13 @@ class StockLote(Base):
     
     __table_args__ = (
         CheckConstraint('cantidad_disponible >= 0', name='chk_cantidad_disponible_no_negativa'),
+        #un lote por producto y caducidad: las entradas suman con INSERT ... ON CONFLICT
+        UniqueConstraint('producto_id', 'lote', 'fecha_caducidad', name='uq_stock_lote_producto_lote_caducidad'),
+        #FEFO: solo lotes con stock, ya ordenados por caducidad dentro del producto
+        Index(
+            'ix_stock_lote_fefo', 'producto_id', 'fecha_caducidad',
+            postgresql_where=text('cantidad_disponible > 0')
+        ),
     )
 
 #Modelos de transacciones
@@ -171,4 +189,84 @@ class DetalleSalida(Base):
     salida = relationship("Salida", back_populates="detalles")
     producto = relationship("Producto", back_populates="detalles_salida")
     animal = relationship("Animal", back_populates="consumo_inventario")
-    habitat = relationship("Habitat", back_populates="consumo_inventarios")
\ No newline at end of file
+    habitat = relationship("Habitat", back_populates="consumo_inventarios")
+
+    __table_args__ = (
+        #consumo por animal (timeline)
+        Index('ix_detalle_salidas_animal_salida', 'animal_id', 'salida_id'),
+    )
+
+
+class ProyeccionStock(Base):
+    #precalculado cada noche por el job de proyeccion (una fila por producto)
+    __tablename__ = "proyeccion_stock"
+
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), primary_key=True)
+    fecha_calculo = Column(Date, nullable=False)
+    horizonte_dias = Column(Integer, nullable=False)
+
+    demanda_diaria = Column(Numeric(12, 2), nullable=False)
+    stock_inicial = Column(Numeric(12, 2), nullable=False)
+    dias_cobertura = Column(Integer, nullable=True) #null = cubre todo el horizonte
+    fecha_quiebre = Column(Date, nullable=True, index=True)
+    deficit_total = Column(Numeric(12, 2), nullable=False)
+    merma_caducidad = Column(Numeric(12, 2), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    producto = relationship("Producto")
+
+
+class PronosticoConsumo(Base):
+    #consumo pronosticado a partir del historial de salidas (una fila por producto)
+    __tablename__ = "pronostico_consumo"
+
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), primary_key=True)
+    fecha_calculo = Column(Date, nullable=False)
+
+    promedio_movil = Column(Numeric(12, 2), nullable=False) #ultimos 7 dias
+    demanda_diaria = Column(Numeric(12, 2), nullable=False) #suavizado exponencial
+    desviacion_diaria = Column(Numeric(12, 2), nullable=False)
+    stock_seguridad = Column(Numeric(12, 2), nullable=False)
+    punto_reorden = Column(Numeric(12, 2), nullable=False, index=True)
+    dias_cobertura = Column(Numeric(10, 1), nullable=True) #null = sin consumo
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    producto = relationship("Producto")
+
+
+class SnapshotStock(Base):
+    #stock de cada producto al cierre del dia (lo llena el job nocturno)
+    __tablename__ = "snapshot_stock"
+
+    fecha = Column(Date, primary_key=True)
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), primary_key=True, index=True)
+    stock = Column(Numeric(12, 2), nullable=False)
+
+
+class SnapshotStockLote(Base):
+    #cantidades por lote al momento del snapshot (las salidas no registran lote, no se reconstruye)
+    __tablename__ = "snapshot_stock_lote"
+
+    fecha = Column(Date, primary_key=True)
+    stocklote_id = Column(Integer, ForeignKey("stock_lote.id_stocklote", ondelete="CASCADE"), primary_key=True)
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), nullable=False, index=True)
+    cantidad = Column(Numeric(12, 2), nullable=False)
+
+
+class AlertaCaducidad(Base):
+    #cantidad por vencer de cada producto, recalculada por el job de caducidades
+    __tablename__ = "alerta_caducidad"
+
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), primary_key=True)
+    fecha_calculo = Column(Date, nullable=False)
+
+    proxima_caducidad = Column(Date, nullable=False, index=True)
+    cantidad_vencida = Column(Numeric(12, 2), nullable=False)
+    cantidad_7_dias = Column(Numeric(12, 2), nullable=False)
+    cantidad_30_dias = Column(Numeric(12, 2), nullable=False)
+    cantidad_90_dias = Column(Numeric(12, 2), nullable=False)
+    lotes_por_vencer = Column(Integer, nullable=False)
+
+    producto = relationship("Producto")
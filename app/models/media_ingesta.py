@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, CheckConstraint, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+class MediaIngesta(Base):
+    #subida pendiente de procesar (variantes + storage) por los workers de media
+    __tablename__ = "media_ingesta"
+
+    id_ingesta = Column(Integer, primary_key=True, index=True)
+    entidad = Column(String(20), nullable=False) #animal, habitat, producto
+    entidad_id = Column(Integer, nullable=False)
+    usuario_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    estado = Column(String(20), nullable=False, default="pendiente") #pendiente, procesando, completado, error
+    intentos = Column(Integer, nullable=False, default=0)
+
+    ruta_temporal = Column(String(500), nullable=True) #archivo en disco mientras no termina
+    nombre_original = Column(String(255), nullable=True)
+    content_type = Column(String(100), nullable=True)
+    datos = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb")) #titulo, descripcion, tipo_medio
+
+    media_id = Column(Integer, nullable=True) #id_media_animal / id_media_habitat creado
+    url = Column(String(2048), nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    reclamado_en = Column(DateTime(timezone=True), nullable=True)
+    finalizado_en = Column(DateTime(timezone=True), nullable=True)
+
+    usuario = relationship("User")
+
+    __table_args__ = (
+        CheckConstraint("entidad IN ('animal', 'habitat', 'producto')", name="chk_media_ingesta_entidad"),
+        CheckConstraint("estado IN ('pendiente', 'procesando', 'completado', 'error')", name="chk_media_ingesta_estado"),
+        #el barrido de los workers solo mira lo que no termino
+        Index('ix_media_ingesta_abiertas', 'estado', 'created_at', postgresql_where=text("estado IN ('pendiente', 'procesando')")),
+    )
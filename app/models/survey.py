@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+    Column, Integer, String, Text, Boolean, DateTime, ForeignKey, UniqueConstraint, func
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -71,6 +71,11 @@ class ParticipacionEncuesta(Base):
     usuario = relationship("User", back_populates="participaciones_encuestas")
     respuestas = relationship("RespuestaUsuario", back_populates="participacion", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        #una participacion por usuario y encuesta (evita el doble envio)
+        UniqueConstraint("encuesta_id", "usuario_id", name="uq_participacion_encuesta_usuario"),
+    )
+
 
 class RespuestaUsuario(Base):
     __tablename__ = "respuesta_usuario"
@@ -84,3 +89,23 @@ class RespuestaUsuario(Base):
     participacion = relationship("ParticipacionEncuesta", back_populates="respuestas")
     pregunta = relationship("PreguntaEncuesta", back_populates="respuestas")
     opcion = relationship("OpcionEncuesta", back_populates="respuestas")
+
+
+class ConteoEncuesta(Base):
+    """
+    Copia persistida de los contadores de redis (ver app/core/encuesta_conteo.py)
+    """
+    __tablename__ = "survey_tally"
+
+    encuesta_id = Column("encuesta_id", Integer, ForeignKey("encuestas.id_encuesta", ondelete="CASCADE"), primary_key=True)
+    participaciones_completadas = Column("participaciones_completadas", Integer, nullable=False, default=0)
+    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ConteoOpcionEncuesta(Base):
+    __tablename__ = "survey_option_tally"
+
+    opcion_id = Column("opcion_id", Integer, ForeignKey("opcion_encuesta.id_opcion", ondelete="CASCADE"), primary_key=True)
+    encuesta_id = Column("encuesta_id", Integer, ForeignKey("encuestas.id_encuesta", ondelete="CASCADE"), nullable=False, index=True)
+    conteo = Column("conteo", Integer, nullable=False, default=0)
+    updated_at = Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Boolean, ForeignKey, DateTime, func,
-    Text, Numeric, Date, CheckConstraint, UniqueConstraint
+    Text, Numeric, Date, CheckConstraint, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -52,6 +52,11 @@ class Tarea(Base):
 
     registro_alimentacion_generado = relationship( "RegistroAlimentacion", back_populates="tarea_asociada", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        #timeline del animal (solo tareas completadas)
+        Index('ix_tarea_animal_completada', 'animal_id', 'fecha_completada', postgresql_where=text('is_completed')),
+    )
+
 class TareaRecurrente(Base):
     __tablename__ = "tarea_recurrente"
     
@@ -66,10 +71,20 @@ class TareaRecurrente(Base):
     
     animal_id = Column(Integer, ForeignKey("animals.id_animal"), nullable=True)
     habitat_id = Column(Integer, ForeignKey("habitats.id_habitat"), nullable=True)
+
+    #ventana en la que se generan tareas (NULL = sin limite)
+    fecha_inicio = Column(Date, nullable=True)
+    fecha_fin = Column(Date, nullable=True)
+    receta_id = Column(Integer, ForeignKey("receta_medica.id_receta", ondelete="SET NULL"), nullable=True, index=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        #el job diario desactiva en bloque las plantillas vencidas
+        Index('ix_tarea_recurrente_activa_fin', 'fecha_fin', postgresql_where=text('is_active AND fecha_fin IS NOT NULL')),
+    )
+
     tipo_tarea = relationship("TipoTarea", back_populates="tareas_recurrentes")
     usuario_asignado = relationship("User", back_populates="tareas_recurrentes_asignadas")
     animal = relationship("Animal", back_populates="tareas_recurrentes")
@@ -143,6 +158,7 @@ class RegistroAlimentacion(Base):
     
     __table_args__ = (
         CheckConstraint('animal_id IS NOT NULL OR habitat_id IS NOT NULL', name='chk_registro_alimentacion_target'),
+        Index('ix_registro_alimentacion_animal_fecha', 'animal_id', 'fecha_alimentacion'),
     )
 
 class DetalleAlimentacion(Base):
@@ -156,4 +172,46 @@ class DetalleAlimentacion(Base):
     cantidad_consumida = Column(Numeric(10, 2), nullable=True)
 
     registro_alimentacion = relationship("RegistroAlimentacion", back_populates="detalles_alimentacion")
-    producto = relationship("Producto", back_populates="detalles_alimentacion")
\ No newline at end of file
+    producto = relationship("Producto", back_populates="detalles_alimentacion")
+
+class ConsumoAlimentacionDiario(Base):
+    #acumulado por dia de lo entregado/consumido, se suma al completar cada alimentacion
+    __tablename__ = "consumo_alimentacion_diario"
+
+    id_consumo = Column(Integer, primary_key=True)
+    fecha = Column(Date, nullable=False)
+    animal_id = Column(Integer, ForeignKey("animals.id_animal", ondelete="CASCADE"), nullable=True)
+    habitat_id = Column(Integer, ForeignKey("habitats.id_habitat"), nullable=True, index=True)
+    producto_id = Column(Integer, ForeignKey("productos.id_producto"), nullable=False)
+
+    cantidad_entregada = Column(Numeric(12, 2), nullable=False, default=0)
+    #solo lo entregado en los detalles que registraron consumo (base del ratio de ingesta)
+    entregada_con_consumo = Column(Numeric(12, 2), nullable=False, default=0)
+    cantidad_consumida = Column(Numeric(12, 2), nullable=False, default=0)
+    registros = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        #una fila por animal o, si la alimentacion fue al habitat, por habitat
+        Index('uq_consumo_alimentacion_animal', 'animal_id', 'producto_id', 'fecha', unique=True, postgresql_where=text('animal_id IS NOT NULL')),
+        Index('uq_consumo_alimentacion_habitat', 'habitat_id', 'producto_id', 'fecha', unique=True, postgresql_where=text('animal_id IS NULL')),
+        Index('ix_consumo_alimentacion_fecha', 'fecha'),
+    )
+
+
+class ResumenApetito(Base):
+    #lo recalcula el job nocturno de apetito (una fila por animal)
+    __tablename__ = "resumen_apetito"
+
+    animal_id = Column(Integer, ForeignKey("animals.id_animal", ondelete="CASCADE"), primary_key=True)
+    fecha_calculo = Column(Date, nullable=False)
+    dias_con_registro = Column(Integer, nullable=False)
+    productos = Column(Integer, nullable=False)
+
+    #promedios de los productos del animal, cada uno en su unidad (solo se comparan proporciones)
+    ratio_ingesta_reciente = Column(Numeric(6, 3), nullable=True) #consumido / entregado
+    ratio_ingesta_base = Column(Numeric(6, 3), nullable=True)
+    caida_pct = Column(Numeric(8, 2), nullable=True) #% de caida del consumo diario contra la base
+
+    alerta = Column(Boolean, default=False, nullable=False, index=True)
+
+    animal = relationship("Animal")
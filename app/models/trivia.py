@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+    Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -19,6 +19,11 @@ class Trivia(Base):
 
 class ParticipacionTrivia(Base):
     __tablename__ = "PARTICIPACIONES_TRIVIA"
+    __table_args__ = (
+        #ranking desde la base cuando redis no esta disponible
+        Index('ix_participaciones_trivia_trivia', 'TRIVIA_Id_trivia', 'USUARIOS_Id_usuario', 'Aciertos'),
+        Index('ix_participaciones_trivia_fecha', 'Fecha_trivia'),
+    )
 
     id_participacion_trivia = Column("Id_participacion_trivia", Integer, primary_key=True, autoincrement=True)
     usuario_id = Column("USUARIOS_Id_usuario", Integer, ForeignKey("users.id"), nullable=False)
@@ -1,8 +1,9 @@
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, DateTime, 
-    ForeignKey, Numeric, func, CheckConstraint
+    Column, Integer, String, Text, Boolean, DateTime, Date,
+    ForeignKey, Numeric, func, CheckConstraint, Index
 )
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, validates, deferred
 from app.db.base import Base
 
 class TipoAtencion(Base):
@@ -61,11 +62,31 @@ class HistorialMedico(Base):
     ordenes_examen = relationship("OrdenExamen", back_populates="historial", cascade="all, delete-orphan")
     procedimientos = relationship("ProcedimientoMedico", back_populates="historial", cascade="all, delete-orphan")
 
+    #texto clinico en espanol (diagnosticos, anamnesis, examen, procedimientos y resultados)
+    #lo mantienen los triggers de la base, no se escribe desde la app
+    busqueda_clinica = deferred(Column(TSVECTOR, nullable=True))
+
+    __table_args__ = (
+        Index('ix_historial_medico_busqueda_clinica', 'busqueda_clinica', postgresql_using='gin'),
+        #timeline del animal
+        Index('ix_historial_medico_animal_fecha', 'animal_id', 'fecha_atencion'),
+    )
+
+class HistorialSnapshot(Base):
+    #detalle serializado de un historial cerrado (ya no puede cambiar)
+    __tablename__ = "historial_snapshot"
+
+    historial_id = Column(Integer, ForeignKey("historial_medico.id_historial", ondelete="CASCADE"), primary_key=True)
+    detalle_json = Column(Text, nullable=False) #HistorialMedicoOut
+    ficha_json = Column(Text, nullable=False) #contexto de la ficha clinica
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 class OrdenExamen(Base):
     __tablename__ = "orden_examen"
 
     id_orden = Column(Integer, primary_key=True, index=True)
-    historial_medico_id = Column(Integer, ForeignKey("historial_medico.id_historial"), nullable=False)
+    historial_medico_id = Column(Integer, ForeignKey("historial_medico.id_historial"), nullable=False, index=True)
     tipo_examen_id = Column(Integer, ForeignKey("tipo_examen.id_tipo_examen"), nullable=False)
     
     instrucciones = Column(Text, nullable=True)
@@ -93,6 +114,10 @@ class ResultadoExamen(Base):
 
     orden = relationship("OrdenExamen", back_populates="resultados")
 
+    __table_args__ = (
+        Index('ix_resultado_examen_orden_fecha', 'orden_examen_id', 'fecha_resultado'),
+    )
+
 class RecetaMedica(Base):
     __tablename__ = "receta_medica"
 
@@ -105,6 +130,9 @@ class RecetaMedica(Base):
     dosis = Column(Numeric(10, 2), nullable=False)
     frecuencia = Column(String(100), nullable=False)
     duracion_dias = Column(Integer, nullable=False)
+    #vigencia del tratamiento (fecha_fin = fecha_inicio + duracion_dias - 1)
+    fecha_inicio = Column(Date, nullable=False, server_default=func.current_date())
+    fecha_fin = Column(Date, nullable=False)
     
     instrucciones_administracion = Column(Text, nullable=True)
     
@@ -125,6 +153,8 @@ class RecetaMedica(Base):
             '(generar_tarea_automatica = FALSE) OR (frecuencia_cron IS NOT NULL)', 
             name='chk_receta_cron_obligatorio'
         ),
+        Index('ix_receta_medica_historial_fecha', 'historial_medico_id', 'created_at'),
+        Index('ix_receta_medica_vigencia', 'fecha_fin', 'fecha_inicio'),
     )
 
     @validates('dosis', 'duracion_dias')
@@ -149,4 +179,39 @@ class ProcedimientoMedico(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    historial = relationship("HistorialMedico", back_populates="procedimientos")
\ No newline at end of file
+    historial = relationship("HistorialMedico", back_populates="procedimientos")
+
+    __table_args__ = (
+        Index('ix_procedimiento_medico_historial_fecha', 'historial_medico_id', 'created_at'),
+    )
+
+class ResumenSignosVitales(Base):
+    #lo recalcula el job nocturno de signos vitales (una fila por animal)
+    __tablename__ = "resumen_signos_vitales"
+
+    animal_id = Column(Integer, ForeignKey("animals.id_animal", ondelete="CASCADE"), primary_key=True)
+    fecha_calculo = Column(DateTime(timezone=True), nullable=False)
+    ultima_atencion = Column(DateTime(timezone=True), nullable=False)
+    mediciones = Column(Integer, nullable=False)
+
+    peso = Column(Numeric(10, 2), nullable=True)
+    temperatura = Column(Numeric(5, 2), nullable=True)
+    frecuencia_cardiaca = Column(Integer, nullable=True)
+    frecuencia_respiratoria = Column(Integer, nullable=True)
+
+    #z de la ultima medicion contra las anteriores del animal y contra la especie
+    z_peso = Column(Numeric(8, 2), nullable=True)
+    z_temperatura = Column(Numeric(8, 2), nullable=True)
+    z_frecuencia_cardiaca = Column(Numeric(8, 2), nullable=True)
+    z_frecuencia_respiratoria = Column(Numeric(8, 2), nullable=True)
+    z_especie_temperatura = Column(Numeric(8, 2), nullable=True)
+    z_especie_frecuencia_cardiaca = Column(Numeric(8, 2), nullable=True)
+    z_especie_frecuencia_respiratoria = Column(Numeric(8, 2), nullable=True)
+
+    pendiente_peso_30d = Column(Numeric(8, 2), nullable=True) #% de cambio de peso cada 30 dias
+
+    alerta = Column(Boolean, default=False, nullable=False, index=True)
+    severidad = Column(Numeric(8, 2), nullable=False, default=0) #max |z| para ordenar
+    motivos = Column(Text, nullable=True)
+
+    animal = relationship("Animal")
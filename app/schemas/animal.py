@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date, datetime
 from app.core.enums import AnimalState
 
@@ -16,6 +16,7 @@ class MediaCreateAnimal(MediaBaseAnimal):
 class MediaOutAnimal(MediaBaseAnimal):
     id_media_animal: int
     public_id: Optional[str] = None
+    variantes: Optional[Dict[str, Dict[str, str]]] = None
     class Config:
         from_attributes = True
 
@@ -31,6 +32,7 @@ class MediaCreateHabitat(MediaBaseHabitat):
 class MediaOutHabitat(MediaBaseHabitat):
     id_media_habitat: int
     public_id: Optional[str] = None
+    variantes: Optional[Dict[str, Dict[str, str]]] = None
     class Config:
         from_attributes = True
 
@@ -128,10 +130,15 @@ class AnimalOut(AnimalBase):
     habitat: HabitatOut
     media: List[MediaOutAnimal] = []
     age: Optional[int]
+    favoritos_count: int = 0
     #is_active : bool
     class Config:
         from_attributes = True
 
+class AnimalTendenciaOut(BaseModel):
+    puntaje_tendencia: float
+    animal: AnimalOut
+
 
 class AnimalFavoritoCreate(BaseModel):
     animal_id: int
@@ -142,4 +149,19 @@ class AnimalFavoritoOut(BaseModel):
     animal: AnimalOut 
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TimelineItem(BaseModel):
+    tipo: str
+    id: int
+    fecha: datetime
+    titulo: Optional[str] = None
+    detalle: Optional[str] = None
+    historial_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class TimelineOut(BaseModel):
+    items: List[TimelineItem]
+    siguiente_cursor: Optional[str] = None
@@ -7,6 +7,7 @@ class DashboardKPIsOut(BaseModel):
     total_animales: int
     total_usuarios: int
     alertas_stock: int
+    lotes_por_vencer: int = 0
     tareas_pendientes: int
 
 class ChartDataPoint(BaseModel):
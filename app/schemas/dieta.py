@@ -1,8 +1,8 @@
 from decimal import Decimal
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional
 from datetime import datetime
-from app.schemas.inventario import ProductoOut, UnidadMedidaOut
+from app.schemas.inventario import ProductoBase, ProductoOut, TipoProductoOut, UnidadMedidaOut
  
 class DetalleDietaBase(BaseModel):
     producto_id: int
@@ -40,4 +40,35 @@ class DietaOut(DietaBase):
     id_dieta: int
     created_at: datetime
     updated_at: datetime
-    detalles_dieta: List[DetalleDietaOut]
\ No newline at end of file
+    detalles_dieta: List[DetalleDietaOut]
+
+#sugerencias, se sirven desde el cache de dietas
+#sin stock_actual: lo mueve el trigger de lotes y en el cache quedaria viejo
+class ProductoDietaOut(ProductoBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id_producto: int
+    is_active: bool
+    photo_url: Optional[str] = None
+    public_id: Optional[str] = None
+    photo_variantes: Optional[Dict[str, Dict[str, str]]] = None
+    created_at: datetime
+    updated_at: datetime
+
+    tipo_producto: TipoProductoOut
+    unidad_medida: UnidadMedidaOut
+
+class DetalleDietaSugeridaOut(DetalleDietaOut):
+    producto: ProductoDietaOut
+
+class DietaSugeridaOut(DietaOut):
+    detalles_dieta: List[DetalleDietaSugeridaOut]
+
+class SugerenciaDietaBulkIn(BaseModel):
+    tareas_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class SugerenciaDietaOut(BaseModel):
+    id_tarea: int
+    animal_id: Optional[int] = None
+    dieta: Optional[DietaSugeridaOut] = None
+    detalle: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -27,6 +27,8 @@ class TipoProductoOut(TipoProductoBase):
 class UnidadMedidaBase(BaseModel):
     nombre_unidad: str
     abreviatura: str
+    magnitud: Optional[str] = None
+    factor_base: Decimal = Decimal("1")
 
 class UnidadMedidaCreate(UnidadMedidaBase):
     pass
@@ -34,6 +36,8 @@ class UnidadMedidaCreate(UnidadMedidaBase):
 class UnidadMedidaUpdate(BaseModel):
     nombre_unidad: Optional[str] = None
     abreviatura: Optional[str] = None
+    magnitud: Optional[str] = None
+    factor_base: Optional[Decimal] = None
     is_active: Optional[bool] = None
 
 class UnidadMedidaOut(UnidadMedidaBase):
@@ -94,8 +98,94 @@ class ProductoOut(ProductoBase):
     is_active: bool
     photo_url: Optional[str] = None
     public_id: Optional[str] = None
+    photo_variantes: Optional[Dict[str, Dict[str, str]]] = None
     created_at: datetime
     updated_at: datetime
     
     tipo_producto: TipoProductoOut
-    unidad_medida: UnidadMedidaOut
\ No newline at end of file
+    unidad_medida: UnidadMedidaOut
+
+#proyeccion de stock segun dietas
+class ProyeccionStockOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    producto_id: int
+    fecha_calculo: date
+    horizonte_dias: int
+    demanda_diaria: Decimal
+    stock_inicial: Decimal
+    dias_cobertura: Optional[int] = None
+    fecha_quiebre: Optional[date] = None
+    deficit_total: Decimal
+    merma_caducidad: Decimal
+
+    producto: ProductoOut
+
+class PronosticoConsumoOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    producto_id: int
+    fecha_calculo: date
+    promedio_movil: Decimal
+    demanda_diaria: Decimal
+    desviacion_diaria: Decimal
+    stock_seguridad: Decimal
+    punto_reorden: Decimal
+    dias_cobertura: Optional[Decimal] = None
+
+    producto: ProductoOut
+
+class PlanDemandaProductoOut(BaseModel):
+    producto_id: int
+    nombre_producto: str
+    unidad: str
+    demanda_diaria: float
+    stock_inicial: float
+    dias_cobertura: Optional[int] = None
+    fecha_quiebre: Optional[date] = None
+    deficit_total: float
+    merma_caducidad: float
+    stock_proyectado: List[float]
+    deficit_diario: List[float]
+
+class PlanDemandaOut(BaseModel):
+    fecha_inicio: date
+    horizonte_dias: int
+    productos: List[PlanDemandaProductoOut]
+    detalles_sin_conversion: List[int] = []
+
+class StockAFechaItem(BaseModel):
+    producto_id: int
+    nombre_producto: str
+    stock: Decimal
+
+class StockAFechaOut(BaseModel):
+    fecha: date
+    fecha_snapshot: Optional[date] = None
+    productos: List[StockAFechaItem]
+
+class LoteAFechaItem(BaseModel):
+    stocklote_id: int
+    producto_id: int
+    lote: str
+    fecha_caducidad: date
+    cantidad: Decimal
+
+class LotesAFechaOut(BaseModel):
+    fecha: date
+    fecha_snapshot: Optional[date] = None
+    lotes: List[LoteAFechaItem]
+
+class AlertaCaducidadOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    producto_id: int
+    fecha_calculo: date
+    proxima_caducidad: date
+    cantidad_vencida: Decimal
+    cantidad_7_dias: Decimal
+    cantidad_30_dias: Decimal
+    cantidad_90_dias: Decimal
+    lotes_por_vencer: int
+
+    producto: ProductoOut
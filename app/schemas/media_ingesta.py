@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+class MediaIngestaOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id_ingesta: int
+    entidad: str
+    entidad_id: int
+    estado: str
+    intentos: int
+    nombre_original: Optional[str] = None
+    media_id: Optional[int] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finalizado_en: Optional[datetime] = None
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional, Dict
+
+
+class SearchItem(BaseModel):
+    id: int
+    nombre: str
+    detalle: Optional[str] = None
+    score: float
+
+class SearchOut(BaseModel):
+    query: str
+    modo: str
+    resultados: Dict[str, List[SearchItem]]
@@ -71,21 +71,30 @@ class RespuestaBase(BaseModel):
     opcion_id: Optional[int] = None
     respuesta_texto: Optional[str] = None
 
+def _check_respuesta_exclusiva(data: dict) -> dict:
+    opcion_presente = data.get("opcion_id") is not None
+    texto_presente = data.get("respuesta_texto") is not None and data.get("respuesta_texto") != ""
+
+    if opcion_presente and texto_presente:
+        raise ValueError("No se puede proporcionar 'opcion_id' y 'respuesta_texto' al mismo tiempo")
+    if not opcion_presente and not texto_presente:
+        raise ValueError("Se debe proporcionar un valor para 'opcion_id' o para 'respuesta_texto'")
+
+    return data
+
 class RespuestaCreate(RespuestaBase):
     participacion_id: int
 
     @model_validator(mode='before')
     @classmethod
     def check_exclusive_response_field(cls, data: dict) -> dict:
-        opcion_presente = data.get("opcion_id") is not None
-        texto_presente = data.get("respuesta_texto") is not None and data.get("respuesta_texto") != ""
-
-        if opcion_presente and texto_presente:
-            raise ValueError("No se puede proporcionar 'opcion_id' y 'respuesta_texto' al mismo tiempo")
-        if not opcion_presente and not texto_presente:
-            raise ValueError("Se debe proporcionar un valor para 'opcion_id' o para 'respuesta_texto'")
-        
-        return data
+        return _check_respuesta_exclusiva(data)
+
+class RespuestaEnvio(RespuestaBase):
+    @model_validator(mode='before')
+    @classmethod
+    def check_exclusive_response_field(cls, data: dict) -> dict:
+        return _check_respuesta_exclusiva(data)
 
 class RespuestaUpdate(BaseModel):
     opcion_id: Optional[int] = None
@@ -125,4 +134,11 @@ class ParticipacionOut(ParticipacionBase):
     respuestas: List[RespuestaOut] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class EnvioEncuestaCreate(BaseModel):
+    """
+    Todas las respuestas de una encuesta en una sola peticion
+    """
+    respuestas: List[RespuestaEnvio]
\ No newline at end of file
@@ -34,6 +34,8 @@ class TareaRecurrenteBase(BaseModel):
     frecuencia_cron: str
     animal_id: Optional[int] = None
     habitat_id: Optional[int] = None
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
     is_active: bool = True
 
 class TareaRecurrenteCreate(TareaRecurrenteBase):
@@ -46,12 +48,15 @@ class TareaRecurrenteUpdate(BaseModel):
     frecuencia_cron: Optional[str] = None
     animal_id: Optional[int] = None
     habitat_id: Optional[int] = None
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
     is_active: Optional[bool] = None
 
 class TareaRecurrenteOut(TareaRecurrenteBase):
     model_config = ConfigDict(from_attributes=True)
     
     id_tarea_recurrente: int
+    receta_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -128,6 +133,32 @@ class RegistroAlimentacionOut(BaseModel):
     habitat: Optional[HabitatOut] = None
     detalles_alimentacion: List[DetalleAlimentacionOut]
 
+class ResumenApetitoOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    animal_id: int
+    fecha_calculo: date
+    dias_con_registro: int
+    productos: int
+    ratio_ingesta_reciente: Optional[Decimal] = None
+    ratio_ingesta_base: Optional[Decimal] = None
+    caida_pct: Optional[Decimal] = None
+    alerta: bool
+    animal: AnimalOut
+
+class DesperdicioHabitatOut(BaseModel):
+    habitat_id: int
+    nombre_habitat: str
+    producto_id: int
+    nombre_producto: str
+    unidad: str
+    cantidad_entregada: Decimal
+    entregada_con_consumo: Decimal
+    cantidad_consumida: Decimal
+    desperdicio: Decimal
+    desperdicio_pct: Optional[float] = None
+    registros: int
+
 #veterinario
 class DetalleTratamientoCreate(BaseModel):
     producto_id: int
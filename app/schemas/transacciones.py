@@ -95,3 +95,12 @@ class SalidaOut(BaseModel):
     tipo_salida: TipoSalidaOut
     usuario: UserOut
     detalles: List[DetalleSalidaOut]
+
+class ReconciliacionStockOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    producto_id: int
+    nombre_producto: str
+    stock_actual: Decimal
+    stock_lotes: Decimal
+    diferencia: Decimal
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class TriviaBase(BaseModel):
@@ -29,3 +29,24 @@ class ParticipacionTriviaOut(BaseModel):
     trivia_id: int
     class Config:
         from_attributes = True
+
+
+class RankingEntradaOut(BaseModel):
+    posicion: int
+    usuario_id: int
+    username: Optional[str] = None
+    puntaje: int
+
+class RankingOut(BaseModel):
+    periodo: str
+    trivia_id: Optional[int] = None
+    total_participantes: int
+    entradas: List[RankingEntradaOut]
+
+class MiPosicionOut(BaseModel):
+    periodo: str
+    trivia_id: Optional[int] = None
+    posicion: Optional[int] = None
+    puntaje: Optional[int] = None
+    total_participantes: int
+    vecinos: List[RankingEntradaOut] = []
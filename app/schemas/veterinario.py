@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 from decimal import Decimal
 
 from app.schemas.user import UserOut 
@@ -77,12 +77,31 @@ class RecetaMedicaOut(RecetaMedicaBase):
     model_config = ConfigDict(from_attributes=True)
     
     id_receta: int
+    fecha_inicio: date
+    fecha_fin: date
     created_at: datetime
     
     producto: ProductoOut
     unidad_medida: Optional[UnidadMedidaOut] = None
     usuario_asignado: Optional[UserOut] = None
 
+class TratamientoActivoOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id_receta: int
+    historial_medico_id: int
+    animal_id: int
+    nombre_animal: str
+    habitat_id: Optional[int] = None
+    producto_id: int
+    nombre_producto: str
+    dosis: Decimal
+    frecuencia: str
+    fecha_inicio: date
+    fecha_fin: date
+    dias_restantes: int
+    usuario_asignado_id: Optional[int] = None
+
 
 #PROCEDIMIENTO
 class ProcedimientoBase(BaseModel):
@@ -174,4 +193,65 @@ class HistorialMedicoOut(HistorialMedicoBase):
     
     recetas: List[RecetaMedicaOut] = []
     ordenes_examen: List[OrdenExamenOut] = []
-    procedimientos: List[ProcedimientoOut] = []
\ No newline at end of file
+    procedimientos: List[ProcedimientoOut] = []
+#BUSQUEDA CLINICA
+
+class HistorialBusquedaItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id_historial: int
+    animal_id: int
+    nombre_animal: str
+    fecha_atencion: datetime
+    estado: bool
+    diagnostico_presuntivo: Optional[str] = None
+    diagnostico_definitivo: Optional[str] = None
+    rank: float
+    fragmento: Optional[str] = None
+
+class HistorialBusquedaOut(BaseModel):
+    items: List[HistorialBusquedaItem]
+    siguiente_cursor: Optional[str] = None
+
+#SIGNOS VITALES
+
+class SignoVitalPunto(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id_historial: int
+    fecha_atencion: datetime
+    peso_actual: Optional[Decimal] = None
+    temperatura: Optional[Decimal] = None
+    frecuencia_cardiaca: Optional[int] = None
+    frecuencia_respiratoria: Optional[int] = None
+
+class ResumenSignosVitalesOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    animal_id: int
+    fecha_calculo: datetime
+    ultima_atencion: datetime
+    mediciones: int
+    peso: Optional[Decimal] = None
+    temperatura: Optional[Decimal] = None
+    frecuencia_cardiaca: Optional[int] = None
+    frecuencia_respiratoria: Optional[int] = None
+    z_peso: Optional[Decimal] = None
+    z_temperatura: Optional[Decimal] = None
+    z_frecuencia_cardiaca: Optional[Decimal] = None
+    z_frecuencia_respiratoria: Optional[Decimal] = None
+    z_especie_temperatura: Optional[Decimal] = None
+    z_especie_frecuencia_cardiaca: Optional[Decimal] = None
+    z_especie_frecuencia_respiratoria: Optional[Decimal] = None
+    pendiente_peso_30d: Optional[Decimal] = None
+    alerta: bool
+    severidad: Decimal
+    motivos: Optional[str] = None
+
+class AlertaSignosVitalesOut(ResumenSignosVitalesOut):
+    animal: AnimalOut
+
+class SignosVitalesAnimalOut(BaseModel):
+    animal_id: int
+    serie: List[SignoVitalPunto]
+    resumen: Optional[ResumenSignosVitalesOut] = None
@@ -0,0 +1,150 @@
+"""
+Compara el render de los reportes PDF antes y despues de reutilizar plantillas y recursos.
+
+    python -m app.scripts.benchmark_reportes -n 20 --salida benchmark.md
+
+No usa la base de datos: los contextos son sinteticos con un volumen parecido al real.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from jinja2 import Environment, FileSystemLoader
+from weasyprint import HTML
+
+from app.core import report_service
+from app.core.report_service import ReportService, TEMPLATE_DIR, STATIC_DIR, CSS_DIR, BASE_DIR
+
+
+def _diario(n: int) -> dict:
+    tareas = [{
+        "hora": "08:00",
+        "descripcion": f"Tarea de prueba {i}",
+        "zona": f"Habitat {i % 12}",
+        "asignado_a": f"cuidador{i % 7}@zooconnect.com",
+        "estado": "Completada" if i % 3 else "Pendiente"
+    } for i in range(n)]
+    return {
+        "usuario_generador": "admin@zooconnect.com",
+        "tareas_total": n,
+        "tareas_completadas": sum(1 for t in tareas if t["estado"] == "Completada"),
+        "tareas_pendientes": sum(1 for t in tareas if t["estado"] == "Pendiente"),
+        "alertas_tareas": 5,
+        "fecha_reporte": "19/10/2026",
+        "tareas": tareas
+    }
+
+
+def _ficha(n: int) -> dict:
+    return {
+        "usuario_generador": "admin@zooconnect.com",
+        "animal": {"nombre": "Simba", "especie": "Panthera leo", "sexo": "Macho", "edad": "6 años"},
+        "historial": {
+            "id": 1, "fecha": "19/10/2026", "veterinario": "vet@zooconnect.com",
+            "peso": 190, "temperatura": 38.5, "fc": 70, "fr": 20,
+            "anamnesis": "Control rutinario " * 20,
+            "observaciones_fisicas": "Sin hallazgos relevantes " * 10,
+            "diagnostico_presuntivo": "Sano",
+            "diagnostico_definitivo": None
+        },
+        "recetas": [{
+            "producto": f"Medicamento {i}", "dosis": 2, "unidad": "ml",
+            "frecuencia": "Cada 12 horas", "duracion": "5 dias"
+        } for i in range(n // 20 or 1)]
+    }
+
+
+def _kardex(n: int) -> dict:
+    inicio = datetime(2026, 10, 1)
+    return {
+        "usuario_generador": "admin@zooconnect.com",
+        "fecha_inicio": "01/10/2026",
+        "fecha_fin": "19/10/2026",
+        "movimientos": [{
+            "fecha": (inicio + timedelta(hours=i)).strftime("%d/%m/%Y %H:%M"),
+            "tipo": "Entrada" if i % 2 else "Salida",
+            "producto": f"Producto {i % 40}",
+            "cantidad": f"+{i % 9 + 1}" if i % 2 else f"-{i % 5 + 1}",
+            "usuario": "bodega@zooconnect.com",
+            "detalle": f"Lote: L-{i:05d}"
+        } for i in range(n)]
+    }
+
+
+REPORTES = {
+    "operativo/diario.html": _diario,
+    "veterinaria/ficha_clinica.html": _ficha,
+    "inventario/kardex.html": _kardex,
+}
+
+#como se renderizaba antes: plantilla con auto_reload, css y logo leidos de disco en cada pdf
+_env_anterior = Environment(loader=FileSystemLoader(str(TEMPLATE_DIR)))
+
+
+def _render_anterior(template_name: str, context: dict) -> bytes:
+    context["logo_path"] = f"file://{STATIC_DIR}/logo.png"
+    context["css_path"] = f"file://{CSS_DIR}/styles.css"
+    context["fecha_generacion"] = datetime.now().strftime("%d/%m/%Y %H:%M")
+    context["empresa"] = "ZooConnect"
+    html_string = _env_anterior.get_template(template_name).render(context)
+    return HTML(string=html_string, base_url=str(BASE_DIR)).write_pdf()
+
+
+def _medir(render, template_name: str, context: dict, repeticiones: int) -> list:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        render(template_name, dict(context))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reportes PDF")
+    parser.add_argument("-n", "--repeticiones", type=int, default=10)
+    parser.add_argument("--filas", type=int, default=200, help="tareas / movimientos por reporte")
+    parser.add_argument("--salida", help="archivo donde escribir la tabla de resultados (markdown)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ReportService.precargar()
+    precarga = (time.perf_counter() - inicio) * 1000
+    print(f"Precarga: {precarga:.1f} ms")
+
+    tabla = [
+        "| Reporte | Anterior (mediana ms) | Actual (mediana ms) | Actual (min ms) | Mejora |",
+        "|---|---:|---:|---:|---:|",
+    ]
+
+    for template_name, contexto in REPORTES.items():
+        context = contexto(args.filas)
+        #primer render de cada camino fuera de la medicion
+        _render_anterior(template_name, dict(context))
+        report_service.ReportService._render_pdf(template_name, dict(context))
+
+        antes = _medir(_render_anterior, template_name, context, args.repeticiones)
+        despues = _medir(report_service.ReportService._render_pdf, template_name, context, args.repeticiones)
+
+        print(f"\n{template_name}")
+        for nombre, tiempos in (("anterior", antes), ("actual", despues)):
+            print(
+                f"  {nombre:<9} media {statistics.mean(tiempos):8.1f} ms | "
+                f"mediana {statistics.median(tiempos):8.1f} ms | min {min(tiempos):8.1f} ms"
+            )
+        mejora = statistics.median(antes) / statistics.median(despues)
+        print(f"  mejora    {mejora:.2f}x (mediana)")
+        tabla.append(
+            f"| {template_name} | {statistics.median(antes):.1f} | {statistics.median(despues):.1f} | "
+            f"{min(despues):.1f} | {mejora:.2f}x |"
+        )
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(f"{args.repeticiones} repeticiones, {args.filas} filas, precarga {precarga:.1f} ms\n\n")
+            f.write("\n".join(tabla) + "\n")
+        print(f"\nResultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
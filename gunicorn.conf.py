@@ -0,0 +1,21 @@
+import os
+import shutil
+import tempfile
+
+#metricas de prometheus compartidas entre workers (app/core/metricas.py):
+#cada worker escribe en PROMETHEUS_MULTIPROC_DIR, que tiene que existir antes de importar la app
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "zooconnect_metricas"))
+
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    #los archivos de una ejecucion anterior sumarian valores viejos
+    carpeta = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.makedirs(carpeta, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,100 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.core import exportacion
+
+FILAS = 1_000_000
+FILAS_REFERENCIA = 100_000
+#sin cursor del servidor libpq guarda el resultado completo (~100 MB con 1M filas)
+CRECIMIENTO_MAXIMO_KB = 16 * 1024
+TITULOS = ["N", "Texto", "Fecha"]
+
+#cada medicion en un proceso nuevo: ru_maxrss es el pico del proceso y no baja.
+#incluye la memoria de C (libpq), que tracemalloc no ve
+_MEDIR_RSS = """
+import resource, sys
+from app.core import exportacion
+from tests.test_exportacion import TITULOS, _serie
+
+generar = getattr(exportacion, "_" + sys.argv[2])
+for _ in generar(_serie(1000), TITULOS):
+    pass
+antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+for _ in generar(_serie(int(sys.argv[1])), TITULOS):
+    pass
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - antes)
+"""
+
+
+def _serie(filas: int):
+    serie = func.generate_series(1, filas).table_valued("n").render_derived(name="serie")
+    return select(
+        serie.c.n,
+        func.concat("fila ", serie.c.n).label("texto"),
+        (func.current_date() + serie.c.n).label("fecha")
+    )
+
+
+def _crecimiento_rss(filas: int, formato: str) -> int:
+    """
+    KB que crece el pico de memoria del proceso al exportar `filas`
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-c", _MEDIR_RSS, str(filas), formato],
+        cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True
+    )
+    return int(proceso.stdout.strip().splitlines()[-1])
+
+
+def _comprobar_memoria_plana(formato: str):
+    referencia = _crecimiento_rss(FILAS_REFERENCIA, formato)
+    total = _crecimiento_rss(FILAS, formato)
+    assert total < CRECIMIENTO_MAXIMO_KB, f"{FILAS} filas: +{total} KB"
+    #10 veces mas filas no deberian pedir mas memoria
+    assert total - referencia < CRECIMIENTO_MAXIMO_KB, f"{FILAS_REFERENCIA} filas: +{referencia} KB, {FILAS}: +{total} KB"
+
+
+def test_exportacion_usa_cursor_del_servidor(db_engine):
+    cursores = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        if "generate_series" in statement:
+            cursores.append(getattr(cursor, "name", None))
+
+    event.listen(db_engine, "before_cursor_execute", _registrar)
+    try:
+        for _ in exportacion._csv(_serie(10), TITULOS):
+            pass
+    finally:
+        event.remove(db_engine, "before_cursor_execute", _registrar)
+
+    #psycopg2 solo nombra los cursores del servidor
+    assert cursores and all(cursores)
+
+
+def test_csv_memoria_plana(db_engine):
+    _comprobar_memoria_plana("csv")
+
+
+@pytest.mark.lento
+def test_xlsx_memoria_plana(db_engine):
+    _comprobar_memoria_plana("xlsx")
+
+
+def test_csv_filas_completas(db_engine):
+    lineas = sum(bloque.count(b"\n") for bloque in exportacion._csv(_serie(FILAS_REFERENCIA), TITULOS))
+    assert lineas == FILAS_REFERENCIA + 1
+
+
+@pytest.mark.parametrize("valor", ["=1+1", "+A1", "-A1", "@SUM(A1)", "\t=1+1", "\r=1+1"])
+def test_texto_neutraliza_formulas(valor):
+    assert exportacion._texto(valor) == "'" + valor
+
+
+@pytest.mark.parametrize("valor", ["-12.5", "+3", "texto"])
+def test_texto_respeta_valores(valor):
+    assert exportacion._texto(valor) == valor
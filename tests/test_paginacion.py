@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.paginacion import decode_cursor, encode_cursor
+
+
+def _cursor(valores) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+def test_ida_y_vuelta():
+    fecha = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(fecha, "tarea", 7), datetime, str, int) == [fecha, "tarea", 7]
+    assert decode_cursor(encode_cursor(0.25, 12), float, int) == [0.25, 12]
+
+
+@pytest.mark.parametrize("cursor", [
+    "no es base64!",
+    base64.urlsafe_b64encode(b"{no json").decode(),
+    _cursor({"rank": 0.5, "id": 1}),
+    _cursor([0.5]),
+    _cursor([0.5, 1, 2]),
+    _cursor(["0.5", 1]),
+    _cursor([0.5, "1"]),
+    _cursor([0.5, 1.5]),
+    _cursor([True, 1]),
+    _cursor([0.5, 2 ** 31]),
+    _cursor([float("nan"), 1]),
+])
+def test_cursor_manipulado_es_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, float, int)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("fecha", ["ayer", 20261019, None])
+def test_fecha_invalida_es_400(fecha):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(_cursor([fecha, "tarea", 1]), datetime, str, int)
+    assert error.value.status_code == 400
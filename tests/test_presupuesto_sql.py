@@ -0,0 +1,54 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.instrumentacion import InstrumentacionSQLMiddleware, PresupuestoSQLExcedido, presupuesto_sql
+from app.db.session import get_db
+
+#misma cadena que app/main.py: middleware + rutas con @presupuesto_sql
+app = FastAPI()
+app.add_middleware(InstrumentacionSQLMiddleware)
+
+
+@app.get("/una")
+@presupuesto_sql(1)
+def una_consulta(db: Session = Depends(get_db)):
+    return {"n": db.execute(text("SELECT 1")).scalar()}
+
+
+@app.get("/varias")
+@presupuesto_sql(1)
+def varias_consultas(db: Session = Depends(get_db)):
+    return {"n": sum(db.execute(text(f"SELECT {i}")).scalar() for i in range(3))}
+
+
+@pytest.fixture
+def client(db_engine):
+    with TestClient(app) as client:
+        yield client
+
+
+def test_dentro_del_presupuesto(client, sql_estricto):
+    respuesta = client.get("/una")
+    assert respuesta.status_code == 200
+
+
+def test_presupuesto_excedido(client, sql_estricto):
+    with pytest.raises(PresupuestoSQLExcedido, match="GET /varias hizo 3 consultas"):
+        client.get("/varias")
+
+
+def test_presupuesto_excedido_sin_estricto(client):
+    #fuera de las pruebas estrictas solo se registra
+    respuesta = client.get("/varias")
+    assert respuesta.status_code == 200
+
+
+def test_contar_sql(db_engine, contar_sql):
+    with contar_sql() as consultas:
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert consultas.total == 2